@@ -1,12 +1,22 @@
+import argparse
+import dataclasses
+import io
 import logging
+import subprocess
 import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
 
 from smart_contracts._helpers.build import build
-from smart_contracts._helpers.config import contracts
+from smart_contracts._helpers.config import SmartContract, get_contracts
 from smart_contracts._helpers.deploy import deploy
+from smart_contracts._helpers.instrumentation import configure
 
 # Uncomment the following lines to enable auto generation of AVM Debugger compliant sourcemap and simulation trace file.
 # Learn more about using AlgoKit AVM Debugger to debug your TEAL source codes and inspect various kinds of
@@ -22,51 +32,199 @@ logger.info("Loading .env")
 # modify `load_dotenv()` accordingly. For example, `load_dotenv('.env.localnet')`.
 load_dotenv()
 root_path = Path(__file__).parent
+# Hợp đồng được profile_costs đo chi phí opcode
+COST_CHECKED_CONTRACT = "contract"
 
 
-def main(action: str, contract_name: str | None = None) -> None:
+@dataclasses.dataclass
+class StepResult:
+    contract: str
+    step: str
+    ok: bool
+    seconds: float
+    output: str
+    app_spec_path: Path | None = None
+    error: str | None = None
+
+
+@contextmanager
+def _capture_logs():
+    """Collects log records emitted by the current thread into a buffer."""
+    buffer = io.StringIO()
+    handler = logging.StreamHandler(buffer)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-10s: %(message)s"))
+    thread_id = threading.get_ident()
+    handler.addFilter(lambda record: record.thread == thread_id)
+    logging.getLogger().addHandler(handler)
+    try:
+        yield buffer
+    finally:
+        logging.getLogger().removeHandler(handler)
+
+
+def _run_step(contract: str, step: str, action: Callable[[], Path | None]) -> StepResult:
+    started = time.perf_counter()
+    with _capture_logs() as buffer:
+        try:
+            app_spec_path = action()
+            error = None
+        except Exception as e:
+            logger.exception(f"{step} failed for {contract}")
+            app_spec_path, error = None, str(e)
+    return StepResult(
+        contract=contract,
+        step=step,
+        ok=error is None,
+        seconds=time.perf_counter() - started,
+        output=buffer.getvalue(),
+        app_spec_path=app_spec_path,
+        error=error,
+    )
+
+
+def _build_step(name: str, contract_path: Path, output_dir: Path, force: bool) -> StepResult:
+    # Top-level so it can be sent to a worker process
+    def action() -> Path:
+        logger.info(f"Building app at {contract_path}")
+        return build(output_dir, contract_path, force=force)
+
+    return _run_step(name, "build", action)
+
+
+def _find_app_spec(output_dir: Path) -> Path:
+    app_spec_file_name = next(
+        (
+            file.name
+            for file in output_dir.iterdir()
+            if file.is_file() and file.suffixes == [".arc32", ".json"]
+        ),
+        None,
+    )
+    if app_spec_file_name is None:
+        raise Exception("Could not deploy app, .arc32.json file not found")
+    return output_dir / app_spec_file_name
+
+
+def _deploy_step(contract: SmartContract, app_spec_path: Path | None, output_dir: Path) -> StepResult:
+    def action() -> None:
+        logger.info(f"Deploying app {contract.name}")
+        deploy(app_spec_path or _find_app_spec(output_dir), contract.deploy)
+
+    return _run_step(contract.name, "deploy", action)
+
+
+def _cost_check_step(contract: str) -> StepResult:
+    def action() -> None:
+        # Chạy trong tiến trình riêng vì profile_costs phải bật source map trước khi pyteal được import
+        result = subprocess.run(
+            [sys.executable, "-m", "smart_contracts._helpers.profile_costs", "--check"],
+            cwd=root_path.parent,
+            capture_output=True,
+            text=True,
+        )
+        logger.info(result.stdout.rstrip())
+        if result.returncode != 0:
+            regressions = [line for line in result.stdout.splitlines() if line.startswith("COST REGRESSION")]
+            raise Exception("; ".join(regressions) or result.stderr.strip().splitlines()[-1])
+
+    return _run_step(contract, "cost-check", action)
+
+
+@contextmanager
+def _collated_output():
+    """Holds back live console logging; each step's log is printed by `_report`."""
+    root = logging.getLogger()
+    console_handlers = root.handlers[:]
+    for handler in console_handlers:
+        root.removeHandler(handler)
+    try:
+        yield
+    finally:
+        for handler in console_handlers:
+            root.addHandler(handler)
+
+
+def _map(executor_class: type[Executor], jobs: int, step: Callable[..., StepResult], args: list[tuple]) -> list[StepResult]:
+    if jobs <= 1 or len(args) <= 1:
+        return [step(*a) for a in args]
+    with executor_class(max_workers=min(jobs, len(args))) as pool:
+        return list(pool.map(step, *zip(*args)))
+
+
+def _report(results: list[StepResult], wall_seconds: float) -> None:
+    # Output is printed per contract once its steps are done, so parallel
+    # workers never interleave their logs
+    for result in results:
+        status = "ok" if result.ok else f"FAILED: {result.error}"
+        print(f"===== {result.contract} [{result.step}] {status} ({result.seconds:.2f}s)")
+        if result.output:
+            print(result.output.rstrip())
+    failed = [f"{r.contract} [{r.step}]" for r in results if not r.ok]
+    print(
+        f"{len(results) - len(failed)}/{len(results)} steps succeeded in {wall_seconds:.2f}s"
+        + (f"; failed: {', '.join(failed)}" if failed else "")
+    )
+
+
+def main(action: str, contract_name: str | None = None, jobs: int = 1, force: bool = False) -> bool:
     artifact_path = root_path / "artifacts"
+    started = time.perf_counter()
 
     # Filter contracts if a specific contract name is provided
     filtered_contracts = [
-        c for c in contracts if contract_name is None or c.name == contract_name
+        c for c in get_contracts() if contract_name is None or c.name == contract_name
     ]
+    results: list[StepResult] = []
+    with _collated_output():
+        _run_steps(action, filtered_contracts, artifact_path, jobs, force, results)
+
+    _report(results, time.perf_counter() - started)
+    return all(r.ok for r in results)
+
+
+def _run_steps(
+    action: str,
+    filtered_contracts: list[SmartContract],
+    artifact_path: Path,
+    jobs: int,
+    force: bool,
+    results: list[StepResult],
+) -> None:
+    app_specs: dict[str, Path | None] = {c.name: None for c in filtered_contracts}
+    # Without a build step every selected contract is deployed from its existing artifacts
+    built = {c.name for c in filtered_contracts}
+
+    if action in ("build", "all"):
+        # Compilers run as subprocesses, so builds are spread over worker processes
+        build_args = [
+            (c.name, c.path, artifact_path / c.name, force) for c in filtered_contracts
+        ]
+        build_results = _map(ProcessPoolExecutor, jobs, _build_step, build_args)
+        results.extend(build_results)
+        app_specs.update({r.contract: r.app_spec_path for r in build_results})
+        built = {r.contract for r in build_results if r.ok}
+        # Ngân sách opcode trong cost_budget.json là của hợp đồng NFTicket; vượt ngân sách thì build thất bại
+        if COST_CHECKED_CONTRACT in built:
+            cost_result = _cost_check_step(COST_CHECKED_CONTRACT)
+            results.append(cost_result)
+            if not cost_result.ok:
+                built.discard(COST_CHECKED_CONTRACT)
 
-    match action:
-        case "build":
-            for contract in filtered_contracts:
-                logger.info(f"Building app at {contract.path}")
-                build(artifact_path / contract.name, contract.path)
-        case "deploy":
-            for contract in filtered_contracts:
-                output_dir = artifact_path / contract.name
-                app_spec_file_name = next(
-                    (
-                        file.name
-                        for file in output_dir.iterdir()
-                        if file.is_file() and file.suffixes == [".arc32", ".json"]
-                    ),
-                    None,
-                )
-                if app_spec_file_name is None:
-                    raise Exception("Could not deploy app, .arc32.json file not found")
-                app_spec_path = output_dir / app_spec_file_name
-                if contract.deploy:
-                    logger.info(f"Deploying app {contract.name}")
-                    deploy(app_spec_path, contract.deploy)
-        case "all":
-            for contract in filtered_contracts:
-                logger.info(f"Building app at {contract.path}")
-                app_spec_path = build(artifact_path / contract.name, contract.path)
-                if contract.deploy:
-                    logger.info(f"Deploying {contract.path.name}")
-                    deploy(app_spec_path, contract.deploy)
+    if action in ("deploy", "all"):
+        # deploy_config modules are only imported here, so a build never loads them
+        deployable = [c for c in filtered_contracts if c.name in built and c.deploy]
+        # Apps are independent, so their deployments can run concurrently
+        deploy_args = [(c, app_specs[c.name], artifact_path / c.name) for c in deployable]
+        results.extend(_map(ThreadPoolExecutor, jobs, _deploy_step, deploy_args))
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 2:
-        main(sys.argv[1], sys.argv[2])
-    elif len(sys.argv) > 1:
-        main(sys.argv[1])
-    else:
-        main("all")
+    parser = argparse.ArgumentParser(prog="python -m smart_contracts")
+    parser.add_argument("action", nargs="?", default="all", choices=["build", "deploy", "all"])
+    parser.add_argument("contract_name", nargs="?")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="build/deploy up to N contracts in parallel")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the sources are unchanged")
+    args = parser.parse_args()
+    # Xuất span/metric của các bước deploy nếu NFTICKET_TRACE_JSONL / NFTICKET_METRICS_PROM được đặt
+    configure()
+    raise SystemExit(0 if main(args.action, args.contract_name, args.jobs, args.force) else 1)
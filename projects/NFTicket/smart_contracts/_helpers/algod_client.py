@@ -0,0 +1,199 @@
+# algod_client.py
+
+import copy
+import http.client
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+from urllib import parse
+
+from algosdk import constants, error
+from algosdk.transaction import SuggestedParams
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.env import load_env
+
+# Thời gian một block trên mainnet, dùng làm TTL mặc định cho suggested params
+BLOCK_TIME_SECONDS = 2.8
+
+
+class SuggestedParamsCache:
+    """Caches suggested params until the round advances or the TTL expires."""
+
+    def __init__(self, fetch: Callable[[], SuggestedParams], ttl: float = BLOCK_TIME_SECONDS):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._params: SuggestedParams | None = None
+        self._fetched_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self) -> SuggestedParams:
+        # Giữ khoá trong lúc tải để một loạt lời gọi đồng thời chỉ tạo một request
+        with self._lock:
+            if self._params is None or time.monotonic() - self._fetched_at >= self.ttl:
+                self.misses += 1
+                self._params = self._fetch()
+                self._fetched_at = time.monotonic()
+            else:
+                self.hits += 1
+            # Trả về bản sao vì người gọi có thể sửa fee/flat_fee
+            return copy.copy(self._params)
+
+    def observe_round(self, round_num: int) -> None:
+        """Drops the cached params once a newer round than theirs is seen."""
+        with self._lock:
+            if self._params is not None and round_num > self._params.first:
+                self._params = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._params = None
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """AlgodClient over keep-alive HTTP connections with cached suggested params.
+
+    Each thread reuses its own persistent connection to the node instead of
+    opening a new one per request.
+    """
+
+    def __init__(
+        self,
+        algod_token: str,
+        algod_address: str,
+        headers: dict[str, str] | None = None,
+        params_ttl: float = BLOCK_TIME_SECONDS,
+    ):
+        super().__init__(algod_token, algod_address, headers)
+        url = parse.urlsplit(algod_address)
+        self._scheme = url.scheme or "http"
+        self._netloc = url.netloc
+        self._base_path = url.path.rstrip("/")
+        self._local = threading.local()
+        self.params_cache = SuggestedParamsCache(super().suggested_params, params_ttl)
+
+    def _connection(self, timeout: float | None) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._scheme == "https":
+                conn = http.client.HTTPSConnection(self._netloc, timeout=timeout)
+            else:
+                conn = http.client.HTTPConnection(self._netloc, timeout=timeout)
+            self._local.conn = conn
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def _drop_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def algod_request(
+        self,
+        method: str,
+        requrl: str,
+        params: algod.ParamsType | None = None,
+        data: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        response_format: str | None = "json",
+        timeout: int | None = 30,
+    ) -> algod.AlgodResponseType:
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+        if requrl not in constants.unversioned_paths:
+            requrl = algod.api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+        path = self._base_path + requrl
+
+        for attempt in range(2):
+            reused = getattr(self._local, "conn", None) is not None
+            conn = self._connection(timeout)
+            try:
+                conn.request(method, path, body=data, headers=header)
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Kết nối keep-alive có thể đã bị server đóng: mở lại một lần
+                self._drop_connection()
+                if not reused or attempt:
+                    raise
+            except OSError:
+                self._drop_connection()
+                raise
+
+        if resp.will_close:
+            self._drop_connection()
+
+        if resp.status >= 400:
+            message: Any = body.decode("utf-8", errors="replace")
+            payload: dict = {}
+            try:
+                payload = json.loads(message)
+                message = payload["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise error.AlgodHTTPError(message, resp.status, payload.get("data") if isinstance(payload, dict) else None)
+
+        if response_format == "json":
+            if not body:
+                return {}
+            try:
+                return json.loads(body)
+            except ValueError as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return body
+
+    def suggested_params(self, **kwargs: Any) -> SuggestedParams:
+        if kwargs:
+            return super().suggested_params(**kwargs)
+        return self.params_cache.get()
+
+    def status(self, **kwargs: Any) -> algod.AlgodResponseType:
+        status = super().status(**kwargs)
+        self._observe(status)
+        return status
+
+    def status_after_block(self, block_num: int | None = None, round_num: int | None = None, **kwargs: Any) -> algod.AlgodResponseType:
+        status = super().status_after_block(block_num, round_num, **kwargs)
+        self._observe(status)
+        return status
+
+    def _observe(self, status: algod.AlgodResponseType) -> None:
+        if isinstance(status, dict) and "last-round" in status:
+            self.params_cache.observe_round(status["last-round"])
+
+
+_clients: dict[tuple[str, str], PooledAlgodClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_algod_client(algod_token: str | None = None, algod_address: str | None = None) -> PooledAlgodClient:
+    """Returns the shared client for the node configured in the environment."""
+    if algod_token is None or algod_address is None:
+        load_env()
+    token = algod_token if algod_token is not None else os.getenv('NODELY_API_KEY', '')
+    address = algod_address if algod_address is not None else os.getenv('NODELY_ENDPOINT_URL', '')
+    with _clients_lock:
+        client = _clients.get((token, address))
+        if client is None:
+            client = PooledAlgodClient(token, address)
+            _clients[(token, address)] = client
+        return client
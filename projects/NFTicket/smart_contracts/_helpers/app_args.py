@@ -0,0 +1,30 @@
+# app_args.py
+
+# Mã hoá argument cho các lời gọi NFTicket, dùng chung cho mọi helper
+
+
+def encode_uint64(value: int) -> bytes:
+    return value.to_bytes(8, 'big')
+
+
+def create_event_args(nft_id: int, end_timestamp: int, ticket_count: int) -> list[bytes]:
+    return [
+        "create_event".encode('utf-8'),
+        encode_uint64(nft_id),
+        encode_uint64(end_timestamp),
+        encode_uint64(ticket_count),
+    ]
+
+
+def stop_event_args(event_id: int) -> list[bytes]:
+    return [
+        "stop_event".encode('utf-8'),
+        encode_uint64(event_id),
+    ]
+
+
+def add_attendant_args(event_id: int) -> list[bytes]:
+    return [
+        "add_attendant".encode('utf-8'),
+        encode_uint64(event_id),
+    ]
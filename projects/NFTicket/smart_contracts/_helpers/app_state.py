@@ -0,0 +1,300 @@
+# app_state.py
+
+# Đọc trạng thái ứng dụng NFTicket thành các kiểu có cấu trúc, có cache theo round.
+
+import base64
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from algosdk import error
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.confirmation import decode_block
+from smart_contracts._helpers.event_box import decode_event_record, event_box_name, is_event_box_name
+
+EVENT_COUNT_KEY = "event_count"
+CREATE_EVENT = b"create_event"
+# Khi cache chậm hơn số round này, đọc lại toàn bộ thay vì đọc từng block
+MAX_BLOCK_SCAN = 64
+
+
+class TicketsUnavailableError(Exception):
+    """Cached state shows that an add_attendant call would be rejected."""
+
+
+@dataclass(frozen=True)
+class Event:
+    event_id: int
+    nft_id: int
+    end: int
+    stopped: bool
+    capacity: int
+    issued: int
+
+    @classmethod
+    def from_record(cls, event_id: int, value: bytes) -> "Event":
+        record = decode_event_record(value)
+        return cls(
+            event_id=event_id,
+            nft_id=record["nft_id"],
+            end=record["end"],
+            stopped=bool(record["stopped"]),
+            capacity=record["ticket_count"],
+            issued=record["ticket_issued"],
+        )
+
+    @property
+    def remaining(self) -> int:
+        return self.capacity - self.issued
+
+    @property
+    def sold_out(self) -> bool:
+        # Tổng số vé không đổi và số vé đã phát hành chỉ tăng, nên hết vé là trạng thái vĩnh viễn
+        return self.issued >= self.capacity
+
+
+@dataclass(frozen=True)
+class AppSnapshot:
+    app_id: int
+    round: int
+    global_state: dict[str, int | bytes]
+    events: dict[int, Event]
+
+    @property
+    def event_count(self) -> int:
+        return int(self.global_state.get(EVENT_COUNT_KEY, 0))
+
+
+@dataclass
+class _AppCache:
+    snapshot: AppSnapshot | None = None
+    # Giá trị box thô của từng sự kiện, để chỉ giải mã lại những box đã thay đổi
+    raw_events: dict[int, bytes] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def ensure_tickets_available(event: Event | None, event_id: int, wanted: int = 1) -> int:
+    """Returns how many of `wanted` tickets the event can still issue.
+
+    Raises `TicketsUnavailableError` if the event doesn't exist or is sold out.
+    """
+    if event is None:
+        raise TicketsUnavailableError(f"Event {event_id} does not exist")
+    if event.sold_out:
+        raise TicketsUnavailableError(f"Event {event_id} is sold out")
+    return min(wanted, event.remaining)
+
+
+def decode_global_state(items: list[dict]) -> dict[str, int | bytes]:
+    """Decodes algod's global-state list using the declared value types."""
+    state: dict[str, int | bytes] = {}
+    for item in items:
+        key = base64.b64decode(item['key']).decode('utf-8', errors='backslashreplace')
+        value = item['value']
+        state[key] = value['uint'] if value['type'] == 2 else base64.b64decode(value.get('bytes', ''))
+    return state
+
+
+def _app_calls(stxns: list[dict]):
+    # Gồm cả lời gọi nội bộ (inner transaction) do app khác thực hiện
+    for stxn in stxns:
+        if stxn['txn'].get('type') == 'appl':
+            yield stxn['txn']
+        yield from _app_calls(stxn.get('dt', {}).get('itx') or [])
+
+
+class AppStateReader:
+    """Reads NFTicket app state as typed `Event`s, cached per round.
+
+    A read in the same round as the cached snapshot costs one `status` call.
+    Once the round advances, the reader reads the new blocks and refetches
+    only the event boxes referenced by calls to the app in them, plus the
+    boxes of events created since; the global state is read again only
+    when an event was created. A cache more than `max_block_scan` rounds
+    behind is rebuilt from all event boxes instead. Only boxes whose bytes
+    changed are decoded into new `Event`s. A snapshot's `round` is the last
+    round whose changes it includes.
+    """
+
+    def __init__(self, client: algod.AlgodClient, max_workers: int = 8, max_block_scan: int = MAX_BLOCK_SCAN):
+        self.client = client
+        self.max_workers = max_workers
+        self.max_block_scan = max_block_scan
+        # Chỉ dùng để tải box; read_many có pool riêng để tránh chờ lồng nhau trong cùng một pool
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._caches: dict[int, _AppCache] = {}
+        self._caches_lock = threading.Lock()
+        # (app_id, event_id) -> (round, Event | None), cho các lần đọc một sự kiện; cũng được bảo vệ bởi _caches_lock
+        self._events: dict[tuple[int, int], tuple[int, Event | None]] = {}
+        self._invalidations = 0  # Tăng mỗi lần invalidate, để lần đọc đang dở không ghi lại dữ liệu cũ
+        self.refreshes = 0
+        self.decoded = 0
+        self.boxes_read = 0
+
+    def current_round(self) -> int:
+        return self.client.status()['last-round']
+
+    def read(self, app_id: int, round_num: int | None = None) -> AppSnapshot:
+        """Returns the app's state as of `round_num` (default: the node's last round)."""
+        if round_num is None:
+            round_num = self.current_round()
+        cache = self._cache(app_id)
+        with cache.lock:
+            if cache.snapshot is None or cache.snapshot.round < round_num:
+                cache.snapshot = self._refresh(app_id, round_num, cache)
+            return cache.snapshot
+
+    def read_many(self, app_ids: list[int]) -> dict[int, AppSnapshot]:
+        """Reads several apps in parallel against one shared round."""
+        round_num = self.current_round()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(app_ids)))) as pool:
+            futures = {app_id: pool.submit(self.read, app_id, round_num) for app_id in app_ids}
+            return {app_id: future.result() for app_id, future in futures.items()}
+
+    def event(self, app_id: int, event_id: int) -> Event | None:
+        """Returns one event, reading only its box when the cache is behind.
+
+        A sold-out event is returned from cache without asking the node.
+        """
+        with self._caches_lock:
+            cached = self._events.get((app_id, event_id))
+            invalidations = self._invalidations
+        if cached is not None and cached[1] is not None and cached[1].sold_out:
+            return cached[1]
+        round_num = self.current_round()
+        if cached is not None and cached[0] >= round_num:
+            return cached[1]
+        with self._caches_lock:
+            cache = self._caches.get(app_id)
+            snapshot = None if cache is None else cache.snapshot
+        if snapshot is not None and snapshot.round >= round_num:
+            event = snapshot.events.get(event_id)
+        else:
+            raw = self._read_box(app_id, event_id)
+            event = None if raw is None else Event.from_record(event_id, raw)
+        with self._caches_lock:
+            if self._invalidations == invalidations:
+                self._events[(app_id, event_id)] = (round_num, event)
+        return event
+
+    def invalidate(self, app_id: int | None = None) -> None:
+        with self._caches_lock:
+            self._invalidations += 1
+            if app_id is None:
+                self._caches.clear()
+                self._events.clear()
+            else:
+                self._caches.pop(app_id, None)
+                for key in [key for key in self._events if key[0] == app_id]:
+                    del self._events[key]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _cache(self, app_id: int) -> _AppCache:
+        with self._caches_lock:
+            return self._caches.setdefault(app_id, _AppCache())
+
+    def _refresh(self, app_id: int, round_num: int, cache: _AppCache) -> AppSnapshot:
+        self.refreshes += 1
+        snapshot = cache.snapshot
+        if snapshot is None or round_num - snapshot.round > self.max_block_scan:
+            return self._load(app_id, round_num, cache)
+        return self._catch_up(app_id, snapshot, round_num, cache)
+
+    def _load(self, app_id: int, round_num: int, cache: _AppCache) -> AppSnapshot:
+        global_state = self._global_state(app_id)
+        event_count = int(global_state.get(EVENT_COUNT_KEY, 0))
+        # event_id chạy liên tục từ 1 đến event_count, nên không cần liệt kê box
+        values, read_round = self._read_boxes(app_id, range(1, event_count + 1))
+        events = self._decode(values, cache.snapshot.events if cache.snapshot else {}, cache)
+        snapshot = AppSnapshot(app_id=app_id, round=round_num, global_state=global_state, events=events)
+        if read_round > round_num:
+            # Box được đọc ở round mới hơn: áp dụng các block ở giữa để cả snapshot đúng với round đó
+            snapshot = self._catch_up(app_id, snapshot, read_round, cache)
+        return snapshot
+
+    def _catch_up(self, app_id: int, snapshot: AppSnapshot, round_num: int, cache: _AppCache) -> AppSnapshot:
+        """Applies blocks after `snapshot.round` up to `round_num`."""
+        touched, created = self._scan_blocks(app_id, snapshot.round + 1, round_num)
+        global_state = snapshot.global_state
+        if created:
+            global_state = self._global_state(app_id)
+            touched.update(range(snapshot.event_count + 1, int(global_state.get(EVENT_COUNT_KEY, 0)) + 1))
+        values, _ = self._read_boxes(app_id, sorted(touched))
+        events = {**snapshot.events, **self._decode(values, snapshot.events, cache)}
+        for event_id, raw in values.items():
+            if raw is None:
+                events.pop(event_id, None)
+        return AppSnapshot(app_id=app_id, round=round_num, global_state=global_state, events=events)
+
+    def _scan_blocks(self, app_id: int, first: int, last: int) -> tuple[set[int], bool]:
+        """Event ids whose boxes calls to the app referenced in rounds first..last, and whether one created an event."""
+        touched: set[int] = set()
+        created = False
+        for round_num in range(first, last + 1):
+            block = decode_block(self.client.block_info(round_num, response_format="msgpack"))
+            for txn in _app_calls(block.get('txns', [])):
+                if txn.get('apid') != app_id:
+                    continue
+                args = txn.get('apaa') or []
+                created = created or (bool(args) and args[0] == CREATE_EVENT)
+                # Hợp đồng chỉ ghi được vào box đã tham chiếu; i = 0 là chính app được gọi
+                for ref in txn.get('apbx') or []:
+                    name = ref.get('n', b"")
+                    if ref.get('i', 0) == 0 and is_event_box_name(name):
+                        touched.add(int.from_bytes(name, 'big'))
+        return touched, created
+
+    def _global_state(self, app_id: int) -> dict[str, int | bytes]:
+        app_info = self.client.application_info(app_id)
+        return decode_global_state(app_info['params'].get('global-state', []))
+
+    def _read_boxes(self, app_id: int, event_ids) -> tuple[dict[int, bytes | None], int]:
+        """Reads event boxes in parallel; returns their values and the earliest round they were read at."""
+        results = list(self._executor.map(lambda event_id: self._read_box_at(app_id, event_id), event_ids))
+        self.boxes_read += len(results)
+        values = {event_id: raw for event_id, (raw, _) in zip(event_ids, results)}
+        rounds = [read_round for _, read_round in results if read_round]
+        return values, min(rounds, default=0)
+
+    def _decode(self, values: dict[int, bytes | None], previous: dict[int, Event], cache: _AppCache) -> dict[int, Event]:
+        events = {}
+        for event_id, raw in values.items():
+            if raw is None:
+                continue
+            if cache.raw_events.get(event_id) == raw and event_id in previous:
+                events[event_id] = previous[event_id]
+            else:
+                events[event_id] = Event.from_record(event_id, raw)
+                cache.raw_events[event_id] = raw
+                self.decoded += 1
+        return events
+
+    def _read_box(self, app_id: int, event_id: int) -> bytes | None:
+        return self._read_box_at(app_id, event_id)[0]
+
+    def _read_box_at(self, app_id: int, event_id: int) -> tuple[bytes | None, int | None]:
+        try:
+            box = self.client.application_box_by_name(app_id, event_box_name(event_id))
+        except error.AlgodHTTPError as e:
+            if e.code == 404:
+                return None, None
+            raise
+        return base64.b64decode(box['value']), box.get('round')
+
+
+_readers: "weakref.WeakKeyDictionary[algod.AlgodClient, AppStateReader]" = weakref.WeakKeyDictionary()
+_readers_lock = threading.Lock()
+
+
+def get_state_reader(client: algod.AlgodClient) -> AppStateReader:
+    """Returns the shared reader for a client, creating it on first use."""
+    with _readers_lock:
+        reader = _readers.get(client)
+        if reader is None:
+            reader = AppStateReader(client)
+            _readers[client] = reader
+        return reader
@@ -0,0 +1,295 @@
+# async_client.py
+
+import asyncio
+import base64
+import copy
+import logging
+import os
+import time
+from typing import Any
+
+import httpx
+from algosdk import account, constants, encoding, error
+from algosdk.logic import get_application_address
+from algosdk.transaction import (
+    ApplicationNoOpTxn,
+    PaymentTxn,
+    SuggestedParams,
+    Transaction,
+    assign_group_id,
+)
+
+from smart_contracts._helpers.algod_client import BLOCK_TIME_SECONDS
+from smart_contracts._helpers.app_args import (
+    add_attendant_args,
+    create_event_args,
+    stop_event_args,
+)
+from smart_contracts._helpers import confirmation
+from smart_contracts._helpers.env import PRIVATE_KEY_ENV, get_private_key, load_env
+from smart_contracts._helpers.event_box import (
+    add_attendant_box_refs,
+    event_box_ref,
+    event_funding,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressureError(Exception):
+    """Raised when more calls are queued than the client is allowed to hold."""
+
+
+class AsyncConfirmationWaiter:
+    """Asyncio driver of `ConfirmationTracker`, on the caller's HTTP client.
+
+    While something is watched, one task awaits
+    `/status/wait-for-block-after` and reads each new block once as
+    msgpack; which blocks to read, when a watch expires and how node errors
+    back off are decided by the tracker, exactly as for the threaded
+    `ConfirmationWaiter`.
+
+    `request(method, path, raw=False)` is the coroutine that sends a
+    request to algod's `/v2` API, e.g. `NFTicketClient._request`.
+    """
+
+    def __init__(self, request, round_seconds: float = BLOCK_TIME_SECONDS, lookback: int = confirmation.LOOKBACK_ROUNDS):
+        self._request = request
+        self._tracker = confirmation.ConfirmationTracker(round_seconds, lookback)
+        self._task: asyncio.Task | None = None
+
+    def watch(self, txid: str, timeout_rounds: int = 10) -> asyncio.Future:
+        """Returns a future resolved with the confirmed txn info."""
+        loop = asyncio.get_running_loop()
+        future = self._tracker.watch(txid, timeout_rounds, loop.create_future, loop.time())
+        if not future.done() and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+        return future
+
+    async def wait(self, txid: str, timeout_rounds: int = 10) -> dict:
+        # Future dùng chung giữa các lời gọi cùng txid, nên một lời gọi bị huỷ không được huỷ nó
+        return await asyncio.shield(self.watch(txid, timeout_rounds))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for future in self._tracker.close():
+            future.cancel()
+
+    async def _run(self) -> None:
+        tracker = self._tracker
+        tracker.idle()
+        while tracker.pending:
+            try:
+                if tracker.scanned is None:
+                    tracker.start((await self._request("GET", "/status"))["last-round"])
+                status = await self._request("GET", f"/status/wait-for-block-after/{tracker.scanned}")
+                for round_num in tracker.rounds_to_read(status["last-round"]):
+                    raw = await self._request("GET", f"/blocks/{round_num}", params={"format": "msgpack"}, raw=True)
+                    for future, info in tracker.add_block(round_num, raw):
+                        confirmation.settle(future, info)
+                for txid in tracker.due():
+                    ended = tracker.expire(txid, await self._check(txid))
+                    if ended is not None:
+                        confirmation.settle(*ended)
+                tracker.succeeded()
+            except Exception as e:
+                delay, failed = tracker.failed(e, asyncio.get_running_loop().time())
+                logger.warning(f"Async confirmation waiter failed to query node ({tracker.failures} in a row), retrying in {delay:.1f}s: {e}")
+                for future, exc in failed:
+                    confirmation.settle(future, exc)
+                await asyncio.sleep(delay)
+
+    async def _check(self, txid: str) -> dict | None:
+        try:
+            return await self._request("GET", f"/transactions/pending/{txid}")
+        except error.AlgodHTTPError as e:
+            # Node có thể trả 404 khi giao dịch chưa tới pool của nó
+            if e.code == 404:
+                return None
+            raise
+
+
+class NFTicketClient:
+    """Asyncio client for the NFTicket contract calls.
+
+    Requests go through one pooled `httpx.AsyncClient`. At most
+    `max_in_flight` submissions run at once; once `max_queued` more are
+    waiting, new calls fail fast with `BackpressureError` instead of piling
+    up. Confirmations are awaited on the same connection pool by an
+    `AsyncConfirmationWaiter`, so no thread is involved. `transport` is
+    passed to `httpx.AsyncClient`, e.g. `fake_algod.mock_transport()` in
+    tests.
+    """
+
+    def __init__(
+        self,
+        app_id: int,
+        algod_address: str | None = None,
+        algod_token: str | None = None,
+        private_key: str | None = None,
+        max_in_flight: int = 64,
+        max_queued: int = 1024,
+        max_connections: int = 32,
+        params_ttl: float = BLOCK_TIME_SECONDS,
+        timeout_rounds: int = 10,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        load_env()
+        self.app_id = app_id
+        self.algod_address = algod_address if algod_address is not None else os.getenv('NODELY_ENDPOINT_URL', '')
+        self.algod_token = algod_token if algod_token is not None else os.getenv('NODELY_API_KEY', '')
+        if private_key is None and os.getenv(PRIVATE_KEY_ENV):
+            private_key = get_private_key()
+        self.private_key = private_key
+        self.max_queued = max_queued
+        self.timeout_rounds = timeout_rounds
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._queued = 0
+        self._http = httpx.AsyncClient(
+            base_url=self.algod_address.rstrip("/"),
+            headers={constants.algod_auth_header: self.algod_token},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=30.0,
+            transport=transport,
+        )
+        self.confirmations = AsyncConfirmationWaiter(self._request)
+        self._params: SuggestedParams | None = None
+        self._params_at = 0.0
+        self._params_ttl = params_ttl
+        self._params_lock = asyncio.Lock()
+        # Id nhỏ nhất chưa được lời gọi create_event nào đã gửi dùng; 0 thì đọc lại từ event_count
+        self._next_event_id = 0
+        self._create_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "NFTicketClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.confirmations.close()
+        await self._http.aclose()
+
+    async def _request(self, method: str, path: str, raw: bool = False, **kwargs: Any) -> Any:
+        resp = await self._http.request(method, "/v2" + path, **kwargs)
+        if resp.status_code >= 400:
+            try:
+                payload = resp.json()
+                message = payload.get("message", resp.text)
+            except ValueError:
+                payload, message = {}, resp.text
+            raise error.AlgodHTTPError(message, resp.status_code, payload.get("data"))
+        if raw:
+            return resp.content
+        return resp.json() if resp.content else {}
+
+    async def suggested_params(self) -> SuggestedParams:
+        # Một request cho cả loạt lời gọi trong cùng một block
+        async with self._params_lock:
+            if self._params is None or time.monotonic() - self._params_at >= self._params_ttl:
+                res = await self._request("GET", "/transactions/params")
+                self._params = SuggestedParams(
+                    res["fee"],
+                    res["last-round"],
+                    res["last-round"] + 1000,
+                    res["genesis-hash"],
+                    res["genesis-id"],
+                    False,
+                    res["consensus-version"],
+                    res["min-fee"],
+                )
+                self._params_at = time.monotonic()
+            return copy.copy(self._params)
+
+    async def _send(self, txns: Transaction | list[Transaction], private_key: str) -> str:
+        if isinstance(txns, Transaction):
+            txns = [txns]
+        elif len(txns) > 1:
+            assign_group_id(txns)
+        res = await self._request(
+            "POST",
+            "/transactions",
+            content=b"".join(base64.b64decode(encoding.msgpack_encode(txn.sign(private_key))) for txn in txns),
+            headers={"Content-Type": "application/x-binary"},
+        )
+        return res["txId"]
+
+    async def event_count(self) -> int:
+        app_info = await self._request("GET", f"/applications/{self.app_id}")
+        for item in app_info["params"].get("global-state", []):
+            if base64.b64decode(item["key"]) == b"event_count":
+                return item["value"]["uint"]
+        return 0
+
+    async def _call(self, build, private_key: str | None) -> dict:
+        txid = await self._submit(build, private_key)
+        # Chờ xác nhận ngoài giới hạn đồng thời: mọi txid được giải quyết chung một lần đọc block
+        return await self.confirmations.wait(txid, self.timeout_rounds)
+
+    async def _submit(self, build, private_key: str | None) -> str:
+        private_key = private_key or self.private_key
+        if private_key is None:
+            raise ValueError("No private key configured for NFTicketClient")
+        if self._slots.locked() and self._queued >= self.max_queued:
+            raise BackpressureError(f"More than {self.max_queued} NFTicket calls are waiting")
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        try:
+            sender = account.address_from_private_key(private_key)
+            params = await self.suggested_params()
+            return await self._send(build(sender, params), private_key)
+        finally:
+            self._slots.release()
+
+    async def create_event(self, nft_id: int, end_timestamp: int, ticket_count: int, private_key: str | None = None) -> dict:
+        # Box của sự kiện mới phải được tham chiếu và được nạp số dư tối thiểu trong cùng nhóm.
+        # event_count chỉ tính sự kiện đã xác nhận, nên các lời gọi đồng thời lấy id nối tiếp
+        # nhau dưới khoá, từ id sau lời gọi cuối cùng đã được node nhận
+        async with self._create_lock:
+            event_id = max(await self.event_count() + 1, self._next_event_id)
+            try:
+                txid = await self._submit(
+                    lambda sender, params: [
+                        PaymentTxn(sender, params, get_application_address(self.app_id), event_funding(ticket_count)),
+                        ApplicationNoOpTxn(
+                            sender, params, self.app_id, create_event_args(nft_id, end_timestamp, ticket_count),
+                            boxes=[event_box_ref(event_id)],
+                        ),
+                    ],
+                    private_key,
+                )
+            except Exception:
+                self._next_event_id = 0
+                raise
+            self._next_event_id = event_id + 1
+        try:
+            return await self.confirmations.wait(txid, self.timeout_rounds)
+        except Exception:
+            # Lời gọi không vào được chain thì các id phía sau đã dự đoán sai
+            self._next_event_id = 0
+            raise
+
+    async def stop_event(self, event_id: int, private_key: str | None = None) -> dict:
+        return await self._call(
+            lambda sender, params: ApplicationNoOpTxn(
+                sender, params, self.app_id, stop_event_args(event_id), boxes=[event_box_ref(event_id)]
+            ),
+            private_key,
+        )
+
+    async def add_attendant(self, event_id: int, private_key: str | None = None) -> dict:
+        return await self._call(
+            lambda sender, params: ApplicationNoOpTxn(
+                sender, params, self.app_id, add_attendant_args(event_id), boxes=add_attendant_box_refs(event_id, sender)
+            ),
+            private_key,
+        )
@@ -0,0 +1,49 @@
+# attendance.py
+
+import base64
+import sys
+
+from algosdk import encoding, error
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.event_box import attendant_box_name, decode_ticket_number
+
+APP_ID = 724732255  # Application ID mới của bạn
+
+
+def prove_attendance(client: algod.AlgodClient, app_id: int, event_id: int, address: str) -> dict | None:
+    """Returns proof that `address` holds a ticket for `event_id`, or None.
+
+    The proof is the attendant box read from algod: its name, the ticket
+    number stored in it and the round the node served it at, which a gate
+    scanner can log or re-check later.
+    """
+    if not encoding.is_valid_address(address):
+        raise ValueError(f"Invalid address: {address}")
+    name = attendant_box_name(event_id, address)
+    try:
+        box = client.application_box_by_name(app_id, name)
+    except error.AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+    return {
+        "app_id": app_id,
+        "event_id": event_id,
+        "address": address,
+        "ticket_number": decode_ticket_number(base64.b64decode(box['value'])),
+        "box_name": base64.b64encode(name).decode(),
+        "round": box.get('round'),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Sử dụng: python -m smart_contracts._helpers.attendance <event_id> <address>")
+        sys.exit(1)
+    proof = prove_attendance(get_algod_client(), APP_ID, int(sys.argv[1]), sys.argv[2])
+    if proof is None:
+        print("Địa chỉ này không có vé cho sự kiện.")
+        sys.exit(1)
+    print(proof)
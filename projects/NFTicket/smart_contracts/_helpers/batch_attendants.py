@@ -0,0 +1,268 @@
+# batch_attendants.py
+
+import argparse
+import csv
+import json
+import re
+import sys
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from algosdk import account, error, mnemonic
+from algosdk.transaction import ApplicationNoOpTxn, assign_group_id
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import add_attendant_args
+from smart_contracts._helpers.app_state import (
+    AppStateReader,
+    TicketsUnavailableError,
+    ensure_tickets_available,
+    get_state_reader,
+)
+from smart_contracts._helpers.confirmation import get_confirmation_waiter
+from smart_contracts._helpers.event_box import add_attendant_box_refs
+
+APP_ID = 724732255  # Application ID mới của bạn
+
+MAX_GROUP_SIZE = 16  # Giới hạn số giao dịch trong một atomic group
+
+# algod nêu txid của giao dịch bị từ chối: "transaction <txid>: logic eval error: ..."
+_REJECTED_TXID = re.compile(r"transaction ([A-Z2-7]{52})")
+
+
+@dataclass
+class Purchase:
+    private_key: str
+    event_id: int
+
+    @property
+    def address(self) -> str:
+        return account.address_from_private_key(self.private_key)
+
+
+@dataclass
+class IssuanceResult:
+    address: str
+    event_id: int
+    ok: bool = False
+    txid: str | None = None
+    confirmed_round: int | None = None
+    error: str | None = None
+
+
+@dataclass
+class BatchReport:
+    results: list[IssuanceResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for r in self.results if r.ok)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.succeeded
+
+    def to_dict(self) -> dict:
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "results": [asdict(r) for r in self.results],
+        }
+
+
+@dataclass
+class _Slot:
+    """One attendant inside a planned group."""
+
+    purchase: Purchase
+    address: str
+    result: IssuanceResult
+
+
+def plan_groups(slots: list[_Slot]) -> list[list[_Slot]]:
+    """Packs slots into atomic groups of at most MAX_GROUP_SIZE add_attendant calls."""
+    return [slots[i:i + MAX_GROUP_SIZE] for i in range(0, len(slots), MAX_GROUP_SIZE)]
+
+
+def _build_group(app_id, params, group: list[_Slot]):
+    # Mỗi phần tử: (giao dịch, private key, slot)
+    entries = []
+    for slot in group:
+        txn = ApplicationNoOpTxn(
+            slot.address, params, app_id, add_attendant_args(slot.purchase.event_id),
+            boxes=add_attendant_box_refs(slot.purchase.event_id, slot.address),
+        )
+        entries.append((txn, slot.purchase.private_key, slot))
+    assign_group_id([txn for txn, _, _ in entries])
+    return entries
+
+
+def _submit_group(client, app_id, params, entries, signed, wait_rounds) -> list[tuple[list[_Slot], Future]]:
+    """Submits one group; returns (slots, confirmation) for every submission the node accepted.
+
+    When the node rejects the group and names the member that failed, that
+    member is failed and the others are regrouped and resubmitted. When it
+    names none, each member is resubmitted on its own.
+    """
+    waiter = get_confirmation_waiter(client)
+    accepted = []
+    queue = [(entries, signed)]
+    while queue:
+        entries, signed = queue.pop(0)
+        for (txn, _, slot) in entries:
+            slot.result.txid = txn.get_txid()
+        try:
+            txid = client.send_transactions(signed)
+        except error.AlgodHTTPError as e:
+            if e.code != 400:
+                raise
+            queue += _split_rejected(app_id, params, entries, e)
+            continue
+        accepted.append(([slot for _, _, slot in entries], waiter.watch(txid, wait_rounds)))
+    return accepted
+
+
+def _split_rejected(app_id, params, entries, exc: error.AlgodHTTPError) -> list:
+    slots = [slot for _, _, slot in entries]
+    if len(slots) == 1:
+        slots[0].result.error = str(exc)
+        return []
+    match = _REJECTED_TXID.search(str(exc))
+    rejected = next((slot for txn, _, slot in entries if match and txn.get_txid() == match.group(1)), None)
+    if rejected is None:
+        # Không biết giao dịch nào lỗi: gửi lại từng giao dịch riêng
+        groups = [[slot] for slot in slots]
+    else:
+        rejected.result.error = str(exc)
+        groups = [[slot for slot in slots if slot is not rejected]]
+    resubmit = []
+    for group in groups:
+        # Nhóm mới có group id mới, nên phải ký lại
+        rebuilt = _build_group(app_id, params, group)
+        resubmit.append((rebuilt, [txn.sign(key) for txn, key, _ in rebuilt]))
+    return resubmit
+
+
+def _record_group(entries, submission: Future) -> None:
+    try:
+        accepted = submission.result()
+    except Exception as e:
+        for _, _, slot in entries:
+            if slot.result.error is None:
+                slot.result.error = str(e)
+        return
+    for slots, confirmation in accepted:
+        try:
+            confirmed_txn = confirmation.result()
+        except Exception as e:
+            # Atomic group: một giao dịch lỗi thì cả nhóm đều thất bại
+            for slot in slots:
+                slot.result.error = str(e)
+            continue
+        for slot in slots:
+            slot.result.ok = True
+            slot.result.confirmed_round = confirmed_txn.get('confirmed-round')
+
+
+def issue_tickets(
+    client: algod.AlgodClient,
+    app_id: int,
+    purchases: Iterable[Purchase],
+    max_workers: int = 8,
+    wait_rounds: int = 10,
+    reader: AppStateReader | None = None,
+) -> BatchReport:
+    """Issues tickets for many (account, event_id) pairs in atomic groups.
+
+    Purchases the cached event state says can't succeed (unknown or sold-out
+    event, or more buyers than tickets left) are failed before submitting,
+    so they neither cost fees nor take the rest of their group down. A
+    group the node still rejects is resubmitted without the rejected
+    purchase (see `_submit_group`).
+    """
+    report = BatchReport()
+    slots: list[_Slot] = []
+    seen: set[tuple[str, int]] = set()
+    for purchase in purchases:
+        address = purchase.address
+        result = IssuanceResult(address=address, event_id=purchase.event_id)
+        report.results.append(result)
+        if (address, purchase.event_id) in seen:
+            # Hợp đồng từ chối đăng ký trùng, nên loại bỏ trước khi gửi
+            result.error = "duplicate purchase in batch"
+            continue
+        seen.add((address, purchase.event_id))
+        slots.append(_Slot(purchase, address, result))
+
+    slots = _within_capacity(slots, app_id, reader or get_state_reader(client))
+    if not slots:
+        return report
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Lấy thông số giao dịch một lần cho cả lô
+        params = client.suggested_params()
+
+        built = [_build_group(app_id, params, group) for group in plan_groups(slots)]
+        flat = [(txn, key) for entries in built for txn, key, _ in entries]
+        signed_flat = list(pool.map(lambda item: item[0].sign(item[1]), flat))
+
+        submissions = []
+        offset = 0
+        for entries in built:
+            signed = signed_flat[offset:offset + len(entries)]
+            offset += len(entries)
+            submissions.append(pool.submit(_submit_group, client, app_id, params, entries, signed, wait_rounds))
+        # Mọi nhóm được xác nhận từ cùng một vòng chờ block
+        for entries, submission in zip(built, submissions):
+            _record_group(entries, submission)
+
+    return report
+
+
+def _within_capacity(slots: list[_Slot], app_id: int, reader: AppStateReader) -> list[_Slot]:
+    available: dict[int, int] = {}
+    reasons: dict[int, str] = {}
+    kept = []
+    for slot in slots:
+        event_id = slot.purchase.event_id
+        if event_id not in available:
+            try:
+                available[event_id] = ensure_tickets_available(reader.event(app_id, event_id), event_id, len(slots))
+            except TicketsUnavailableError as e:
+                available[event_id] = 0
+                reasons[event_id] = str(e)
+        if available[event_id] == 0:
+            slot.result.error = reasons.get(event_id, f"Event {event_id} has fewer tickets left than buyers in this batch")
+            continue
+        available[event_id] -= 1
+        kept.append(slot)
+    return kept
+
+
+def read_purchases(path: str) -> list[Purchase]:
+    """Reads `mnemonic,event_id` rows from a CSV file."""
+    purchases = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            purchases.append(Purchase(mnemonic.to_private_key(row['mnemonic']), int(row['event_id'])))
+    return purchases
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Phát hành vé hàng loạt cho nhiều người tham gia")
+    parser.add_argument("purchases", help="CSV với các cột mnemonic,event_id")
+    parser.add_argument("--app-id", type=int, default=APP_ID)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--report", help="Ghi báo cáo JSON ra file")
+    args = parser.parse_args()
+
+    client = get_algod_client()
+    report = issue_tickets(client, args.app_id, read_purchases(args.purchases), max_workers=args.workers)
+    output = json.dumps(report.to_dict(), indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(0 if report.failed == 0 else 1)
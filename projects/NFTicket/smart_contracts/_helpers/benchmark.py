@@ -0,0 +1,289 @@
+# benchmark.py
+
+# Đo hiệu năng khi mở bán vé: N người mua ảo cùng gọi add_attendant cho một sự kiện,
+# trên LocalNet hoặc trên FakeAlgod chạy trong tiến trình.
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from algosdk import account
+from algosdk.transaction import ApplicationNoOpTxn, PaymentTxn, assign_group_id
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import add_attendant_args
+from smart_contracts._helpers.app_state import AppStateReader
+from smart_contracts._helpers.attendance import prove_attendance
+from smart_contracts._helpers.confirmation import get_confirmation_waiter
+from smart_contracts._helpers.create_event import call_create_event
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.event_box import add_attendant_box_refs
+from smart_contracts._helpers.fake_algod import FakeAlgod
+
+LOCALNET_ADDRESS = "http://localhost:4001"
+LOCALNET_TOKEN = "a" * 64
+BUYER_FUNDING = 200_000  # Đủ số dư tối thiểu và phí cho vài giao dịch
+
+
+@dataclass
+class OnSaleConfig:
+    buyers: int = 1000
+    tickets: int = 500
+    duplicate_rate: float = 0.1
+    concurrency: int = 32
+    wait_rounds: int = 10
+    seed: int = 0
+
+
+@dataclass
+class _Request:
+    private_key: str
+    address: str
+    duplicate: bool
+    started: float = 0.0
+    latency: float | None = None
+    confirmed: bool = False
+    error: str | None = None
+
+
+@dataclass
+class OnSaleResult:
+    backend: str
+    config: OnSaleConfig
+    commit: str | None
+    wall_seconds: float
+    submitted: int
+    confirmed: int
+    rejected: int
+    duplicates_sent: int
+    duplicates_rejected: int
+    buyers_confirmed_twice: int
+    tickets_issued: int
+    tickets_remaining: int
+    latency_ms: dict[str, float | None] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def confirmed_per_second(self) -> float:
+        return self.confirmed / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def duplicate_rejected_rate(self) -> float | None:
+        return self.duplicates_rejected / self.duplicates_sent if self.duplicates_sent else None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["confirmed_per_second"] = round(self.confirmed_per_second, 2)
+        data["duplicate_rejected_rate"] = self.duplicate_rejected_rate
+        data["oversold"] = self.tickets_issued > self.config.tickets
+        return data
+
+
+def percentiles(samples: list[float]) -> dict[str, float | None]:
+    """p50/p95/p99 of the samples in milliseconds."""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else None
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {name: round(cuts[index] * 1000, 3) for name, index in (("p50", 49), ("p95", 94), ("p99", 98))}
+
+
+def _error_kind(message: str) -> str:
+    # Gom lỗi theo loại để báo cáo không bị phình theo txid
+    for kind in ("already registered", "logic eval error", "already in ledger", "timed out", "overspend"):
+        if kind in message:
+            return kind
+    return message.split(":")[0][:60]
+
+
+def _rejected_as_duplicate(request: _Request, holds_ticket: bool) -> bool:
+    """Whether the contract rejected the request of a buyer who already held a ticket."""
+    # Node thật chỉ báo "assert failed pc=..." nên nguyên nhân được suy ra từ chain, không từ thông báo lỗi
+    return holds_ticket and not request.confirmed and request.error is not None and "logic eval error" in request.error
+
+
+def _current_commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def fund_accounts(client: algod.AlgodClient, funder_key: str, addresses: list[str], amount: int) -> None:
+    """Pays `amount` to every address, 16 payments per group."""
+    funder = account.address_from_private_key(funder_key)
+    params = client.suggested_params()
+    waiter = get_confirmation_waiter(client)
+    futures = []
+    for i in range(0, len(addresses), 16):
+        group = [PaymentTxn(funder, params, address, amount) for address in addresses[i:i + 16]]
+        assign_group_id(group)
+        futures.append(waiter.watch(client.send_transactions([txn.sign(funder_key) for txn in group])))
+    for future in futures:
+        future.result()
+
+
+def create_event(client: algod.AlgodClient, app_id: int, creator_key: str, ticket_count: int) -> int:
+    # Dùng chung cách chọn id của call_create_event, an toàn khi nhiều lời gọi chạy song song
+    event_id = call_create_event(app_id, 0, 0, ticket_count, client, creator_key)
+    if event_id is None:
+        raise RuntimeError(f"Could not create the benchmark event on app {app_id}")
+    return event_id
+
+
+def _plan_requests(config: OnSaleConfig) -> list[_Request]:
+    rng = random.Random(config.seed)
+    requests = []
+    for _ in range(config.buyers):
+        private_key, address = account.generate_account()
+        requests.append(_Request(private_key, address, duplicate=False))
+        if rng.random() < config.duplicate_rate:
+            requests.append(_Request(private_key, address, duplicate=True))
+    # Lần mua trùng có thể tới trước hoặc sau lần mua đầu tiên, như khi người dùng bấm hai lần
+    rng.shuffle(requests)
+    seen = set()
+    for request in requests:
+        request.duplicate = request.address in seen
+        seen.add(request.address)
+    return requests
+
+
+def run_onsale(
+    client: algod.AlgodClient,
+    app_id: int,
+    creator_key: str,
+    config: OnSaleConfig,
+    backend: str,
+    fund_buyers: bool = False,
+) -> OnSaleResult:
+    """Runs one on-sale scenario against `client` and measures it."""
+    event_id = create_event(client, app_id, creator_key, config.tickets)
+    requests = _plan_requests(config)
+    if fund_buyers:
+        fund_accounts(client, creator_key, sorted({r.address for r in requests}), BUYER_FUNDING)
+
+    waiter = get_confirmation_waiter(client)
+    done = threading.Semaphore(0)
+    errors: dict[str, int] = {}
+    errors_lock = threading.Lock()
+
+    def finish(request: _Request, error: BaseException | None) -> None:
+        if error is None:
+            request.confirmed = True
+            request.latency = time.perf_counter() - request.started
+        else:
+            request.error = str(error)
+            with errors_lock:
+                kind = _error_kind(request.error)
+                errors[kind] = errors.get(kind, 0) + 1
+        done.release()
+
+    def submit(request: _Request) -> None:
+        # Mỗi người mua dùng note riêng để lần mua trùng là giao dịch khác, bị hợp đồng từ chối
+        params = client.suggested_params()
+        txn = ApplicationNoOpTxn(
+            request.address, params, app_id, add_attendant_args(event_id),
+            boxes=add_attendant_box_refs(event_id, request.address),
+            note=b"dup" if request.duplicate else None,
+        )
+        signed = txn.sign(request.private_key)
+        request.started = time.perf_counter()
+        try:
+            future: Future = waiter.watch(client.send_transaction(signed), config.wait_rounds)
+        except Exception as e:
+            finish(request, e)
+            return
+        future.add_done_callback(lambda f: finish(request, f.exception()))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.concurrency) as pool:
+        list(pool.map(submit, requests))
+    for _ in requests:
+        done.acquire()
+    wall_seconds = time.perf_counter() - started
+
+    event = AppStateReader(client).event(app_id, event_id)
+    # Với người mua gửi hai lần, lần nào tới sau cũng là lần trùng, bất kể thứ tự trong danh sách
+    per_buyer: dict[str, list[_Request]] = {}
+    for request in requests:
+        per_buyer.setdefault(request.address, []).append(request)
+    repeats = [sent for sent in per_buyer.values() if len(sent) > 1]
+    # Người mua giữ vé nếu có một lần mua được xác nhận, hoặc box người tham gia của họ tồn tại
+    # (lần mua đã vào chain dù việc chờ xác nhận thất bại)
+    holders = {
+        sent[0].address for sent in repeats
+        if any(r.confirmed for r in sent) or prove_attendance(client, app_id, event_id, sent[0].address) is not None
+    }
+    return OnSaleResult(
+        backend=backend,
+        config=config,
+        commit=_current_commit(),
+        wall_seconds=round(wall_seconds, 4),
+        submitted=len(requests),
+        confirmed=sum(1 for r in requests if r.confirmed),
+        rejected=sum(1 for r in requests if not r.confirmed),
+        duplicates_sent=sum(len(sent) - 1 for sent in repeats),
+        # Chỉ đếm lần bị từ chối của người đã giữ vé, không tính người bị từ chối vì hết vé
+        duplicates_rejected=sum(1 for sent in repeats for r in sent if _rejected_as_duplicate(r, r.address in holders)),
+        buyers_confirmed_twice=sum(1 for sent in repeats if sum(1 for r in sent if r.confirmed) > 1),
+        tickets_issued=event.issued if event else 0,
+        tickets_remaining=event.remaining if event else 0,
+        latency_ms=percentiles([r.latency for r in requests if r.latency is not None]),
+        errors=errors,
+    )
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """Human-readable deltas of the headline numbers against a stored result."""
+    lines = [f"confirmed_per_second: {baseline.get('confirmed_per_second')} -> {current.get('confirmed_per_second')}"]
+    for name in ("p50", "p95", "p99"):
+        lines.append(f"latency {name} ms: {baseline['latency_ms'].get(name)} -> {current['latency_ms'].get(name)}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark mở bán vé NFTicket")
+    parser.add_argument("--backend", choices=["fake", "localnet"], default="fake")
+    parser.add_argument("--app-id", type=int, help="Ứng dụng đã triển khai trên LocalNet")
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--tickets", type=int, default=500)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--block-time", type=float, default=0.0, help="Thời gian block của FakeAlgod (giây)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Ghi kết quả JSON ra file")
+    parser.add_argument("--compare", help="So sánh với một file kết quả JSON trước đó")
+    args = parser.parse_args()
+    config = OnSaleConfig(args.buyers, args.tickets, args.duplicate_rate, args.concurrency, seed=args.seed)
+
+    if args.backend == "fake":
+        creator_key, creator = account.generate_account()
+        fake = FakeAlgod(creator, block_time=args.block_time)
+        result = run_onsale(fake, fake.app_id, creator_key, config, "fake")
+    else:
+        if args.app_id is None:
+            parser.error("--app-id là bắt buộc với --backend localnet")
+        creator_key = get_private_key()
+        client = get_algod_client(LOCALNET_TOKEN, LOCALNET_ADDRESS)
+        result = run_onsale(client, args.app_id, creator_key, config, "localnet", fund_buyers=True)
+
+    data = result.to_dict()
+    output = json.dumps(data, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            for line in compare(data, json.load(f)):
+                print(line)
+    sys.exit(1 if data["oversold"] else 0)
@@ -1,11 +1,21 @@
+import hashlib
+import json
 import logging
+import os
 import subprocess
+import tempfile
+from functools import lru_cache
+from importlib import metadata
 from pathlib import Path
 from shutil import rmtree
 
 logger = logging.getLogger(__name__)
 deployment_extension = "py"
 
+COMPILE_FLAGS = ["--output-arc32", "--debug-level=0"]
+# Written last into the output directory; its presence marks a complete build
+BUILD_STAMP = ".build-stamp.json"
+
 
 def _get_output_path(output_dir: Path, deployment_extension: str) -> Path:
     return output_dir / Path(
@@ -15,11 +25,93 @@ def _get_output_path(output_dir: Path, deployment_extension: str) -> Path:
     )
 
 
-def build(output_dir: Path, contract_path: Path) -> Path:
-    output_dir = output_dir.resolve()
+@lru_cache
+def _tool_version(package: str) -> str:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        result = subprocess.run(["algokit", "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        return result.stdout.strip()
+
+
+def build_key(contract_path: Path) -> str:
+    """Hash of everything that determines the build output.
+
+    Covers every source file in the contract's folder, the compiler and
+    client generator versions and the compile flags.
+    """
+    digest = hashlib.sha256()
+    contract_dir = contract_path.parent
+    for source in sorted(contract_dir.rglob("*.py")):
+        if "__pycache__" in source.parts:
+            continue
+        digest.update(source.relative_to(contract_dir).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(source.read_bytes())
+        digest.update(b"\0")
+    digest.update(_tool_version("puyapy").encode())
+    digest.update(_tool_version("algokit-client-generator").encode())
+    digest.update(json.dumps([*COMPILE_FLAGS, deployment_extension]).encode())
+    return digest.hexdigest()
+
+
+def _cached_app_spec(output_dir: Path, key: str) -> Path | None:
+    """Returns the build result if `output_dir` already holds a build for `key`."""
+    try:
+        stamp = json.loads((output_dir / BUILD_STAMP).read_text())
+    except (OSError, ValueError):
+        return None
+    if stamp.get("key") != key:
+        return None
+    if not all((output_dir / name).exists() for name in stamp.get("artifacts", [])):
+        return None
+    app_spec = stamp.get("app_spec")
+    return output_dir / app_spec if app_spec else output_dir
+
+
+def _replace_dir(staging_dir: Path, output_dir: Path) -> None:
+    """Swaps a finished staging directory into place of `output_dir`."""
     if output_dir.exists():
-        rmtree(output_dir)
-    output_dir.mkdir(exist_ok=True, parents=True)
+        retired_dir = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}.old-", dir=output_dir.parent))
+        os.replace(output_dir, retired_dir / output_dir.name)
+        os.replace(staging_dir, output_dir)
+        rmtree(retired_dir, ignore_errors=True)
+    else:
+        os.replace(staging_dir, output_dir)
+
+
+def build(output_dir: Path, contract_path: Path, force: bool = False) -> Path:
+    output_dir = output_dir.resolve()
+    key = build_key(contract_path)
+    if not force:
+        cached = _cached_app_spec(output_dir, key)
+        if cached is not None:
+            logger.info(f"{contract_path} unchanged, reusing artifacts in {output_dir}")
+            return cached
+
+    # Build into a sibling staging directory so an interrupted or failed build
+    # never leaves a partial output_dir behind
+    output_dir.parent.mkdir(exist_ok=True, parents=True)
+    staging_dir = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}.build-", dir=output_dir.parent))
+    try:
+        app_spec_path = _build(staging_dir, contract_path)
+        artifacts = sorted(
+            file.relative_to(staging_dir).as_posix() for file in staging_dir.rglob("*") if file.is_file()
+        )
+        stamp = {
+            "key": key,
+            "app_spec": app_spec_path.name if app_spec_path != staging_dir else None,
+            "artifacts": artifacts,
+        }
+        (staging_dir / BUILD_STAMP).write_text(json.dumps(stamp, indent=2))
+        _replace_dir(staging_dir, output_dir)
+    finally:
+        rmtree(staging_dir, ignore_errors=True)
+
+    return output_dir / stamp["app_spec"] if stamp["app_spec"] else output_dir
+
+
+def _build(output_dir: Path, contract_path: Path) -> Path:
     logger.info(f"Exporting {contract_path} to {output_dir}")
 
     build_result = subprocess.run(
@@ -30,8 +122,7 @@ def build(output_dir: Path, contract_path: Path) -> Path:
             "python",
             contract_path.absolute(),
             f"--out-dir={output_dir}",
-            "--output-arc32",
-            "--debug-level=0",
+            *COMPILE_FLAGS,
         ],
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
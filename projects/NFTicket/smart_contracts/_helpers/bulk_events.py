@@ -0,0 +1,390 @@
+# bulk_events.py
+
+# Tạo hàng loạt sự kiện từ manifest CSV/JSON, gửi theo nhóm và không chờ từng nhóm xác nhận.
+# Mọi giao dịch được ghi vào journal (JSON lines) trước khi gửi, nên chạy lại sau khi bị dừng
+# giữa chừng sẽ bỏ qua sự kiện đã tạo, đối chiếu các giao dịch còn dở với chain và không tạo trùng.
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+
+from algosdk import account, error
+from algosdk.logic import get_application_address
+from algosdk.transaction import ApplicationNoOpTxn, PaymentTxn, assign_group_id
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import create_event_args
+from smart_contracts._helpers.app_state import get_state_reader
+from smart_contracts._helpers.confirmation import get_confirmation_waiter
+from smart_contracts._helpers.create_event import read_event_count
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.event_box import event_box_ref, event_funding
+from smart_contracts._helpers.instrumentation import configure, inc, span
+
+logger = logging.getLogger(__name__)
+
+# Một giao dịch nạp MBR cho cả nhóm cộng tối đa 15 lời gọi create_event (giới hạn 16 giao dịch)
+EVENTS_PER_GROUP = 15
+# Cửa sổ hợp lệ ngắn: giao dịch dở dang của lần chạy trước sẽ sớm được xác nhận hoặc hết hạn
+VALIDITY_ROUNDS = 50
+MAX_UINT64 = 2**64 - 1
+
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+
+class ManifestError(ValueError):
+    """The manifest has invalid rows; the message lists all of them."""
+
+
+@dataclass(frozen=True)
+class EventRow:
+    key: str
+    nft_id: int
+    end_timestamp: int
+    ticket_count: int
+
+
+@dataclass
+class BulkReport:
+    total: int = 0
+    created: int = 0
+    skipped: int = 0  # Đã được tạo ở lần chạy trước
+    recovered: int = 0  # Giao dịch dở dang của lần chạy trước, hoá ra đã được xác nhận
+    groups: int = 0
+    retried: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "events_per_second": round(self.events_per_second, 2)}
+
+
+def _parse_row(raw: dict, now: int) -> EventRow:
+    values = {}
+    for name in ("nft_id", "end_timestamp", "ticket_count"):
+        try:
+            values[name] = int(str(raw[name]).strip())
+        except KeyError:
+            raise ValueError(f"missing {name}") from None
+        except ValueError:
+            raise ValueError(f"{name} is not an integer: {raw[name]!r}") from None
+        if not 0 < values[name] <= MAX_UINT64:
+            raise ValueError(f"{name} must be a positive uint64")
+    if values["end_timestamp"] <= now:
+        raise ValueError(f"end_timestamp {values['end_timestamp']} is in the past")
+    # Không có khoá riêng thì một NFT chỉ có một sự kiện cho mỗi thời điểm kết thúc
+    key = str(raw.get("key") or "").strip() or f"{values['nft_id']}:{values['end_timestamp']}"
+    return EventRow(key=key, **values)
+
+
+def read_manifest(path: str, now: int | None = None) -> list[EventRow]:
+    """Reads and validates a CSV (with header) or JSON manifest.
+
+    Columns: nft_id, end_timestamp, ticket_count and an optional key that
+    identifies the row across runs. Raises `ManifestError` listing every
+    invalid or duplicated row.
+    """
+    now = int(time.time()) if now is None else now
+    with open(path, newline='') as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+            raw_rows = data["events"] if isinstance(data, dict) else data
+        else:
+            raw_rows = list(csv.DictReader(f))
+
+    rows, problems, seen = [], [], {}
+    for number, raw in enumerate(raw_rows, start=1):
+        try:
+            row = _parse_row(raw, now)
+        except (ValueError, TypeError) as e:
+            problems.append(f"row {number}: {e}")
+            continue
+        if row.key in seen:
+            problems.append(f"row {number}: duplicate key {row.key!r} (first seen in row {seen[row.key]})")
+            continue
+        seen[row.key] = number
+        rows.append(row)
+    if problems:
+        raise ManifestError("\n".join(problems))
+    return rows
+
+
+class Journal:
+    """Append-only JSON lines log of what happened to each manifest row.
+
+    The last entry for a key wins. Entries are fsynced before `record`
+    returns, so a submitted transaction is on disk before it is sent.
+    """
+
+    def __init__(self, path: str, app_id: int):
+        self.path = path
+        self.app_id = app_id
+        self.entries: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Dòng cuối có thể bị cắt dở khi tiến trình bị dừng; giao dịch của nó chưa được gửi
+                        logger.warning(f"Bỏ qua dòng journal không đọc được: {line[:80]!r}")
+                        continue
+                    if entry["app_id"] != app_id:
+                        raise ValueError(f"{path} belongs to app {entry['app_id']}, not {app_id}")
+                    self.entries[entry["key"]] = entry
+        self._file = open(path, "a")
+
+    def state(self, key: str) -> str | None:
+        entry = self.entries.get(key)
+        return entry["state"] if entry else None
+
+    def record(self, entries: list[dict]) -> None:
+        for entry in entries:
+            entry = {"app_id": self.app_id, **entry}
+            self.entries[entry["key"]] = entry
+            self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BulkEventCreator:
+    """Creates the events of a manifest in pipelined atomic groups.
+
+    Event ids are predicted from event_count and referenced as boxes, so a
+    wrong prediction is rejected by the node instead of creating an event
+    under another id. Up to `depth` groups are in flight at once. A failed
+    send stops the pipeline; the groups already sent are settled and the
+    remaining rows are retried with freshly read event ids, one row per
+    group for rows that were already sent once so a single bad row cannot
+    hold back the others.
+
+    Only a 4xx `AlgodHTTPError` from the node counts as a rejection. Any
+    other send error (timeout, connection reset) may hide an accepted
+    group, so its rows stay submitted and are settled against the chain
+    before anything is sent again.
+    """
+
+    def __init__(
+        self,
+        app_id: int,
+        journal_path: str,
+        client=None,
+        private_key: str | None = None,
+        group_size: int = EVENTS_PER_GROUP,
+        depth: int = 4,
+        validity_rounds: int = VALIDITY_ROUNDS,
+        max_attempts: int = 3,
+    ):
+        self.app_id = app_id
+        self.client = client or get_algod_client()
+        self.private_key = private_key or get_private_key()
+        self.sender = account.address_from_private_key(self.private_key)
+        self.journal = Journal(journal_path, app_id)
+        self.group_size = max(1, min(group_size, EVENTS_PER_GROUP))
+        self.depth = max(1, depth)
+        self.validity_rounds = validity_rounds
+        self.max_attempts = max_attempts
+
+    def run(self, rows: list[EventRow]) -> BulkReport:
+        report = BulkReport(total=len(rows))
+        started = time.monotonic()
+        with span("bulk_create_events", app_id=self.app_id, rows=len(rows)) as operation:
+            report.skipped = sum(self.journal.state(row.key) == CONFIRMED for row in rows)
+            for row in rows:
+                entry = self.journal.entries.get(row.key)
+                # Lỗi không phải do node từ chối (ví dụ mất kết nối) thì giao dịch có thể đã vào chain
+                unsettled = entry is not None and (
+                    entry["state"] == SUBMITTED or (entry["state"] == FAILED and not entry.get("rejected"))
+                )
+                if unsettled and self._resolve(row, entry) == CONFIRMED:
+                    report.recovered += 1
+
+            attempts: dict[str, int] = {}
+            todo = [row for row in rows if self.journal.state(row.key) != CONFIRMED]
+            while todo:
+                retry = self._submit(todo, attempts, report)
+                todo = []
+                for row in retry:
+                    if attempts.get(row.key, 0) >= self.max_attempts:
+                        report.failed[row.key] = self.journal.entries[row.key].get("error", "failed")
+                    else:
+                        todo.append(row)
+                report.retried += len(todo)
+            report.elapsed = time.monotonic() - started
+            operation.set(created=report.created, failed=len(report.failed))
+        inc("nfticket_bulk_events_total", report.created, result="created")
+        inc("nfticket_bulk_events_total", len(report.failed), result="failed")
+        return report
+
+    def close(self) -> None:
+        self.journal.close()
+
+    # --- Gửi theo nhóm ---
+
+    def _submit(self, rows: list[EventRow], attempts: dict[str, int], report: BulkReport) -> list[EventRow]:
+        """Submits `rows`; returns the rows that have to be tried again."""
+        params = self.client.suggested_params()
+        params.last = params.first + self.validity_rounds
+        # Không có nhóm nào của lần gửi trước còn chờ, nên event_count đã cam kết là điểm bắt đầu đúng
+        next_event_id = read_event_count(self.app_id, self.client) + 1
+        waiter = get_confirmation_waiter(self.client)
+        in_flight: deque[tuple[list[EventRow], list[dict], Future]] = deque()
+        retry: list[EventRow] = []
+        stalled = False
+
+        # Dòng đã gửi mà thất bại được gửi lại mỗi dòng một nhóm, như ExpirySweeper.sweep
+        fresh = [row for row in rows if not attempts.get(row.key)]
+        chunks = [fresh[i:i + self.group_size] for i in range(0, len(fresh), self.group_size)]
+        chunks += [[row] for row in rows if attempts.get(row.key)]
+        for chunk in chunks:
+            if retry or stalled:
+                # Id dự đoán cho các nhóm sau đã sai, chờ lần gửi kế tiếp đọc lại event_count
+                retry.extend(chunk)
+                continue
+            signed, entries = self._build_group(chunk, next_event_id, params)
+            for row in chunk:
+                attempts[row.key] = attempts.get(row.key, 0) + 1
+            self.journal.record(entries)
+            try:
+                with span("send_group", events=len(chunk)):
+                    txid = self.client.send_transactions(signed)
+            except error.AlgodHTTPError as e:
+                if e.code is None or not 400 <= e.code < 500:
+                    stalled = True
+                    in_flight.append((chunk, entries, self._unconfirmed(e)))
+                    continue
+                # Node đã từ chối cả nhóm khi nhận, nên chắc chắn không sự kiện nào được tạo
+                self.journal.record([{**entry, "state": FAILED, "error": str(e), "rejected": True} for entry in entries])
+                logger.warning(f"Nhóm {len(chunk)} sự kiện bị từ chối: {e}")
+                retry.extend(chunk)
+                continue
+            except Exception as e:
+                # Node có thể đã nhận nhóm trước khi mất phản hồi: để nguyên SUBMITTED và đối chiếu với chain
+                logger.warning(f"Không rõ nhóm {len(chunk)} sự kiện đã tới node chưa: {e}")
+                stalled = True
+                in_flight.append((chunk, entries, self._unconfirmed(e)))
+                continue
+            report.groups += 1
+            next_event_id += len(chunk)
+            in_flight.append((chunk, entries, waiter.watch(txid, self.validity_rounds)))
+            if len(in_flight) >= self.depth:
+                self._settle(*in_flight.popleft(), report, retry)
+        while in_flight:
+            self._settle(*in_flight.popleft(), report, retry)
+        return retry
+
+    @staticmethod
+    def _unconfirmed(exc: BaseException) -> Future:
+        # Future đã lỗi: _settle sẽ hỏi chain xem nhóm có được xác nhận không
+        future: Future = Future()
+        future.set_exception(exc)
+        return future
+
+    def _build_group(self, chunk: list[EventRow], first_event_id: int, params) -> tuple[list, list[dict]]:
+        funding = sum(event_funding(row.ticket_count) for row in chunk)
+        txns = [PaymentTxn(self.sender, params, get_application_address(self.app_id), funding)]
+        for offset, row in enumerate(chunk):
+            txns.append(ApplicationNoOpTxn(
+                self.sender, params, self.app_id,
+                create_event_args(row.nft_id, row.end_timestamp, row.ticket_count),
+                boxes=[event_box_ref(first_event_id + offset)],
+                # Lease theo khoá của dòng: node từ chối bản gửi thứ hai trong khi bản đầu còn hiệu lực
+                lease=hashlib.sha256(f"{self.app_id}:{row.key}".encode()).digest(),
+            ))
+        assign_group_id(txns)
+        signed = [txn.sign(self.private_key) for txn in txns]
+        entries = [
+            {
+                "key": row.key,
+                "state": SUBMITTED,
+                "txid": txn.get_txid(),
+                "event_id": first_event_id + offset,
+                "last_valid": params.last,
+            }
+            for offset, (row, txn) in enumerate(zip(chunk, txns[1:]))
+        ]
+        return signed, entries
+
+    def _settle(self, chunk: list[EventRow], entries: list[dict], future: Future, report: BulkReport, retry: list[EventRow]) -> None:
+        try:
+            confirmed_round = future.result().get('confirmed-round')
+        except Exception as e:
+            # Hết thời gian chờ không có nghĩa là giao dịch thất bại: hỏi lại chain cho chắc
+            logger.warning(f"Không xác nhận được nhóm {entries[0]['txid']}: {e}")
+            states = [self._resolve(row, entry) for row, entry in zip(chunk, entries)]
+            report.created += states.count(CONFIRMED)
+            retry.extend(row for row, state in zip(chunk, states) if state != CONFIRMED)
+            return
+        self.journal.record([{**entry, "state": CONFIRMED, "round": confirmed_round} for entry in entries])
+        report.created += len(chunk)
+
+    # --- Khôi phục ---
+
+    def _resolve(self, row: EventRow, entry: dict) -> str:
+        """Decides whether a submitted transaction landed; waits until it has expired if unsure."""
+        with span("resolve_submitted", event_id=entry["event_id"]):
+            while True:
+                try:
+                    info = self.client.pending_transaction_info(entry["txid"])
+                    if info.get('confirmed-round'):
+                        return self._mark(entry, CONFIRMED, round=info['confirmed-round'])
+                    if info.get('pool-error'):
+                        return self._mark(entry, FAILED, error=info['pool-error'], rejected=True)
+                except error.AlgodHTTPError as e:
+                    if e.code != 404:
+                        raise
+                # Node có thể đã quên txid: box của sự kiện dự đoán cho biết giao dịch đã được thực thi hay chưa
+                event = get_state_reader(self.client).event(self.app_id, entry["event_id"])
+                if event is not None and (event.nft_id, event.end, event.capacity) == (
+                    row.nft_id, row.end_timestamp, row.ticket_count
+                ):
+                    return self._mark(entry, CONFIRMED)
+                current_round = self.client.status()['last-round']
+                if current_round > entry["last_valid"]:
+                    return self._mark(entry, FAILED, error="expired before confirmation", rejected=True)
+                self.client.status_after_block(current_round)
+
+    def _mark(self, entry: dict, state: str, **extra) -> str:
+        self.journal.record([{**entry, "state": state, **extra}])
+        return state
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
+    parser = argparse.ArgumentParser(description="Tạo hàng loạt sự kiện từ manifest, có thể chạy tiếp khi bị dừng")
+    parser.add_argument("manifest", help="CSV (nft_id,end_timestamp,ticket_count[,key]) hoặc JSON")
+    parser.add_argument("--app-id", type=int, required=True)
+    parser.add_argument("--journal", help="File journal (mặc định <manifest>.journal)")
+    parser.add_argument("--group-size", type=int, default=EVENTS_PER_GROUP)
+    parser.add_argument("--depth", type=int, default=4, help="Số nhóm gửi đi mà chưa chờ xác nhận")
+    parser.add_argument("--validity", type=int, default=VALIDITY_ROUNDS, help="Số round hợp lệ của mỗi giao dịch")
+    args = parser.parse_args()
+
+    creator = BulkEventCreator(
+        args.app_id, args.journal or f"{args.manifest}.journal",
+        group_size=args.group_size, depth=args.depth, validity_rounds=args.validity,
+    )
+    try:
+        bulk_report = creator.run(read_manifest(args.manifest))
+    finally:
+        creator.close()
+    print(json.dumps(bulk_report.to_dict(), indent=2))
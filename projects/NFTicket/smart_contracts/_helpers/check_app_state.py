@@ -1,58 +1,32 @@
 # check_app_state.py
 
-import os
-from algosdk.v2client import algod
-from dotenv import load_dotenv
-from algosdk import encoding
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_state import get_state_reader
 
-# Tải biến môi trường từ file .env
-load_dotenv()
-
-ALGOD_ADDRESS = os.getenv('NODELY_ENDPOINT_URL')
-ALGOD_TOKEN = os.getenv('NODELY_API_KEY')
 APP_ID = 724732255  # Thay bằng Application ID của bạn
 
-# Khởi tạo client
-client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
+def read_events(app_id, client=None):
+    # Mỗi sự kiện là một box tên Itob(event_id)
+    return get_state_reader(client or get_algod_client()).read(app_id).events
 
-def check_app_state(app_id):
+def check_app_state(app_id, client=None):
     try:
-        app_info = client.application_info(app_id)
-        global_state = app_info['params']['global-state']
-
-        # Chuyển đổi global state từ base64
-        decoded_state = {}
-        for item in global_state:
-            key_bytes = encoding.base64.b64decode(item['key'])
-            try:
-                key_str = key_bytes.decode('utf-8')
-            except UnicodeDecodeError:
-                key_str = ''.join([chr(b) for b in key_bytes])
-
-            if item['value']['type'] == 1:
-                value = item['value']['bytes']
-                try:
-                    value_int = int.from_bytes(value, byteorder='big')
-                    value = value_int
-                except:
-                    pass  # Giữ nguyên bytes nếu không thể chuyển đổi
-            elif item['value']['type'] == 2:
-                value = item['value']['uint']
-            else:
-                value = None
-
-            decoded_state[key_str] = value
+        snapshot = get_state_reader(client or get_algod_client()).read(app_id)
 
         # In ra Global State
-        print("Global State của Smart Contract:")
-        for k, v in decoded_state.items():
+        print(f"Global State của Smart Contract (round {snapshot.round}):")
+        for k, v in snapshot.global_state.items():
             print(f"{k}: {v}")
-        
+
+        # In ra các sự kiện lưu trong box
+        print("Các sự kiện (box storage):")
+        for event in snapshot.events.values():
+            print(event)
+
         # Trả về giá trị event_count (ID của sự kiện gần đây nhất)
-        if "event_count" in decoded_state:
-            event_count = decoded_state["event_count"]
-            print(f"ID của sự kiện mới nhất (event_count): {event_count}")
-            return event_count
+        if "event_count" in snapshot.global_state:
+            print(f"ID của sự kiện mới nhất (event_count): {snapshot.event_count}")
+            return snapshot.event_count
         else:
             print("event_count không tồn tại trong trạng thái toàn cục.")
             return None
@@ -62,4 +36,4 @@ def check_app_state(app_id):
         return None
 
 if __name__ == "__main__":
-    check_app_state(APP_ID)
\ No newline at end of file
+    check_app_state(APP_ID)
@@ -1,21 +1,27 @@
 import dataclasses
 import importlib
 from collections.abc import Callable
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from algokit_utils import Account, ApplicationSpecification
-from algosdk.v2client.algod import AlgodClient
-from algosdk.v2client.indexer import IndexerClient
+if TYPE_CHECKING:
+    from algokit_utils import Account, ApplicationSpecification
+    from algosdk.v2client.algod import AlgodClient
+    from algosdk.v2client.indexer import IndexerClient
+
+DeployCallback = Callable[["AlgodClient", "IndexerClient", "ApplicationSpecification", "Account"], None]
 
 
 @dataclasses.dataclass
 class SmartContract:
     path: Path
     name: str
-    deploy: (
-        Callable[[AlgodClient, IndexerClient, ApplicationSpecification, Account], None]
-        | None
-    ) = None
+
+    @cached_property
+    def deploy(self) -> DeployCallback | None:
+        """The contract's deploy_config.deploy, imported on first access."""
+        return import_deploy_if_exists(self.path.parent)
 
 
 def import_contract(folder: Path) -> Path:
@@ -27,12 +33,7 @@ def import_contract(folder: Path) -> Path:
         raise Exception(f"Contract not found in {folder}")
 
 
-def import_deploy_if_exists(
-    folder: Path,
-) -> (
-    Callable[[AlgodClient, IndexerClient, ApplicationSpecification, Account], None]
-    | None
-):
+def import_deploy_if_exists(folder: Path) -> DeployCallback | None:
     """Imports the deploy function from a folder if it exists."""
     try:
         deploy_module = importlib.import_module(
@@ -49,13 +50,21 @@ def has_contract_file(directory: Path) -> bool:
 
 
 # define contracts to build and/or deploy
-base_dir = Path("smart_contracts")
-contracts = [
-    SmartContract(
-        path=import_contract(folder),
-        name=folder.name,
-        deploy=import_deploy_if_exists(folder),
+base_dir = Path(__file__).resolve().parent.parent
+
+
+@lru_cache(maxsize=None)
+def get_contracts() -> tuple[SmartContract, ...]:
+    """Discovers the contract folders once; deploy configs are imported only when used."""
+    return tuple(
+        SmartContract(path=import_contract(folder), name=folder.name)
+        for folder in sorted(base_dir.iterdir())
+        if folder.is_dir() and has_contract_file(folder)
     )
-    for folder in base_dir.iterdir()
-    if folder.is_dir() and has_contract_file(folder)
-]
+
+
+def __getattr__(name: str) -> Any:
+    # `contracts` vẫn dùng được như trước, nhưng chỉ được quét ở lần truy cập đầu tiên
+    if name == "contracts":
+        return list(get_contracts())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,307 @@
+# confirmation.py
+
+import base64
+import logging
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any
+
+import msgpack
+from algosdk import encoding, error
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.algod_client import BLOCK_TIME_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Số block gần nhất được quét lại khi bắt đầu chờ: giao dịch có thể vào block trước lúc được watch
+LOOKBACK_ROUNDS = 4
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+
+
+@dataclass
+class _Pending:
+    future: Any  # concurrent.futures.Future hoặc asyncio.Future, tuỳ waiter
+    timeout_rounds: int
+    expires_at: float  # Hạn theo đồng hồ của waiter, chỉ dùng khi không hỏi được node
+    deadline: int | None = None
+
+
+def decode_block(raw: bytes) -> dict:
+    """Decodes a block fetched with `response_format="msgpack"`."""
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)['block']
+
+
+def block_transactions(round_num: int, block: dict) -> dict[str, dict]:
+    """Maps each txid in a decoded block to the fields `pending_transaction_info` would return.
+
+    Blocks store transactions without their genesis id and hash, so both
+    are put back from the block header before the txid is computed.
+    """
+    confirmed = {}
+    for stxn in block.get('txns', []):
+        txn = dict(stxn['txn'])
+        if stxn.get('hgi'):
+            txn['gen'] = block['gen']
+        if stxn.get('hgh'):
+            txn['gh'] = block['gh']
+        txn = dict(sorted(txn.items()))
+        digest = encoding.checksum(b"TX" + msgpack.packb(txn, use_bin_type=True))
+        txid = base64.b32encode(digest).decode().strip("=")
+        info = {
+            "confirmed-round": round_num,
+            "pool-error": "",
+            "txn": {key: stxn[key] for key in ("sig", "msig", "lsig") if key in stxn} | {"txn": txn},
+        }
+        # Dữ liệu áp dụng của block: id của app/asset vừa tạo và log
+        if stxn.get('apid'):
+            info["application-index"] = stxn['apid']
+        if stxn.get('caid'):
+            info["asset-index"] = stxn['caid']
+        logs = stxn.get('dt', {}).get('lg')
+        if logs:
+            info["logs"] = [base64.b64encode(log).decode() for log in logs]
+        confirmed[txid] = info
+    return confirmed
+
+
+def settle(future, outcome: dict | BaseException) -> None:
+    """Resolves a waiter future with txn info or an exception, unless it is already done."""
+    if future.done():
+        return
+    if isinstance(outcome, BaseException):
+        future.set_exception(outcome)
+    else:
+        future.set_result(outcome)
+
+
+class ConfirmationTracker:
+    """The state of a confirmation waiter, without I/O or locking.
+
+    It keeps the watched txids, the txids of the last `lookback` blocks
+    read, the last round scanned and the deadline of each watch, and
+    decides which blocks to read next and how each watch ends.
+    `ConfirmationWaiter` drives it from a thread with `AlgodClient` calls,
+    `AsyncConfirmationWaiter` from an asyncio task over httpx; both call
+    it in the same order:
+
+    `start` once, then per wait: `rounds_to_read` for the round the node
+    reached, `add_block` for each of those blocks, `due` and `expire` for
+    the watches past their deadline, and `succeeded` or `failed`.
+    """
+
+    def __init__(self, round_seconds: float = BLOCK_TIME_SECONDS, lookback: int = LOOKBACK_ROUNDS):
+        self.round_seconds = round_seconds
+        self.lookback = lookback
+        self.pending: dict[str, _Pending] = {}
+        # txid -> thông tin xác nhận, của các block đã đọc trong `lookback` round gần nhất
+        self._recent: dict[int, dict[str, dict]] = {}
+        self.scanned: int | None = None  # Round cuối cùng đã đọc block
+        self.failures = 0
+        self._resumed = True
+
+    def watch(self, txid: str, timeout_rounds: int, new_future: Callable[[], Any], now: float):
+        """Returns the future of `txid`, already resolved if a recent block holds it."""
+        pending = self.pending.get(txid)
+        if pending is not None:
+            return pending.future
+        future = new_future()
+        info = next((block[txid] for block in self._recent.values() if txid in block), None)
+        if info is not None:
+            future.set_result(info)
+            return future
+        self.pending[txid] = _Pending(future, timeout_rounds, now + (timeout_rounds + 1) * self.round_seconds)
+        return future
+
+    def idle(self) -> None:
+        """Marks that nothing was watched for a while."""
+        self._resumed = True
+
+    def start(self, last_round: int) -> None:
+        self.scanned = max(0, last_round - self.lookback)
+
+    def rounds_to_read(self, last_round: int) -> range:
+        if self._resumed:
+            # Sau một lúc không có gì để chờ, chỉ cần đọc lại vài block gần nhất
+            self.scanned = max(self.scanned, last_round - self.lookback)
+            self._resumed = False
+        return range(self.scanned + 1, last_round + 1)
+
+    def add_block(self, round_num: int, raw: bytes) -> list[tuple[Any, dict]]:
+        """Records a block read as msgpack; returns the (future, info) pairs it resolves."""
+        confirmed = block_transactions(round_num, decode_block(raw))
+        self._recent[round_num] = confirmed
+        for old in [r for r in self._recent if r <= round_num - self.lookback]:
+            del self._recent[old]
+        self.scanned = round_num
+        return [(self.pending.pop(txid).future, info) for txid, info in confirmed.items() if txid in self.pending]
+
+    def due(self) -> list[str]:
+        """Txids whose deadline passed at the scanned round; they need one last pending-info check."""
+        expired = []
+        for txid, pending in self.pending.items():
+            if pending.deadline is None:
+                pending.deadline = self.scanned + pending.timeout_rounds
+            elif self.scanned >= pending.deadline:
+                expired.append(txid)
+        return expired
+
+    def expire(self, txid: str, info: dict | None) -> tuple[Any, dict | BaseException] | None:
+        """Ends a due watch with the node's pending info (None when the node does not know the txid)."""
+        pending = self.pending.pop(txid, None)
+        if pending is None:
+            return None
+        if info and info.get('confirmed-round', 0) > 0:
+            return pending.future, info
+        if info and info.get('pool-error'):
+            return pending.future, error.TransactionRejectedError(f"Transaction rejected: {info['pool-error']}")
+        return pending.future, error.ConfirmationTimeoutError(f"Wait for transaction id {txid} timed out")
+
+    def succeeded(self) -> None:
+        self.failures = 0
+
+    def failed(self, exc: BaseException, now: float) -> tuple[float, list[tuple[Any, BaseException]]]:
+        """Records a node error; returns the backoff delay and the watches whose time ran out."""
+        self.failures += 1
+        delay = min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** (self.failures - 1))
+        expired = [txid for txid, pending in self.pending.items() if pending.expires_at <= now]
+        return delay, [(self.pending.pop(txid).future, exc) for txid in expired]
+
+    def close(self) -> list:
+        pending, self.pending = self.pending, {}
+        return [item.future for item in pending.values()]
+
+
+class ConfirmationWaiter:
+    """Tracks many pending transactions and resolves them from one block wait.
+
+    A single background thread long-polls `status_after_block` and reads
+    each new block once, resolving every outstanding txid it contains, so
+    the node sees two requests per round however many transactions are
+    watched. A watch that reaches its deadline gets one last
+    `pending_transaction_info` check (for pool errors, or a confirmation
+    older than the blocks read) before it times out.
+
+    Errors talking to the node are retried with exponential backoff; only
+    the watches whose time ran out meanwhile fail. The waiter keeps a weak
+    reference to the client and closes itself once the client is gone.
+    `watch()` returns a `concurrent.futures.Future`; wrap it with
+    `asyncio.wrap_future` to await it. The bookkeeping lives in
+    `ConfirmationTracker`, shared with the asyncio waiter.
+    """
+
+    def __init__(self, client: algod.AlgodClient, round_seconds: float = BLOCK_TIME_SECONDS, lookback: int = LOOKBACK_ROUNDS):
+        self._client = weakref.ref(client)
+        self._tracker = ConfirmationTracker(round_seconds, lookback)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closing = threading.Event()
+        self._closed = False
+        weakref.finalize(client, self.close)
+        self._thread = threading.Thread(target=self._run, name="confirmation-waiter", daemon=True)
+        self._thread.start()
+
+    @property
+    def client(self) -> algod.AlgodClient:
+        client = self._client()
+        if client is None:
+            raise ReferenceError("The algod client of this ConfirmationWaiter was garbage collected")
+        return client
+
+    def watch(self, txid: str, timeout_rounds: int = 10) -> Future:
+        """Returns a future resolved with the pending txn info once confirmed."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ConfirmationWaiter is closed")
+            future = self._tracker.watch(txid, timeout_rounds, Future, time.monotonic())
+        self._wakeup.set()
+        return future
+
+    def wait(self, txid: str, timeout_rounds: int = 10) -> dict:
+        return self.watch(txid, timeout_rounds).result()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            futures = self._tracker.close()
+        for future in futures:
+            future.cancel()
+        self._closing.set()
+        self._wakeup.set()
+
+    def _check(self, txid: str) -> dict | None:
+        try:
+            return self.client.pending_transaction_info(txid)
+        except error.AlgodHTTPError as e:
+            # Node có thể trả 404 khi giao dịch chưa tới pool của nó
+            if e.code == 404:
+                return None
+            raise
+
+    def _run(self) -> None:
+        tracker = self._tracker
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                if self._closed:
+                    return
+                if not tracker.pending:
+                    self._wakeup.clear()
+                    tracker.idle()
+                    continue
+            try:
+                if tracker.scanned is None:
+                    tracker.start(self.client.status()['last-round'])
+                # Chờ block kế tiếp thay vì sleep cố định; trả về ngay nếu còn block chưa đọc
+                last_round = self.client.status_after_block(tracker.scanned)['last-round']
+                with self._lock:
+                    rounds = tracker.rounds_to_read(last_round)
+                for round_num in rounds:
+                    raw = self.client.block_info(round_num, response_format="msgpack")
+                    with self._lock:
+                        resolved = tracker.add_block(round_num, raw)
+                    for future, info in resolved:
+                        settle(future, info)
+                with self._lock:
+                    due = tracker.due()
+                for txid in due:
+                    info = self._check(txid)
+                    with self._lock:
+                        ended = tracker.expire(txid, info)
+                    if ended is not None:
+                        settle(*ended)
+                with self._lock:
+                    tracker.succeeded()
+            except Exception as e:
+                if self._closed:
+                    return
+                with self._lock:
+                    delay, failed = tracker.failed(e, time.monotonic())
+                logger.warning(f"Confirmation waiter failed to query node ({tracker.failures} in a row), retrying in {delay:.1f}s: {e}")
+                for future, exc in failed:
+                    settle(future, exc)
+                self._closing.wait(delay)
+
+
+_waiters: "weakref.WeakKeyDictionary[algod.AlgodClient, ConfirmationWaiter]" = weakref.WeakKeyDictionary()
+_waiters_lock = threading.Lock()
+
+
+def get_confirmation_waiter(client: algod.AlgodClient) -> ConfirmationWaiter:
+    """Returns the shared waiter for a client, starting it on first use."""
+    with _waiters_lock:
+        waiter = _waiters.get(client)
+        if waiter is None:
+            waiter = ConfirmationWaiter(client)
+            _waiters[client] = waiter
+        return waiter
+
+
+def wait_for_confirmation(client: algod.AlgodClient, txid: str, timeout: int) -> dict:
+    """Blocks until the transaction is confirmed, rejected or times out."""
+    return get_confirmation_waiter(client).wait(txid, timeout)
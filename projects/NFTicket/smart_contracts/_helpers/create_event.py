@@ -1,89 +1,106 @@
 # create_event.py
 
-import os
-import sys
-from algosdk import account, mnemonic
-from algosdk.v2client import algod
-from algosdk.transaction import ApplicationNoOpTxn
-from dotenv import load_dotenv
-
-# Tải biến môi trường từ file .env
-load_dotenv()
-
-ALGOD_ADDRESS = os.getenv('NODELY_ENDPOINT_URL')
-ALGOD_TOKEN = os.getenv('NODELY_API_KEY')
-MNEMONIC = os.getenv('PRIVATE_KEY')  # Mnemonic của tài khoản triển khai
-APP_ID = 724732255  # Application ID mới của bạn
-
-# Chuyển mnemonic thành private key
-try:
-    PRIVATE_KEY = mnemonic.to_private_key(MNEMONIC)
-    sender_address = account.address_from_private_key(PRIVATE_KEY)
-except Exception as e:
-    print("Error converting mnemonic to private key:", e)
-    sys.exit(1)
+import base64
+import logging
+import threading
+import weakref
 
-# Khởi tạo client
-client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
-
-def call_create_event(app_id, nft_id, end_timestamp, ticket_count):
-    try:
-        # Lấy thông số giao dịch
-        params = client.suggested_params()
+from algosdk import account
+from algosdk.logic import get_application_address
+from algosdk.transaction import ApplicationNoOpTxn, PaymentTxn, assign_group_id
 
-        # Chuẩn bị argument cho transaction dưới dạng byte strings
-        app_args = [
-            "create_event".encode('utf-8'),
-            nft_id.to_bytes(8, 'big'),
-            end_timestamp.to_bytes(8, 'big'),
-            ticket_count.to_bytes(8, 'big')
-        ]
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import create_event_args
+from smart_contracts._helpers.confirmation import wait_for_confirmation
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.event_box import event_box_ref, event_funding
+from smart_contracts._helpers.instrumentation import configure, span
 
-        # Tạo giao dịch ApplicationNoOp
-        txn = ApplicationNoOpTxn(sender_address, params, app_id, app_args)
+logger = logging.getLogger(__name__)
 
-        # Ký giao dịch
-        signed_txn = txn.sign(PRIVATE_KEY)
+APP_ID = 724732255  # Application ID mới của bạn
 
-        # Gửi giao dịch
-        txid = client.send_transaction(signed_txn)
-        print(f"Giao dịch được gửi với ID: {txid}")
+# client -> {app_id: id nhỏ nhất chưa được lời gọi create_event nào đã gửi dùng}. event_count chỉ tính
+# sự kiện đã xác nhận, nên các lời gọi song song trong tiến trình lấy id nối tiếp nhau dưới khoá
+_next_event_ids: "weakref.WeakKeyDictionary[object, dict[int, int]]" = weakref.WeakKeyDictionary()
+_next_event_ids_lock = threading.Lock()
 
-        # Chờ xác nhận
-        confirmed_txn = wait_for_confirmation(client, txid, 10)
-        print(f"Giao dịch đã được xác nhận ở round {confirmed_txn.get('confirmed-round')}")
-        print("Sự kiện mới đã được tạo thành công.")
+def read_event_count(app_id, client=None):
+    app_info = (client or get_algod_client()).application_info(app_id)
+    for item in app_info['params'].get('global-state', []):
+        if base64.b64decode(item['key']) == b"event_count":
+            return item['value']['uint']
+    return 0
 
-    except Exception as e:
-        print(f"Error creating event: {e}")
+def call_create_event(app_id, nft_id, end_timestamp, ticket_count, client=None, private_key=None):
+    """Creates an event and returns its id, or None when the call failed.
 
-def wait_for_confirmation(client, txid, timeout):
-    import time
+    `client` and `private_key` default to the shared algod client and the
+    key from PRIVATE_KEY.
+    """
     try:
-        last_round = client.status().get('last-round')
+        with span("create_event", app_id=app_id, ticket_count=ticket_count) as operation:
+            # Client dùng chung và khoá chỉ được tạo ở lần gọi đầu tiên
+            client = client or get_algod_client()
+            private_key = private_key or get_private_key()
+            sender_address = account.address_from_private_key(private_key)
+
+            # Lấy thông số giao dịch
+            with span("suggested_params"):
+                params = client.suggested_params()
+
+            # Chuẩn bị argument cho transaction dưới dạng byte strings
+            app_args = create_event_args(nft_id, end_timestamp, ticket_count)
+
+            # Box của sự kiện mới phải được tham chiếu, nên cần biết trước event_id tiếp theo;
+            # giữ khoá từ lúc chọn id đến lúc gửi xong để lời gọi song song không chọn trùng id
+            with _next_event_ids_lock:
+                next_ids = _next_event_ids.setdefault(client, {})
+                with span("read_state"):
+                    event_id = max(read_event_count(app_id, client) + 1, next_ids.get(app_id, 0))
+                operation.set(event_id=event_id)
+
+                # Nạp số dư tối thiểu cho box của sự kiện và box của từng vé vào tài khoản ứng dụng
+                pay_txn = PaymentTxn(sender_address, params, get_application_address(app_id), event_funding(ticket_count))
+
+                # Tạo giao dịch ApplicationNoOp
+                txn = ApplicationNoOpTxn(sender_address, params, app_id, app_args, boxes=[event_box_ref(event_id)])
+                assign_group_id([pay_txn, txn])
+
+                # Ký giao dịch
+                with span("sign"):
+                    signed_txns = [pay_txn.sign(private_key), txn.sign(private_key)]
+
+                # Gửi giao dịch
+                try:
+                    with span("send"):
+                        txid = client.send_transactions(signed_txns)
+                except Exception:
+                    next_ids.pop(app_id, None)
+                    raise
+                next_ids[app_id] = event_id + 1
+            operation.set(txid=txid)
+            logger.info(f"Giao dịch được gửi với ID: {txid}")
+
+            # Chờ xác nhận; giao dịch không vào được chain thì các id phía sau đã dự đoán sai
+            try:
+                with span("confirm"):
+                    confirmed_txn = wait_for_confirmation(client, txid, 10)
+            except Exception:
+                with _next_event_ids_lock:
+                    _next_event_ids.get(client, {}).pop(app_id, None)
+                raise
+            operation.set(confirmed_round=confirmed_txn.get('confirmed-round'))
+            logger.info(f"Sự kiện {event_id} đã được tạo ở round {confirmed_txn.get('confirmed-round')}")
+            return event_id
+
     except Exception as e:
-        print("Error getting status:", e)
-        return
-    current_round = last_round + 1
-
-    while current_round < last_round + timeout:
-        try:
-            pending_txn = client.pending_transaction_info(txid)
-            if pending_txn.get('confirmed-round', 0) > 0:
-                return pending_txn
-            elif pending_txn.get('pool-error'):
-                raise Exception(f"Lỗi Pool: {pending_txn.get('pool-error')}")
-        except Exception as e:
-            print(e)
-            return
-
-        print(f"Đang chờ xác nhận... Block hiện tại: {current_round}")
-        time.sleep(1)
-        current_round += 1
-
-    raise Exception("Timeout chờ xác nhận giao dịch")
+        logger.error(f"Error creating event: {type(e).__name__}: {e}")
+        return None
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
     nft_id = 15890685  # Thay bằng NFT ID thực tế
     end_timestamp = 1729580400  # Thay bằng timestamp thực tế
     ticket_count = 100  # Số lượng vé cho sự kiện
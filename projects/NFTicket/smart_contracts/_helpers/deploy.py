@@ -1,96 +1,124 @@
 # deploy.py
 
+import logging
 import os
-import base64
-from algosdk import account, mnemonic
-from algosdk.v2client import algod
-from algosdk.transaction import ApplicationCreateTxn, StateSchema
-from dotenv import load_dotenv
-
-# Tải biến môi trường từ file .env
-load_dotenv()
-
-ALGOD_ADDRESS = os.getenv('NODELY_ENDPOINT_URL')
-ALGOD_TOKEN = os.getenv('NODELY_API_KEY')
-MNEMONIC = os.getenv('PRIVATE_KEY')  # Mnemonic của tài khoản triển khai
-
-# Chuyển mnemonic thành private key
-PRIVATE_KEY = mnemonic.to_private_key(MNEMONIC)
-sender_address = account.address_from_private_key(PRIVATE_KEY)
-
-# Khởi tạo client
-client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
-
-def compile_program(client, source_code):
-    compile_response = client.compile(source_code)
-    return base64.b64decode(compile_response['result'])
-
-def deploy_contract():
-    with open("approval.teal", "r") as f:
-        approval_source = f.read()
-    with open("clear_state.teal", "r") as f:
-        clear_source = f.read()
-
-    # Biên dịch chương trình
-    approval_program = compile_program(client, approval_source)
-    clear_program = compile_program(client, clear_source)
-
-    # Định nghĩa trạng thái
-    global_schema = StateSchema(num_uints=16, num_byte_slices=0)  # Updated to match new global state variables
-    local_schema = StateSchema(num_uints=1, num_byte_slices=0)  # Updated for attendants' local state
-
-    # Lấy thông số giao dịch
-    params = client.suggested_params()
-
-    # Tạo giao dịch tạo ứng dụng
-    txn = ApplicationCreateTxn(
-        sender=sender_address,
-        sp=params,
-        on_complete=0,  # NoOp
-        approval_program=approval_program,
-        clear_program=clear_program,
-        global_schema=global_schema,
-        local_schema=local_schema,
-        extra_pages=0
-    )
-
-    # Ký giao dịch
-    signed_txn = txn.sign(PRIVATE_KEY)
-
-    # Gửi giao dịch
-    txid = client.send_transaction(signed_txn)
-    print(f"Giao dịch được gửi với ID: {txid}")
-
-    # Chờ xác nhận
-    confirmed_txn = wait_for_confirmation(client, txid, 10)
-    app_id = confirmed_txn['application-index']
-    print(f"Smart contract được triển khai với Application ID: {app_id}")
-
-def wait_for_confirmation(client, txid, timeout):
-    import time
-    try:
-        last_round = client.status().get('last-round')
-    except Exception as e:
-        print("Error getting status:", e)
-        return
-    current_round = last_round + 1
-
-    while current_round < last_round + timeout:
-        try:
-            pending_txn = client.pending_transaction_info(txid)
-            if pending_txn.get('confirmed-round', 0) > 0:
-                return pending_txn
-            elif pending_txn.get('pool-error'):
-                raise Exception(f"Lỗi Pool: {pending_txn.get('pool-error')}")
-        except Exception as e:
-            print(e)
-            return
-
-        print(f"Đang chờ xác nhận... Block hiện tại: {current_round}")
-        time.sleep(1)
-        current_round += 1
-
-    raise Exception("Timeout chờ xác nhận giao dịch")
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from algosdk import account
+from algosdk.logic import get_application_address
+from algosdk.transaction import ApplicationCreateTxn, PaymentTxn, StateSchema
+from algosdk.v2client.algod import AlgodClient
+from algosdk.v2client.indexer import IndexerClient
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.confirmation import wait_for_confirmation
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.instrumentation import configure, span
+from smart_contracts._helpers.teal_cache import compile_teal
+
+if TYPE_CHECKING:
+    import algokit_utils
+
+logger = logging.getLogger(__name__)
+
+APP_MIN_BALANCE = 100_000  # Số dư tối thiểu của tài khoản ứng dụng (microAlgos)
+
+def compile_program(client, source_code, offline=False):
+    # Bytecode được lấy từ cache .teal_cache nếu mã nguồn không đổi, khỏi gọi /compile của node
+    return compile_teal(source_code, client, offline=offline).bytecode
+
+def deploy_contract(client=None, private_key=None, offline_compile=False):
+    with span("deploy_contract") as operation:
+        client = client or get_algod_client()
+        private_key = private_key or get_private_key()
+        sender_address = account.address_from_private_key(private_key)
+
+        with open("approval.teal", "r") as f:
+            approval_source = f.read()
+        with open("clear_state.teal", "r") as f:
+            clear_source = f.read()
+
+        # Biên dịch chương trình
+        with span("compile"):
+            approval_program = compile_program(client, approval_source, offline_compile)
+            clear_program = compile_program(client, clear_source, offline_compile)
+
+        # Định nghĩa trạng thái
+        global_schema = StateSchema(num_uints=1, num_byte_slices=0)  # Chỉ còn event_count, mỗi sự kiện nằm trong một box
+        local_schema = StateSchema(num_uints=0, num_byte_slices=0)  # Việc tham gia được lưu trong box, không cần opt-in
+
+        # Lấy thông số giao dịch
+        with span("suggested_params"):
+            params = client.suggested_params()
+
+        # Tạo giao dịch tạo ứng dụng
+        txn = ApplicationCreateTxn(
+            sender=sender_address,
+            sp=params,
+            on_complete=0,  # NoOp
+            approval_program=approval_program,
+            clear_program=clear_program,
+            global_schema=global_schema,
+            local_schema=local_schema,
+            extra_pages=0
+        )
+
+        # Ký giao dịch
+        with span("sign"):
+            signed_txn = txn.sign(private_key)
+
+        # Gửi giao dịch
+        with span("send"):
+            txid = client.send_transaction(signed_txn)
+        logger.info(f"Giao dịch được gửi với ID: {txid}")
+
+        # Chờ xác nhận
+        with span("confirm"):
+            confirmed_txn = wait_for_confirmation(client, txid, 10)
+        app_id = confirmed_txn['application-index']
+        operation.set(app_id=app_id)
+        logger.info(f"Smart contract được triển khai với Application ID: {app_id}")
+
+        # Nạp số dư tối thiểu để tài khoản ứng dụng có thể giữ box của các sự kiện
+        with span("fund_app", amount=APP_MIN_BALANCE):
+            fund_txn = PaymentTxn(sender_address, client.suggested_params(), get_application_address(app_id), APP_MIN_BALANCE)
+            txid = client.send_transaction(fund_txn.sign(private_key))
+            wait_for_confirmation(client, txid, 10)
+        logger.info(f"Đã nạp {APP_MIN_BALANCE} microAlgos cho tài khoản ứng dụng")
+        return app_id
+
+def deploy(
+    app_spec_path: Path,
+    deploy_callback: Callable[
+        [AlgodClient, IndexerClient, "algokit_utils.ApplicationSpecification", "algokit_utils.Account"], None
+    ],
+    deployer_initial_funds: int = 2,
+) -> None:
+    """Entry point used by `python -m smart_contracts deploy` for each contract's deploy_config."""
+    # algokit_utils nặng, chỉ import khi thực sự triển khai
+    import algokit_utils
+
+    with span("deploy", app_spec=app_spec_path.parent.name):
+        algod_client = algokit_utils.get_algod_client()
+        indexer_client = algokit_utils.get_indexer_client()
+        app_spec = algokit_utils.ApplicationSpecification.from_json(app_spec_path.read_text())
+        deployer = algokit_utils.get_account(algod_client, "DEPLOYER", fund_with_algos=0)
+        with span("fund_deployer"):
+            algokit_utils.ensure_funded(
+                algod_client,
+                algokit_utils.EnsureBalanceParameters(
+                    account_to_fund=deployer,
+                    min_spending_balance_micro_algos=deployer_initial_funds * 1_000_000,
+                    min_funding_increment_micro_algos=deployer_initial_funds * 1_000_000,
+                ),
+            )
+        with span("deploy_callback"):
+            deploy_callback(algod_client, indexer_client, app_spec, deployer)
 
 if __name__ == "__main__":
-    deploy_contract()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
+    # NFTICKET_OFFLINE_COMPILE=1: biên dịch bằng assembler trong repo khi cache chưa có bytecode
+    deploy_contract(offline_compile=os.getenv("NFTICKET_OFFLINE_COMPILE") == "1")
\ No newline at end of file
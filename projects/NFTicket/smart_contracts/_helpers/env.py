@@ -0,0 +1,39 @@
+# env.py
+
+# Đọc file .env và khoá của tài khoản ở lần dùng đầu tiên rồi giữ lại,
+# để việc import một helper không có tác dụng phụ nào.
+
+import os
+from functools import lru_cache
+
+from algosdk import account, mnemonic
+from dotenv import load_dotenv
+
+PRIVATE_KEY_ENV = "PRIVATE_KEY"  # Mnemonic của tài khoản gửi giao dịch
+
+
+class CredentialsError(RuntimeError):
+    """The account mnemonic is missing or cannot be converted to a key."""
+
+
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """Loads `.env` into the environment once per process."""
+    # Không ghi đè biến đã có, nên biến đặt từ shell hoặc CI vẫn được ưu tiên
+    load_dotenv()
+
+
+@lru_cache(maxsize=None)
+def get_private_key(variable: str = PRIVATE_KEY_ENV) -> str:
+    load_env()
+    value = os.getenv(variable)
+    if not value:
+        raise CredentialsError(f"{variable} is not set")
+    try:
+        return mnemonic.to_private_key(value)
+    except Exception as e:
+        raise CredentialsError(f"Error converting mnemonic to private key: {e}") from e
+
+
+def get_sender_address(variable: str = PRIVATE_KEY_ENV) -> str:
+    return account.address_from_private_key(get_private_key(variable))
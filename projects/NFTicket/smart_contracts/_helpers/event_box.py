@@ -0,0 +1,85 @@
+# event_box.py
+
+# Bố cục box lưu bản ghi của mỗi sự kiện, phải khớp với contract.py:
+# tên box = Itob(event_id), giá trị = 5 số uint64 big-endian liên tiếp.
+# ticket_count là tổng số vé và không đổi; số vé còn lại = ticket_count - ticket_issued.
+# Mỗi người tham gia có box tên Itob(event_id) + địa chỉ, giá trị = số thứ tự vé.
+
+from algosdk import encoding
+
+EVENT_FIELDS = ("nft_id", "end", "stopped", "ticket_count", "ticket_issued")
+FIELD_SIZE = 8
+EVENT_RECORD_SIZE = FIELD_SIZE * len(EVENT_FIELDS)
+EVENT_FIELD_OFFSETS = {name: i * FIELD_SIZE for i, name in enumerate(EVENT_FIELDS)}
+
+# Số dư tối thiểu (microAlgos) ứng dụng phải giữ cho mỗi box: 2500 + 400 * (tên + giá trị)
+BOX_FLAT_MBR = 2500
+BOX_BYTE_MBR = 400
+
+
+def box_mbr(name_size: int, value_size: int) -> int:
+    return BOX_FLAT_MBR + BOX_BYTE_MBR * (name_size + value_size)
+
+
+EVENT_BOX_MBR = box_mbr(FIELD_SIZE, EVENT_RECORD_SIZE)
+
+ADDRESS_SIZE = 32
+ATTENDANT_BOX_NAME_SIZE = FIELD_SIZE + ADDRESS_SIZE
+ATTENDANT_BOX_MBR = box_mbr(ATTENDANT_BOX_NAME_SIZE, FIELD_SIZE)
+
+
+def event_funding(ticket_count: int) -> int:
+    """MBR the creator pays with create_event: the event box plus one box per ticket."""
+    return EVENT_BOX_MBR + ticket_count * ATTENDANT_BOX_MBR
+
+
+def event_box_name(event_id: int) -> bytes:
+    return event_id.to_bytes(FIELD_SIZE, 'big')
+
+
+def event_box_ref(event_id: int) -> tuple[int, bytes]:
+    """Box reference for the current app (app index 0) to pass in `boxes=`."""
+    return (0, event_box_name(event_id))
+
+
+def is_event_box_name(name: bytes) -> bool:
+    return len(name) == FIELD_SIZE
+
+
+def attendant_box_name(event_id: int, address: str) -> bytes:
+    return event_box_name(event_id) + encoding.decode_address(address)
+
+
+def attendant_box_ref(event_id: int, address: str) -> tuple[int, bytes]:
+    return (0, attendant_box_name(event_id, address))
+
+
+def add_attendant_box_refs(event_id: int, address: str) -> list[tuple[int, bytes]]:
+    """Boxes an add_attendant call touches: the event record and the attendant box."""
+    return [event_box_ref(event_id), attendant_box_ref(event_id, address)]
+
+
+def is_attendant_box_name(name: bytes) -> bool:
+    return len(name) == ATTENDANT_BOX_NAME_SIZE
+
+
+def decode_attendant_box_name(name: bytes) -> tuple[int, str]:
+    """Returns (event_id, address) for an attendant box name."""
+    return int.from_bytes(name[:FIELD_SIZE], 'big'), encoding.encode_address(name[FIELD_SIZE:])
+
+
+def decode_ticket_number(value: bytes) -> int:
+    return int.from_bytes(value[:FIELD_SIZE], 'big')
+
+
+def decode_event_record(value: bytes) -> dict[str, int]:
+    if len(value) != EVENT_RECORD_SIZE:
+        raise ValueError(f"Event record must be {EVENT_RECORD_SIZE} bytes, got {len(value)}")
+    return {
+        name: int.from_bytes(value[offset:offset + FIELD_SIZE], 'big')
+        for name, offset in EVENT_FIELD_OFFSETS.items()
+    }
+
+
+def encode_event_record(**fields: int) -> bytes:
+    return b"".join(fields.get(name, 0).to_bytes(FIELD_SIZE, 'big') for name in EVENT_FIELDS)
@@ -0,0 +1,442 @@
+# fake_algod.py
+
+# algod giả chạy trong tiến trình, dùng NFTicketSimulator làm trạng thái của ứng dụng.
+# Đủ các endpoint mà helper dùng để chạy benchmark và thử nghiệm mà không cần node.
+
+import asyncio
+import base64
+import io
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+import msgpack
+from algosdk import encoding, error, logic
+from algosdk.transaction import (
+    ApplicationCallTxn,
+    OnComplete,
+    SignedTransaction,
+    SuggestedParams,
+)
+
+from smart_contracts._helpers.event_box import (
+    FIELD_SIZE,
+    encode_event_record,
+    event_box_name,
+    is_attendant_box_name,
+    is_event_box_name,
+)
+from smart_contracts._helpers.simulator import NFTicketSimulator
+from smart_contracts._helpers.teal_assembler import assemble
+from smart_contracts._helpers.teal_eval import AppCall, AppState, Program, evaluate
+
+GENESIS_ID = "fake-v1"
+GENESIS_HASH = base64.b64encode(bytes(32)).decode()
+MIN_FEE = 1000
+
+
+@dataclass
+class SubmittedGroup:
+    """One send_transactions call as FakeAlgod saw it."""
+
+    txids: list[str]
+    round: int  # Round mà nhóm sẽ được xác nhận nếu được nhận
+    error: str | None = None  # Lỗi trả cho người gửi, None nếu nhóm đã vào pool
+
+    @property
+    def accepted(self) -> bool:
+        return self.error is None
+
+
+class FakeAlgod:
+    """In-process stand-in for AlgodClient backed by `NFTicketSimulator`.
+
+    Calls to the NFTicket app are evaluated when they are submitted, as
+    algod does for its transaction pool: rejected calls raise
+    `AlgodHTTPError` with status 400 and never enter the pool. Accepted
+    transactions are confirmed in the next block. Blocks are produced every
+    `block_time` seconds, or as soon as something is pending when
+    `block_time` is 0. Transactions whose validity window does not cover
+    the next round are rejected as "txn dead", and create_event calls must
+    reference the box of the event they create. As in algod, a transaction
+    with a lease is rejected while an earlier transaction with the same
+    sender and lease is still valid. Other transactions (e.g. MBR payments)
+    are accepted without further checks.
+
+    With `pool_capacity` set the pool behaves like a congested node: once
+    it is half full, transactions paying less than twice the minimum fee
+    are rejected as below the fee threshold, and a full pool rejects
+    everything until the next block.
+
+    `apps` hosts that many NFTicket apps with consecutive ids starting at
+    `app_id`; a group may call only one of them. With `registry_app_id` the
+    shard registry app of registry.py is hosted at that id too; its TEAL
+    runs in teal_eval, so its boxes behave as on chain.
+
+    Every submission is appended to `groups`, accepted or not, so tests
+    can check exactly what a helper sent and in which order.
+    """
+
+    def __init__(
+        self,
+        creator: str,
+        app_id: int = 1,
+        block_time: float = 0.0,
+        clock: Callable[[], float] = time.time,
+        start_round: int = 1,
+        pool_capacity: int | None = None,
+        apps: int = 1,
+        registry_app_id: int | None = None,
+    ):
+        self.app_id = app_id
+        self.creator = creator
+        self.block_time = block_time
+        self.clock = clock
+        self.simulators: dict[int, NFTicketSimulator] = {}
+        for shard_app_id in range(app_id, app_id + apps):
+            self.simulators[shard_app_id] = NFTicketSimulator(encoding.decode_address(creator))
+            self.simulators[shard_app_id].create()
+        self.simulator = self.simulators[app_id]
+        self.registry_app_id = registry_app_id
+        self.registry_state = AppState()
+        self._registry_program: Program | None = None
+        if registry_app_id is not None:
+            # PyTeal chỉ cần khi có registry
+            from smart_contracts._helpers.registry import approval_teal
+
+            self._registry_program = Program.parse(approval_teal())
+        self.round = start_round
+        self.pool_capacity = pool_capacity
+        self._pool: list[str] = []
+        self._txns: dict[str, dict] = {}
+        self._blocks: dict[int, list[str]] = {}
+        # (sender, lease) -> last valid round của giao dịch đã nhận giữ lease đó
+        self._leases: dict[tuple[str, bytes], int] = {}
+        self._lock = threading.Condition()
+        self._last_block = time.monotonic()
+        # Mọi lần gửi theo thứ tự, kể cả lần bị từ chối
+        self.groups: list[SubmittedGroup] = []
+        self.submitted = 0
+        self.rejected = 0
+        self.compiled = 0
+
+    # --- Endpoint của algod mà các helper sử dụng ---
+
+    def compile(self, source: str, source_map: bool = False, **kwargs: Any) -> dict:
+        self.compiled += 1
+        program = assemble(source)
+        response = {"hash": logic.address(program.bytecode), "result": base64.b64encode(program.bytecode).decode()}
+        if source_map:
+            response["sourcemap"] = program.sourcemap()
+        return response
+
+    def suggested_params(self, **kwargs: Any) -> SuggestedParams:
+        with self._lock:
+            first = self.round
+        return SuggestedParams(MIN_FEE, first, first + 1000, GENESIS_HASH, GENESIS_ID, flat_fee=True, min_fee=MIN_FEE)
+
+    def status(self, **kwargs: Any) -> dict:
+        with self._lock:
+            self._produce_due_blocks()
+            return {"last-round": self.round, "time-since-last-round": 0}
+
+    def status_after_block(self, block_num: int | None = None, round_num: int | None = None, **kwargs: Any) -> dict:
+        after = block_num if block_num is not None else round_num
+        with self._lock:
+            while self.round <= after:
+                if self.block_time:
+                    self._lock.wait(max(0.0, self._last_block + self.block_time - time.monotonic()))
+                    self._produce_due_blocks()
+                elif self._pool:
+                    self._produce_block()
+                elif not self._lock.wait(0.05):
+                    # Không có gì chờ xác nhận: vẫn cho round tiến lên để người gọi không bị treo
+                    self._produce_block()
+            return {"last-round": self.round, "time-since-last-round": 0}
+
+    def send_transaction(self, txn: SignedTransaction, **kwargs: Any) -> str:
+        return self.send_transactions([txn])
+
+    def send_raw_transaction(self, txn: bytes | str, **kwargs: Any) -> str:
+        unpacker = msgpack.Unpacker(io.BytesIO(base64.b64decode(txn)), raw=False)
+        return self.send_transactions([SignedTransaction.undictify(item) for item in unpacker])
+
+    def send_transactions(self, txns: list[SignedTransaction], **kwargs: Any) -> str:
+        txids = [txn.get_txid() for txn in txns]
+        with self._lock:
+            try:
+                self._accept(txids, txns)
+            except error.AlgodHTTPError as e:
+                self.groups.append(SubmittedGroup(txids, self.round + 1, str(e)))
+                raise
+            self.groups.append(SubmittedGroup(txids, self.round + 1))
+            self._lock.notify_all()
+        return txids[0]
+
+    def pending_transaction_info(self, txid: str, **kwargs: Any) -> dict:
+        with self._lock:
+            self._produce_due_blocks()
+            info = self._txns.get(txid)
+            if info is None:
+                raise error.AlgodHTTPError("txn does not exist", 404)
+            return dict(info)
+
+    def block_info(self, block: int | None = None, response_format: str = "json", round_num: int | None = None, **kwargs: Any) -> bytes:
+        number = block if block is not None else round_num
+        if response_format != "msgpack":
+            raise error.AlgodHTTPError("FakeAlgod serves blocks as msgpack only", 400)
+        with self._lock:
+            self._produce_due_blocks()
+            if number > self.round:
+                raise error.AlgodHTTPError(f"failed to retrieve information from the ledger: round {number}", 404)
+            txns = [self._block_entry(self._txns[txid]["txn"]) for txid in self._blocks.get(number, [])]
+        block = {"gen": GENESIS_ID, "gh": base64.b64decode(GENESIS_HASH), "rnd": number, "txns": txns}
+        return msgpack.packb({"block": block}, use_bin_type=True)
+
+    def application_info(self, app_id: int, **kwargs: Any) -> dict:
+        simulator = self._require_app(app_id)
+        with self._lock:
+            count = simulator.event_count
+        key = base64.b64encode(b"event_count").decode()
+        return {
+            "id": app_id,
+            "params": {
+                "creator": self.creator,
+                "global-state": [{"key": key, "value": {"type": 2, "uint": count, "bytes": ""}}],
+            },
+        }
+
+    def application_boxes(self, app_id: int, **kwargs: Any) -> dict:
+        if app_id == self.registry_app_id:
+            with self._lock:
+                names = list(self.registry_state.boxes)
+            return {"boxes": [{"name": base64.b64encode(name).decode()} for name in names]}
+        simulator = self._require_app(app_id)
+        with self._lock:
+            names = [event_box_name(event_id) for event_id in simulator.events]
+            names += [event_box_name(event_id) + address for event_id, address in simulator.attendants]
+        return {"boxes": [{"name": base64.b64encode(name).decode()} for name in names]}
+
+    def application_box_by_name(self, app_id: int, box_name: bytes, **kwargs: Any) -> dict:
+        if app_id == self.registry_app_id:
+            with self._lock:
+                value = self.registry_state.boxes.get(box_name)
+        else:
+            value = self._box_value(self._require_app(app_id), box_name)
+        if value is None:
+            raise error.AlgodHTTPError("box not found", 404)
+        return {
+            "name": base64.b64encode(box_name).decode(),
+            "value": base64.b64encode(value).decode(),
+            "round": self.round,
+        }
+
+    # --- Nội bộ ---
+
+    def _accept(self, txids: list[str], txns: list[SignedTransaction]) -> None:
+        for txid in txids:
+            if txid in self._txns:
+                raise error.AlgodHTTPError(f"transaction already in ledger: {txid}", 400)
+        next_round = self.round + 1
+        for txid, stxn in zip(txids, txns):
+            first, last = stxn.transaction.first_valid_round, stxn.transaction.last_valid_round
+            if not first <= next_round <= last:
+                raise error.AlgodHTTPError(f"transaction {txid}: txn dead: round {next_round} outside of {first}--{last}", 400)
+        leases = []
+        for txid, stxn in zip(txids, txns):
+            if stxn.transaction.lease:
+                key = (stxn.transaction.sender, bytes(stxn.transaction.lease))
+                if self._leases.get(key, 0) >= next_round:
+                    raise error.AlgodHTTPError(
+                        f"transaction {txid} using an overlapping lease (sender, lease):"
+                        f"({key[0]}, {base64.b64encode(key[1]).decode()})", 400
+                    )
+                leases.append((key, stxn.transaction.last_valid_round))
+        self._check_congestion(txns)
+        calls = [
+            (txid, encoding.decode_address(stxn.transaction.sender), stxn.transaction)
+            for txid, stxn in zip(txids, txns)
+            if self._is_app_call(stxn.transaction)
+        ]
+        called = {txn.index for _, _, txn in calls}
+        if len(called) > 1:
+            raise error.AlgodHTTPError(f"transaction {txids[0]}: FakeAlgod groups may call only one app", 400)
+        self.submitted += len(txns)
+        timestamp = int(self.clock())
+        if called == {self.registry_app_id}:
+            try:
+                self._call_registry(calls, timestamp)
+            except error.AlgodHTTPError:
+                self.rejected += len(txns)
+                raise
+            self._enter_pool(txids, txns, leases)
+            return
+        simulator = self.simulators[called.pop()] if called else self.simulator
+        # Như algod: create_event chỉ được ghi vào box đã tham chiếu, tức box của id sự kiện kế tiếp
+        next_event = simulator.event_count
+        for txid, _, txn in calls:
+            if txn.app_args and txn.app_args[0] == b"create_event":
+                next_event += 1
+                if event_box_name(next_event) not in {ref.name for ref in txn.boxes or []}:
+                    self.rejected += len(txns)
+                    raise error.AlgodHTTPError(
+                        f"transaction {txid}: logic eval error: invalid Box reference {next_event}", 400
+                    )
+        results = simulator.call_group([
+            (sender, list(txn.app_args or []), int(txn.on_complete), timestamp) for _, sender, txn in calls
+        ])
+        failed = next((r for r in results if not r.approved), None)
+        if failed is not None:
+            self.rejected += len(txns)
+            # Như algod: lỗi nêu txid của đúng giao dịch bị từ chối trong nhóm
+            raise error.AlgodHTTPError(
+                f"transaction {calls[failed.failed_call][0]}: logic eval error: {failed.error or 'rejected'}", 400
+            )
+        self._enter_pool(txids, txns, leases)
+
+    def _enter_pool(self, txids: list[str], txns: list[SignedTransaction], leases: list) -> None:
+        self._leases.update(leases)
+        for txid, stxn in zip(txids, txns):
+            # Dạng chuẩn (canonical) như trên wire: không có trường rỗng, khoá đã sắp xếp
+            canonical = msgpack.unpackb(base64.b64decode(encoding.msgpack_encode(stxn)), raw=False)
+            self._txns[txid] = {"txn": canonical, "confirmed-round": 0, "pool-error": ""}
+            self._pool.append(txid)
+
+    def _call_registry(self, calls: list, timestamp: int) -> None:
+        # Cả nhóm được đánh giá trên bản sao trạng thái, chỉ ghi lại khi mọi lời gọi được chấp nhận
+        state = self.registry_state
+        for txid, sender, txn in calls:
+            call = AppCall(
+                sender, list(txn.app_args or []), self.registry_app_id, int(txn.on_complete),
+                encoding.decode_address(self.creator), timestamp, self.round + 1,
+            )
+            result = evaluate(self._registry_program, call, state)
+            if not result.approved:
+                raise error.AlgodHTTPError(f"transaction {txid}: logic eval error: {result.error or 'rejected'}", 400)
+            state = result.state
+        self.registry_state = state
+
+    def _block_entry(self, stxn: dict) -> dict:
+        # Như algod: block không lặp lại genesis id/hash trong từng giao dịch mà đánh dấu bằng hgi/hgh
+        txn = {key: value for key, value in stxn["txn"].items() if key not in ("gen", "gh")}
+        return {**stxn, "txn": txn, "hgi": "gen" in stxn["txn"], "hgh": "gh" in stxn["txn"]}
+
+    def _is_app_call(self, txn) -> bool:
+        return (
+            isinstance(txn, ApplicationCallTxn)
+            and (txn.index in self.simulators or txn.index == self.registry_app_id)
+            and txn.on_complete != OnComplete.ClearStateOC
+        )
+
+    def _check_congestion(self, txns: list[SignedTransaction]) -> None:
+        if self.pool_capacity is None:
+            return
+        self._produce_due_blocks()
+        if len(self._pool) + len(txns) > self.pool_capacity:
+            raise error.AlgodHTTPError("TransactionPool.Remember: transaction pool have reached capacity", 400)
+        if len(self._pool) >= self.pool_capacity // 2:
+            threshold = 2 * MIN_FEE
+            fee = sum(stxn.transaction.fee for stxn in txns)
+            if fee < threshold * len(txns):
+                raise error.AlgodHTTPError(f"TransactionPool.Remember: fee {fee} below threshold {threshold * len(txns)}", 400)
+
+    def _require_app(self, app_id: int) -> NFTicketSimulator:
+        if app_id not in self.simulators:
+            raise error.AlgodHTTPError("application does not exist", 404)
+        return self.simulators[app_id]
+
+    def _box_value(self, simulator: NFTicketSimulator, name: bytes) -> bytes | None:
+        event_id = int.from_bytes(name[:FIELD_SIZE], 'big')
+        with self._lock:
+            if is_event_box_name(name):
+                record = simulator.events.get(event_id)
+                if record is None:
+                    return None
+                nft_id, end, stopped, ticket_count, ticket_issued = record
+                return encode_event_record(
+                    nft_id=nft_id, end=end, stopped=stopped, ticket_count=ticket_count, ticket_issued=ticket_issued
+                )
+            if is_attendant_box_name(name):
+                ticket_number = simulator.attendants.get((event_id, name[FIELD_SIZE:]))
+                return None if ticket_number is None else ticket_number.to_bytes(FIELD_SIZE, 'big')
+        return None
+
+    def _produce_due_blocks(self) -> None:
+        if not self.block_time:
+            return
+        now = time.monotonic()
+        while now - self._last_block >= self.block_time:
+            self._produce_block()
+            self._last_block += self.block_time
+
+    def _produce_block(self) -> None:
+        self.round += 1
+        for txid in self._pool:
+            self._txns[txid]["confirmed-round"] = self.round
+        self._blocks[self.round] = self._pool
+        self._pool = []
+        if not self.block_time:
+            self._last_block = time.monotonic()
+        self._lock.notify_all()
+
+
+def _to_json(value: Any) -> Any:
+    # algod trả các trường bytes dưới dạng base64 trong JSON
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def mock_transport(fake: FakeAlgod) -> httpx.MockTransport:
+    """An httpx transport that serves algod's REST routes from `fake`.
+
+    Pass it as `transport=` to an `httpx.AsyncClient` (e.g. through
+    `NFTicketClient`) to exercise async code without a node. Calls run in a
+    worker thread, so a blocking `wait-for-block-after` does not stall the
+    event loop.
+    """
+
+    def params() -> dict:
+        sp = fake.suggested_params()
+        return {
+            "consensus-version": "future", "fee": 0, "genesis-hash": sp.gh, "genesis-id": sp.gen,
+            "last-round": sp.first, "min-fee": MIN_FEE,
+        }
+
+    routes: list[tuple[str, str, Callable[..., Any]]] = [
+        ("GET", r"/v2/transactions/params", params),
+        ("POST", r"/v2/transactions", lambda body: {"txId": fake.send_raw_transaction(base64.b64encode(body))}),
+        ("GET", r"/v2/transactions/pending/(\w+)", lambda txid: _to_json(fake.pending_transaction_info(txid))),
+        ("GET", r"/v2/status", fake.status),
+        ("GET", r"/v2/status/wait-for-block-after/(\d+)", lambda r: fake.status_after_block(int(r))),
+        ("GET", r"/v2/blocks/(\d+)", lambda r: fake.block_info(int(r), response_format="msgpack")),
+        ("GET", r"/v2/applications/(\d+)", lambda app_id: fake.application_info(int(app_id))),
+    ]
+
+    def dispatch(request: httpx.Request) -> httpx.Response:
+        for method, pattern, handler in routes:
+            match = re.fullmatch(pattern, request.url.path)
+            if request.method == method and match:
+                args = match.groups() or ((request.content,) if method == "POST" else ())
+                try:
+                    result = handler(*args)
+                except error.AlgodHTTPError as e:
+                    return httpx.Response(e.code or 500, json={"message": str(e)})
+                if isinstance(result, bytes):
+                    return httpx.Response(200, content=result, headers={"Content-Type": "application/msgpack"})
+                return httpx.Response(200, json=result)
+        return httpx.Response(404, json={"message": f"FakeAlgod has no route {request.method} {request.url.path}"})
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        return await asyncio.to_thread(dispatch, request)
+
+    return httpx.MockTransport(handle)
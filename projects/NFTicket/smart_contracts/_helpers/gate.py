@@ -0,0 +1,304 @@
+# gate.py
+
+# Dịch vụ soát vé tại cổng: nạp trước danh sách người có vé của một sự kiện vào bộ nhớ,
+# cập nhật theo từng round mới và trả lời "địa chỉ này có vé không" trong vài micro giây.
+# Địa chỉ không có trong bộ nhớ thì hỏi lại chain (box của người tham gia).
+
+import argparse
+import base64
+import json
+import logging
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+
+import msgpack
+from algosdk import encoding
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.attendance import prove_attendance
+from smart_contracts._helpers.event_box import (
+    ADDRESS_SIZE,
+    FIELD_SIZE,
+    event_box_name,
+    is_attendant_box_name,
+)
+from smart_contracts._helpers.instrumentation import configure, inc, span
+
+logger = logging.getLogger(__name__)
+
+APP_ID = 724732255  # Application ID mới của bạn
+ADD_ATTENDANT = b"add_attendant"
+# Số địa chỉ mới được giữ trong set phụ trước khi gộp vào mảng đã sắp xếp
+COMPACT_THRESHOLD = 4096
+
+
+class AttendeeSet:
+    """Exact set of 32-byte addresses stored as one sorted byte array.
+
+    Lookups binary-search the array, so memory stays at 32 bytes per
+    attendee. Addresses added later go into a small set that is merged
+    into the array once it reaches `compact_threshold` entries.
+    """
+
+    def __init__(self, addresses: Iterable[bytes] = (), compact_threshold: int = COMPACT_THRESHOLD):
+        self.compact_threshold = compact_threshold
+        self._packed = b"".join(sorted(set(addresses)))
+        self._count = len(self._packed) // ADDRESS_SIZE
+        self._recent: set[bytes] = set()
+
+    def __contains__(self, address: bytes) -> bool:
+        if address in self._recent:
+            return True
+        packed = self._packed
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            start = mid * ADDRESS_SIZE
+            probe = packed[start:start + ADDRESS_SIZE]
+            if probe < address:
+                lo = mid + 1
+            elif probe > address:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return self._count + len(self._recent)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._packed) + ADDRESS_SIZE * len(self._recent)
+
+    def add(self, address: bytes) -> bool:
+        """Adds an address; returns False if it was already present."""
+        if address in self:
+            return False
+        self._recent.add(address)
+        if len(self._recent) >= self.compact_threshold:
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        if not self._recent:
+            return
+        addresses = [self._packed[i:i + ADDRESS_SIZE] for i in range(0, len(self._packed), ADDRESS_SIZE)]
+        # Gán mảng mới một lần, để luồng đang tra cứu luôn thấy một mảng hoàn chỉnh
+        self._packed = b"".join(sorted([*addresses, *self._recent]))
+        self._count = len(self._packed) // ADDRESS_SIZE
+        self._recent = set()
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    admitted: bool
+    source: str  # "cache", "chain" hoặc "negative" (chain vừa trả lời không có vé ở round này)
+    ticket_number: int | None = None
+
+
+@dataclass
+class GateStats:
+    hits: int = 0
+    chain_hits: int = 0
+    denied: int = 0
+    chain_queries: int = 0
+    rounds: int = 0
+    added_from_blocks: int = 0
+
+
+class GateVerifier:
+    """Answers "does this address hold a ticket for the event" from memory.
+
+    `preload()` lists the app's boxes and keeps the addresses of the
+    event's attendant boxes in an `AttendeeSet`. `follow()` (or `start()`
+    in a background thread) then reads every new block and adds the
+    senders of confirmed add_attendant calls for the event. An address
+    that is not in the set is looked up on chain, because its purchase may
+    be in a block not applied yet; a negative answer is remembered until
+    the next round is applied, so repeated scans of a ticketless address
+    cost one node query per round.
+    """
+
+    def __init__(self, app_id: int, event_id: int, client: algod.AlgodClient | None = None, fallback: bool = True):
+        self.app_id = app_id
+        self.event_id = event_id
+        self.client = client or get_algod_client()
+        self.fallback = fallback
+        self.attendees = AttendeeSet()
+        self.round = 0  # Round cuối cùng đã được áp dụng vào tập người tham gia
+        self.stats = GateStats()
+        self._event_key = event_box_name(event_id)
+        self._negative: dict[bytes, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # --- Nạp và cập nhật ---
+
+    def preload(self) -> int:
+        """Loads the event's attendees from the app's boxes; returns how many there are."""
+        with span("gate_preload", app_id=self.app_id, event_id=self.event_id):
+            # Lấy round trước khi liệt kê box: block sau round này được áp dụng lại, việc thêm trùng vô hại
+            start_round = self.client.status()['last-round']
+            addresses = []
+            for box in self.client.application_boxes(self.app_id)['boxes']:
+                name = base64.b64decode(box['name'])
+                if is_attendant_box_name(name) and name[:FIELD_SIZE] == self._event_key:
+                    addresses.append(name[FIELD_SIZE:])
+        with self._lock:
+            self.attendees = AttendeeSet(addresses)
+            self.round = start_round
+            self._negative.clear()
+        logger.info(f"Đã nạp {len(addresses)} người tham gia của sự kiện {self.event_id} ở round {start_round}")
+        return len(addresses)
+
+    def apply_block(self, round_num: int, block: dict) -> int:
+        """Adds the buyers in one block; returns how many were new."""
+        added = 0
+        for stxn in block.get('txns', []):
+            txn = stxn.get('txn', {})
+            args = txn.get('apaa') or []
+            if (
+                txn.get('type') == 'appl'
+                and txn.get('apid') == self.app_id
+                and len(args) == 2
+                and args[0] == ADD_ATTENDANT
+                and int.from_bytes(args[1], 'big') == self.event_id
+            ):
+                # Block chỉ chứa giao dịch đã thành công, nên người gửi chắc chắn đã có vé
+                with self._lock:
+                    added += self.attendees.add(txn['snd'])
+        with self._lock:
+            self.round = max(self.round, round_num)
+            self._negative.clear()
+        self.stats.rounds += 1
+        self.stats.added_from_blocks += added
+        return added
+
+    def catch_up(self) -> int:
+        """Applies every block after `self.round` up to the node's last round."""
+        last_round = self.client.status()['last-round']
+        for round_num in range(self.round + 1, last_round + 1):
+            raw = self.client.block_info(round_num, response_format="msgpack")
+            block = msgpack.unpackb(raw, raw=False, strict_map_key=False)['block']
+            self.apply_block(round_num, block)
+        return last_round
+
+    def follow(self) -> None:
+        """Applies new blocks as the node produces them, until `close()`."""
+        while not self._stop.is_set():
+            try:
+                self.catch_up()
+                # Chờ block kế tiếp ở phía node thay vì hỏi liên tục
+                self.client.status_after_block(self.round)
+            except Exception as e:
+                inc("nfticket_gate_follow_errors_total")
+                logger.warning(f"Lỗi khi đọc block mới: {e}")
+                self._stop.wait(1.0)
+
+    def start(self) -> "GateVerifier":
+        self.preload()
+        self._thread = threading.Thread(target=self.follow, name="gate-follow", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    # --- Soát vé ---
+
+    def verify(self, address: str | bytes) -> ScanResult:
+        """Checks one scanned address; falls back to the chain when it is not in memory."""
+        raw = encoding.decode_address(address) if isinstance(address, str) else address
+        if raw in self.attendees:
+            self.stats.hits += 1
+            return ScanResult(True, "cache")
+        if not self.fallback or self._negative.get(raw, -1) >= self.round:
+            self.stats.denied += 1
+            return ScanResult(False, "negative" if self.fallback else "cache")
+
+        checked_round = self.round
+        self.stats.chain_queries += 1
+        inc("nfticket_gate_chain_queries_total")
+        proof = prove_attendance(self.client, self.app_id, self.event_id, encoding.encode_address(raw))
+        if proof is None:
+            with self._lock:
+                self._negative[raw] = checked_round
+            self.stats.denied += 1
+            return ScanResult(False, "chain")
+        with self._lock:
+            self.attendees.add(raw)
+        self.stats.chain_hits += 1
+        return ScanResult(True, "chain", proof['ticket_number'])
+
+
+def bench(attendees: int = 100_000, scans: int = 200_000, seed: int = 0) -> dict:
+    """Measures in-memory lookups for hits and misses against `attendees` random addresses."""
+    import random
+
+    rng = random.Random(seed)
+    holders = [rng.randbytes(ADDRESS_SIZE) for _ in range(attendees)]
+    strangers = [rng.randbytes(ADDRESS_SIZE) for _ in range(scans)]
+    started = time.perf_counter()
+    attendee_set = AttendeeSet(holders)
+    build_seconds = time.perf_counter() - started
+
+    def time_lookups(addresses: list[bytes]) -> tuple[float, int]:
+        begin = time.perf_counter()
+        found = sum(address in attendee_set for address in addresses)
+        return time.perf_counter() - begin, found
+
+    hit_probe = [holders[rng.randrange(attendees)] for _ in range(scans)]
+    hit_seconds, hits = time_lookups(hit_probe)
+    miss_seconds, false_hits = time_lookups(strangers)
+    return {
+        "attendees": attendees,
+        "scans": scans,
+        "build_seconds": round(build_seconds, 4),
+        "hit_us": round(hit_seconds / scans * 1e6, 3),
+        "miss_us": round(miss_seconds / scans * 1e6, 3),
+        "hits": hits,
+        "false_hits": false_hits,
+        "bytes_per_attendee": round(attendee_set.nbytes / attendees, 1) if attendees else None,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
+    parser = argparse.ArgumentParser(description="Soát vé tại cổng với danh sách người tham gia trong bộ nhớ")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = sub.add_parser("scan", help="Nạp sự kiện rồi đọc địa chỉ quét được từ stdin, mỗi dòng một địa chỉ")
+    scan_parser.add_argument("event_id", type=int)
+    scan_parser.add_argument("--app-id", type=int, default=APP_ID)
+
+    bench_parser = sub.add_parser("bench", help="Đo thời gian tra cứu trong bộ nhớ")
+    bench_parser.add_argument("--attendees", type=int, default=100_000)
+    bench_parser.add_argument("--scans", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        print(json.dumps(bench(args.attendees, args.scans), indent=2))
+        raise SystemExit(0)
+
+    gate = GateVerifier(args.app_id, args.event_id).start()
+    try:
+        for line in iter(input, ""):
+            line = line.strip()
+            if not encoding.is_valid_address(line):
+                print(f"{line}: địa chỉ không hợp lệ")
+                continue
+            result = gate.verify(line)
+            print(f"{line}: {'OK' if result.admitted else 'KHÔNG CÓ VÉ'} ({result.source})")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        gate.close()
+        print(json.dumps(asdict(gate.stats)), file=sys.stderr)
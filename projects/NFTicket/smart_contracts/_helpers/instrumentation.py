@@ -0,0 +1,310 @@
+# instrumentation.py
+
+# Đo thời gian từng giai đoạn (suggested params, ký, gửi, xác nhận) và đếm thành công/thất bại
+# theo loại lỗi cho các helper, xuất ra dạng text của Prometheus hoặc JSONL.
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from algosdk import error
+
+from smart_contracts._helpers.env import load_env
+
+logger = logging.getLogger(__name__)
+
+JSONL_ENV = "NFTICKET_TRACE_JSONL"
+PROMETHEUS_ENV = "NFTICKET_METRICS_PROM"
+# Ngưỡng histogram (giây): từ một request tới node cho tới vài block chờ xác nhận
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    operation: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    started: float = 0.0
+    duration: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+    error_type: str | None = None  # Tên lớp của exception, chi tiết hơn nhãn error_kind()
+    # Lỗi đã được đếm ở một span con, để không đếm lại khi nó lan lên span cha
+    counted: BaseException | None = field(default=None, init=False, repr=False)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "ts": self.started,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "operation": self.operation,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "error": self.error,
+            "error_type": self.error_type,
+            "attributes": self.attributes,
+        }
+
+
+@dataclass
+class _Histogram:
+    buckets: list[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+    count: int = 0
+    total: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("nfticket_span", default=None)
+
+
+def error_kind(exc: BaseException) -> str:
+    """Groups an exception into a short, bounded label for counters."""
+    if isinstance(exc, error.ConfirmationTimeoutError):
+        return "confirmation_timeout"
+    if isinstance(exc, error.TransactionRejectedError):
+        return "pool_rejected"
+    message = str(exc)
+    if isinstance(exc, error.AlgodHTTPError):
+        for needle, kind in (
+            ("logic eval error", "logic_eval"),
+            ("overspend", "overspend"),
+            ("already in ledger", "already_in_ledger"),
+            ("already in pool", "already_in_pool"),
+            ("fee too small", "fee_too_small"),
+            ("below threshold", "fee_too_small"),
+            ("less than the minimum", "fee_too_small"),
+            ("txn dead", "txn_dead"),
+            ("round outside", "txn_dead"),
+            ("reached capacity", "pool_full"),
+            ("pool is full", "pool_full"),
+        ):
+            if needle in message:
+                return kind
+        return f"http_{exc.code}" if exc.code else "http"
+    # TicketsUnavailableError -> tickets_unavailable, URLError -> url
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", type(exc).__name__.removesuffix("Error")).lower()
+
+
+def _key(name: str, labels: dict[str, Any]) -> tuple[str, Labels]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in items)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + "}"
+
+
+class Metrics:
+    """Thread-safe counters, gauges, duration histograms and span hooks.
+
+    `span()` times a block of work. Spans nest through a context variable,
+    so the phases inside an operation share its trace id and are labelled
+    with the operation's name. Every finished span is observed into the
+    `nfticket_span_duration_seconds` histogram, counted in
+    `nfticket_spans_total` by status and handed to each registered hook
+    (e.g. `JsonlSink`). A failure is counted once in `nfticket_errors_total`
+    by `error_kind()`, at the innermost span it was raised through.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._gauges: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], _Histogram] = {}
+        self._hooks: list[Callable[[Span], None]] = []
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(seconds)
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[Span], None]) -> None:
+        with self._lock:
+            self._hooks.remove(hook)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            operation=parent.operation if parent else name,
+            attributes=attributes,
+            started=time.time(),
+        )
+        token = _current.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = error_kind(e)
+            span.error_type = type(e).__name__
+            if span.counted is not e:
+                self.inc("nfticket_errors_total", kind=span.error, operation=span.operation, span=name)
+            if parent is not None:
+                parent.counted = e
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        labels = {"operation": span.operation, "span": span.name}
+        self.observe("nfticket_span_duration_seconds", span.duration, **labels)
+        self.inc("nfticket_spans_total", status=span.status, **labels)
+        logger.debug(f"{span.operation}/{span.name} {span.status} in {span.duration * 1000:.1f} ms")
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(span)
+            except Exception as e:
+                logger.warning(f"Metrics hook {hook!r} failed: {e}")
+
+    def snapshot(self) -> dict:
+        """Counter and gauge values and histogram count/sum keyed by `name{labels}`."""
+        with self._lock:
+            counters = {f"{name}{_format_labels(labels)}": value for (name, labels), value in self._counters.items()}
+            gauges = {f"{name}{_format_labels(labels)}": value for (name, labels), value in self._gauges.items()}
+            histograms = {
+                f"{name}{_format_labels(labels)}": {"count": h.count, "sum": round(h.total, 6)}
+                for (name, labels), h in self._histograms.items()
+            }
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def prometheus_text(self) -> str:
+        """Renders everything in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((key, (list(h.buckets), h.count, h.total)) for key, h in self._histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (buckets, count, total) in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, hits in zip(BUCKETS, buckets):
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {hits}")
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        # Ghi qua file tạm rồi đổi tên để textfile collector không đọc phải file ghi dở
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+class JsonlSink:
+    """Span hook that appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+metrics = Metrics()
+span = metrics.span
+inc = metrics.inc
+set_gauge = metrics.set_gauge
+
+
+def configure(jsonl_path: str | None = None, prometheus_path: str | None = None) -> None:
+    """Enables the exports for a script run.
+
+    Paths default to NFTICKET_TRACE_JSONL and NFTICKET_METRICS_PROM, read
+    after `.env` is loaded; when neither is set nothing is exported. The
+    Prometheus file is written at exit, in the format node_exporter's
+    textfile collector reads.
+    """
+    # Biến đặt trong .env cũng phải có hiệu lực, dù configure() chạy trước mọi lời gọi tới node
+    load_env()
+    jsonl_path = jsonl_path or os.getenv(JSONL_ENV)
+    prometheus_path = prometheus_path or os.getenv(PROMETHEUS_ENV)
+    if jsonl_path:
+        sink = JsonlSink(jsonl_path)
+        metrics.add_hook(sink)
+        atexit.register(sink.close)
+    if prometheus_path:
+        atexit.register(metrics.write_prometheus, prometheus_path)
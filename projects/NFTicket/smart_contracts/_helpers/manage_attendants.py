@@ -1,113 +1,72 @@
 # manage_attendants.py
 
-import os
-import sys
-from algosdk import account, mnemonic
-from algosdk.v2client import algod
-from algosdk.transaction import ApplicationNoOpTxn, ApplicationOptInTxn
-from dotenv import load_dotenv
+import logging
 
-# Tải biến môi trường từ file .env
-load_dotenv()
+from algosdk import account
+from algosdk.transaction import ApplicationNoOpTxn
 
-ALGOD_ADDRESS = os.getenv('NODELY_ENDPOINT_URL')
-ALGOD_TOKEN = os.getenv('NODELY_API_KEY')
-MNEMONIC = os.getenv('PRIVATE_KEY')
-APP_ID = 724732255  # Application ID mới của bạn
-
-# Chuyển mnemonic thành private key
-try:
-    PRIVATE_KEY = mnemonic.to_private_key(MNEMONIC)
-    sender_address = account.address_from_private_key(PRIVATE_KEY)
-except Exception as e:
-    print("Error converting mnemonic to private key:", e)
-    sys.exit(1)
-
-# Khởi tạo client
-client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
-
-def opt_in_app(app_id):
-    try:
-        # Lấy thông số giao dịch
-        params = client.suggested_params()
-
-        # Tạo giao dịch opt-in
-        txn = ApplicationOptInTxn(sender_address, params, app_id)
-
-        # Ký giao dịch
-        signed_txn = txn.sign(PRIVATE_KEY)
-
-        # Gửi giao dịch
-        txid = client.send_transaction(signed_txn)
-        print(f"Giao dịch opt-in được gửi với ID: {txid}")
-
-        # Chờ xác nhận
-        confirmed_txn = wait_for_confirmation(client, txid, 10)
-        print(f"Giao dịch opt-in đã được xác nhận ở round {confirmed_txn.get('confirmed-round')}")
-        print("Opt-in thành công vào ứng dụng.")
-
-    except Exception as e:
-        print(f"Error opting into app: {e}")
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import add_attendant_args
+from smart_contracts._helpers.app_state import TicketsUnavailableError, ensure_tickets_available, get_state_reader
+from smart_contracts._helpers.confirmation import wait_for_confirmation
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.event_box import add_attendant_box_refs
+from smart_contracts._helpers.instrumentation import configure, span
 
-def register_attendant(app_id, event_id):
-    try:
-        # Lấy thông số giao dịch
-        params = client.suggested_params()
-
-        # Chuẩn bị argument cho transaction dưới dạng byte strings
-        app_args = [
-            "add_attendant".encode('utf-8'),
-            event_id.to_bytes(8, 'big')
-        ]
-
-        # Tạo giao dịch ApplicationNoOp
-        txn = ApplicationNoOpTxn(sender_address, params, app_id, app_args)
-
-        # Ký giao dịch
-        signed_txn = txn.sign(PRIVATE_KEY)
-
-        # Gửi giao dịch
-        txid = client.send_transaction(signed_txn)
-        print(f"Giao dịch được gửi với ID: {txid}")
-
-        # Chờ xác nhận
-        confirmed_txn = wait_for_confirmation(client, txid, 10)
-        print(f"Giao dịch đã được xác nhận ở round {confirmed_txn.get('confirmed-round')}")
-        print("Đã đăng ký tham gia sự kiện thành công.")
+logger = logging.getLogger(__name__)
 
-    except Exception as e:
-        print(f"Error registering attendant: {e}")
+APP_ID = 724732255  # Application ID mới của bạn
 
-def wait_for_confirmation(client, txid, timeout):
-    import time
+def register_attendant(app_id, event_id, client=None, private_key=None):
+    """Buys a ticket for the sender; returns the confirmed round, or None when no ticket was issued."""
     try:
-        last_round = client.status().get('last-round')
+        with span("add_attendant", app_id=app_id, event_id=event_id) as operation:
+            # Client dùng chung và khoá chỉ được tạo ở lần gọi đầu tiên
+            client = client or get_algod_client()
+            private_key = private_key or get_private_key()
+            sender_address = account.address_from_private_key(private_key)
+
+            # Kiểm tra trạng thái đã cache trước khi gửi, tránh trả phí cho giao dịch chắc chắn bị từ chối
+            with span("check_state"):
+                ensure_tickets_available(get_state_reader(client).event(app_id, event_id), event_id)
+
+            # Lấy thông số giao dịch
+            with span("suggested_params"):
+                params = client.suggested_params()
+
+            # Chuẩn bị argument cho transaction dưới dạng byte strings
+            app_args = add_attendant_args(event_id)
+
+            # Tạo giao dịch ApplicationNoOp, không cần opt-in vì việc tham gia được lưu trong box
+            txn = ApplicationNoOpTxn(sender_address, params, app_id, app_args, boxes=add_attendant_box_refs(event_id, sender_address))
+
+            # Ký giao dịch
+            with span("sign"):
+                signed_txn = txn.sign(private_key)
+
+            # Gửi giao dịch
+            with span("send"):
+                txid = client.send_transaction(signed_txn)
+            operation.set(txid=txid)
+            logger.info(f"Giao dịch được gửi với ID: {txid}")
+
+            # Chờ xác nhận
+            with span("confirm"):
+                confirmed_txn = wait_for_confirmation(client, txid, 10)
+            confirmed_round = confirmed_txn.get('confirmed-round')
+            operation.set(confirmed_round=confirmed_round)
+            logger.info(f"Đã đăng ký tham gia sự kiện {event_id} ở round {confirmed_round}")
+            return confirmed_round
+
+    except TicketsUnavailableError as e:
+        logger.warning(f"Không gửi giao dịch: {e}")
     except Exception as e:
-        print("Error getting status:", e)
-        return
-    current_round = last_round + 1
-
-    while current_round < last_round + timeout:
-        try:
-            pending_txn = client.pending_transaction_info(txid)
-            if pending_txn.get('confirmed-round', 0) > 0:
-                return pending_txn
-            elif pending_txn.get('pool-error'):
-                raise Exception(f"Lỗi Pool: {pending_txn.get('pool-error')}")
-        except Exception as e:
-            print(e)
-            return
-
-        print(f"Đang chờ xác nhận... Block hiện tại: {current_round}")
-        time.sleep(1)
-        current_round += 1
-
-    raise Exception("Timeout chờ xác nhận giao dịch")
+        logger.error(f"Error registering attendant: {type(e).__name__}: {e}")
+    return None
 
 if __name__ == "__main__":
-    # Kiểm tra xem người dùng đã opt-in chưa
-    opt_in_app(APP_ID)
-    
-    # Đăng ký tham gia sự kiện sau khi opt-in
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
+    # Đăng ký tham gia sự kiện bằng một giao dịch duy nhất
     event_id = 1  # ID của sự kiện
     register_attendant(APP_ID, event_id)
\ No newline at end of file
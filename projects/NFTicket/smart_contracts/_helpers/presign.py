@@ -0,0 +1,347 @@
+# presign.py
+
+# Dựng và ký trước hàng loạt giao dịch add_attendant / opt-in với cửa sổ hiệu lực cố định,
+# ký song song trên nhiều tiến trình, ghi ra file msgpack rồi gửi dần lên node với tốc độ giới hạn.
+
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+import msgpack
+from algosdk import account, encoding
+from algosdk.transaction import ApplicationNoOpTxn, ApplicationOptInTxn, SuggestedParams, Transaction
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import add_attendant_args
+from smart_contracts._helpers.batch_attendants import read_purchases
+from smart_contracts._helpers.confirmation import get_confirmation_waiter
+from smart_contracts._helpers.event_box import add_attendant_box_refs
+from smart_contracts._helpers.instrumentation import error_kind, metrics
+from smart_contracts._helpers.rate_limit import RateLimiter
+
+APP_ID = 724732255  # Application ID mới của bạn
+
+FORMAT = "nfticket-presigned"
+FORMAT_VERSION = 1
+MAX_VALIDITY = 1000  # Số round tối đa giữa first-valid và last-valid
+MIN_FEE = 1000
+KINDS = ("add_attendant", "opt_in")
+CHUNK_SIZE = 256  # Số giao dịch mỗi lần gửi cho một tiến trình ký
+
+
+@dataclass(frozen=True)
+class ValidityWindow:
+    """Fixed first/last valid rounds and network, so transactions can be built offline."""
+
+    first: int
+    last: int
+    genesis_id: str
+    genesis_hash: str
+    fee: int = MIN_FEE
+
+    def __post_init__(self):
+        if not 0 < self.last - self.first <= MAX_VALIDITY:
+            raise ValueError(f"Validity window must span 1..{MAX_VALIDITY} rounds, got {self.first}..{self.last}")
+
+    @classmethod
+    def from_node(cls, client: algod.AlgodClient, rounds: int = MAX_VALIDITY, delay: int = 0) -> "ValidityWindow":
+        """Starts the window `delay` rounds after the node's next round."""
+        params = client.suggested_params()
+        first = client.status()['last-round'] + 1 + delay
+        return cls(first, first + rounds, params.gen, params.gh, max(params.min_fee or MIN_FEE, MIN_FEE))
+
+    def params(self) -> SuggestedParams:
+        return SuggestedParams(
+            self.fee, self.first, self.last, self.genesis_hash, self.genesis_id, flat_fee=True, min_fee=self.fee
+        )
+
+
+@dataclass(frozen=True)
+class TxnSpec:
+    private_key: str
+    event_id: int
+    kind: str = "add_attendant"
+
+
+@dataclass(frozen=True)
+class SignedRecord:
+    kind: str
+    event_id: int
+    txid: str
+    blob: bytes  # SignedTransaction ở dạng msgpack chuẩn, gửi thẳng lên /v2/transactions
+
+
+def build_txn(app_id: int, params: SuggestedParams, spec: TxnSpec) -> Transaction:
+    sender = account.address_from_private_key(spec.private_key)
+    if spec.kind == "add_attendant":
+        return ApplicationNoOpTxn(
+            sender, params, app_id, add_attendant_args(spec.event_id),
+            boxes=add_attendant_box_refs(spec.event_id, sender),
+        )
+    if spec.kind == "opt_in":
+        return ApplicationOptInTxn(sender, params, app_id)
+    raise ValueError(f"Unknown transaction kind: {spec.kind}")
+
+
+def sign_chunk(app_id: int, window: ValidityWindow, specs: list[TxnSpec]) -> list[SignedRecord]:
+    """Builds and signs one chunk; runs inside a worker process."""
+    params = window.params()
+    records = []
+    for spec in specs:
+        signed = build_txn(app_id, params, spec).sign(spec.private_key)
+        blob = base64.b64decode(encoding.msgpack_encode(signed))
+        records.append(SignedRecord(spec.kind, spec.event_id, signed.get_txid(), blob))
+    return records
+
+
+def sign_all(
+    app_id: int,
+    window: ValidityWindow,
+    specs: list[TxnSpec],
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[SignedRecord]:
+    """Yields the signed transactions in input order, signing chunks across `workers` processes."""
+    chunks = [specs[i:i + chunk_size] for i in range(0, len(specs), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from sign_chunk(app_id, window, chunk)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        for records in pool.map(sign_chunk, [app_id] * len(chunks), [window] * len(chunks), chunks):
+            yield from records
+
+
+def _pack_record(record: SignedRecord) -> list:
+    # Mảng thay cho map để file gọn; txid lưu 32 byte thay vì chuỗi base32
+    return [KINDS.index(record.kind), record.event_id, base64.b32decode(record.txid + "===="), record.blob]
+
+
+def _unpack_record(item: list) -> SignedRecord:
+    kind, event_id, raw_txid, blob = item
+    return SignedRecord(KINDS[kind], event_id, base64.b32encode(raw_txid).decode().rstrip("="), blob)
+
+
+def write_signed(path: str, app_id: int, window: ValidityWindow, records: Iterable[SignedRecord]) -> int:
+    """Writes a header and the records as a msgpack stream; returns the record count."""
+    packer = msgpack.Packer(use_bin_type=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    count = 0
+    with open(tmp_path, "wb") as f:
+        f.write(packer.pack({"format": FORMAT, "version": FORMAT_VERSION, "app_id": app_id, "window": asdict(window)}))
+        for record in records:
+            f.write(packer.pack(_pack_record(record)))
+            count += 1
+    # Chỉ thay file khi đã ghi xong, để bên gửi không đọc phải file dở dang
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_signed(path: str) -> tuple[dict, Iterator[SignedRecord]]:
+    """Returns the file header and a lazy iterator over its records."""
+    f = open(path, "rb")
+    unpacker = msgpack.Unpacker(f, raw=False)
+    try:
+        header = next(unpacker)
+    except StopIteration:
+        f.close()
+        raise ValueError(f"{path} is empty")
+    if not isinstance(header, dict) or header.get("format") != FORMAT or header.get("version") != FORMAT_VERSION:
+        f.close()
+        raise ValueError(f"{path} is not a {FORMAT} v{FORMAT_VERSION} file")
+
+    def records() -> Iterator[SignedRecord]:
+        with f:
+            for item in unpacker:
+                yield _unpack_record(item)
+
+    return header, records()
+
+
+@dataclass
+class SendReport:
+    sent: int = 0
+    rejected: int = 0
+    expired: int = 0
+    confirmed: int = 0
+    seconds: float = 0.0
+    errors: dict[str, int] = field(default_factory=dict)
+    txids: list[str] = field(default_factory=list)
+
+    @property
+    def sent_per_second(self) -> float:
+        return self.sent / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["txids"]
+        data["sent_per_second"] = round(self.sent_per_second, 2)
+        return data
+
+
+def _wait_for_window(client: algod.AlgodClient, window: ValidityWindow) -> int:
+    current = client.status()['last-round']
+    if current >= window.last:
+        raise ValueError(f"Validity window {window.first}..{window.last} has passed (round {current})")
+    # Giao dịch chỉ vào được block first-valid trở đi
+    while current + 1 < window.first:
+        current = client.status_after_block(current)['last-round']
+    return current
+
+
+def send_signed(
+    client: algod.AlgodClient,
+    path: str,
+    rate: float,
+    concurrency: int = 8,
+    burst: int = 1,
+    wait: bool = False,
+) -> SendReport:
+    """Streams a presigned file to the node at `rate` transactions per second."""
+    header, records = read_signed(path)
+    window = ValidityWindow(**header["window"])
+    _wait_for_window(client, window)
+    limiter = RateLimiter(rate, burst)
+    report = SendReport()
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(concurrency)
+    confirmations: list[Future] = []
+    expired = threading.Event()
+
+    def send(record: SignedRecord) -> None:
+        kind = None
+        try:
+            if expired.is_set():
+                outcome = "expired"
+            else:
+                client.send_raw_transaction(base64.b64encode(record.blob))
+                outcome = "sent"
+        except Exception as e:
+            kind = error_kind(e)
+            # Cửa sổ hiệu lực đã qua: các giao dịch còn lại cũng hết hạn, không cần gửi tiếp
+            outcome = "expired" if kind == "txn_dead" else "rejected"
+            if outcome == "expired":
+                expired.set()
+        finally:
+            in_flight.release()
+        metrics.inc("nfticket_presigned_total", outcome=outcome, kind=record.kind)
+        with lock:
+            if kind is not None:
+                report.errors[kind] = report.errors.get(kind, 0) + 1
+            if outcome == "sent":
+                report.sent += 1
+                report.txids.append(record.txid)
+                if wait:
+                    confirmations.append(get_confirmation_waiter(client).watch(record.txid))
+            elif outcome == "rejected":
+                report.rejected += 1
+            else:
+                report.expired += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="presigned-send") as pool:
+        for record in records:
+            in_flight.acquire()
+            limiter.acquire()
+            pool.submit(send, record)
+    report.seconds = round(time.perf_counter() - started, 4)
+
+    for future in confirmations:
+        try:
+            future.result()
+            report.confirmed += 1
+        except Exception as e:
+            kind = error_kind(e)
+            report.errors[kind] = report.errors.get(kind, 0) + 1
+    return report
+
+
+def bench(count: int, workers: int | None = None, path: str | None = None) -> dict:
+    """Measures offline build+sign and file write throughput for `count` add_attendant calls."""
+    # Tạo khoá không tính vào thời gian đo
+    keys = [account.generate_account()[0] for _ in range(count)]
+    specs = [TxnSpec(key, 1) for key in keys]
+    window = ValidityWindow(1, 1 + MAX_VALIDITY, "bench-v1", base64.b64encode(bytes(32)).decode())
+
+    started = time.perf_counter()
+    records = list(sign_all(1, window, specs, workers))
+    sign_seconds = time.perf_counter() - started
+
+    path = path or f"presign-bench-{os.getpid()}.msgpack"
+    started = time.perf_counter()
+    write_signed(path, 1, window, records)
+    write_seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {
+        "count": count,
+        "workers": workers or os.cpu_count(),
+        "sign_seconds": round(sign_seconds, 4),
+        "signed_per_second": round(count / sign_seconds, 1) if sign_seconds else None,
+        "write_seconds": round(write_seconds, 4),
+        "bytes_per_txn": round(size / count, 1) if count else None,
+    }
+
+
+def _specs_from_csv(path: str, kind: str) -> list[TxnSpec]:
+    return [TxnSpec(p.private_key, p.event_id, kind) for p in read_purchases(path)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ký trước giao dịch NFTicket và gửi dần lên node")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sign_parser = sub.add_parser("sign", help="Dựng và ký giao dịch từ CSV (mnemonic,event_id)")
+    sign_parser.add_argument("purchases")
+    sign_parser.add_argument("--out", required=True)
+    sign_parser.add_argument("--app-id", type=int, default=APP_ID)
+    sign_parser.add_argument("--kind", choices=KINDS, default="add_attendant")
+    sign_parser.add_argument("--workers", type=int, help="Số tiến trình ký (mặc định: số lõi)")
+    sign_parser.add_argument("--window", type=int, default=MAX_VALIDITY, help="Số round hiệu lực")
+    sign_parser.add_argument("--delay", type=int, default=0, help="Bắt đầu cửa sổ sau N round (khi hỏi node)")
+    sign_parser.add_argument("--first-round", type=int, help="Round đầu của cửa sổ; cùng --genesis-* để ký offline")
+    sign_parser.add_argument("--genesis-id")
+    sign_parser.add_argument("--genesis-hash")
+    sign_parser.add_argument("--fee", type=int, default=MIN_FEE)
+
+    send_parser = sub.add_parser("send", help="Gửi file đã ký với tốc độ giới hạn")
+    send_parser.add_argument("path")
+    send_parser.add_argument("--rate", type=float, default=100.0, help="Giao dịch mỗi giây")
+    send_parser.add_argument("--burst", type=int, default=1)
+    send_parser.add_argument("--concurrency", type=int, default=8)
+    send_parser.add_argument("--wait", action="store_true", help="Chờ xác nhận cho mọi giao dịch đã gửi")
+
+    bench_parser = sub.add_parser("bench", help="Đo tốc độ dựng và ký offline")
+    bench_parser.add_argument("--count", type=int, default=10_000)
+    bench_parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    if args.command == "sign":
+        if args.first_round is not None:
+            if not (args.genesis_id and args.genesis_hash):
+                parser.error("--first-round cần --genesis-id và --genesis-hash")
+            window = ValidityWindow(
+                args.first_round, args.first_round + args.window, args.genesis_id, args.genesis_hash, args.fee
+            )
+        else:
+            window = ValidityWindow.from_node(get_algod_client(), args.window, args.delay)
+        specs = _specs_from_csv(args.purchases, args.kind)
+        started = time.perf_counter()
+        count = write_signed(args.out, args.app_id, window, sign_all(args.app_id, window, specs, args.workers))
+        seconds = time.perf_counter() - started
+        print(f"Đã ký {count} giao dịch (round {window.first}..{window.last}) vào {args.out} trong {seconds:.2f}s")
+    elif args.command == "send":
+        report = send_signed(get_algod_client(), args.path, args.rate, args.concurrency, args.burst, args.wait)
+        print(json.dumps(report.to_dict(), indent=2))
+        sys.exit(0 if report.rejected == 0 and report.expired == 0 else 1)
+    else:
+        print(json.dumps(bench(args.count, args.workers), indent=2))
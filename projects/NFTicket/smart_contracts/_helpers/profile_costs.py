@@ -0,0 +1,122 @@
+# profile_costs.py
+
+# Đo chi phí opcode của từng phương thức NFTicket, theo từng dòng TEAL và từng dòng PyTeal
+# (qua source map), và báo lỗi khi chi phí vượt ngân sách đã lưu trong cost_budget.json.
+
+# Source map của PyTeal phải được bật trước khi import pyteal
+from feature_gates import FeatureGates
+
+FeatureGates.set_sourcemap_enabled(True)
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import linecache  # noqa: E402
+import sys  # noqa: E402
+from collections import Counter  # noqa: E402
+from dataclasses import dataclass, field  # noqa: E402
+
+from pyteal import Compilation, Mode  # noqa: E402
+
+from smart_contracts._helpers.teal_eval import nfticket_method_results  # noqa: E402
+from smart_contracts.contract.contract import approval_program  # noqa: E402
+
+BUDGET_FILE = "cost_budget.json"
+TEAL_VERSION = 8
+
+
+@dataclass(frozen=True)
+class SourceLocation:
+    file: str
+    line: int
+
+
+@dataclass
+class MethodProfile:
+    name: str
+    cost: int
+    teal_lines: Counter = field(default_factory=Counter)
+    source_lines: Counter = field(default_factory=Counter)
+
+    def to_dict(self) -> dict:
+        return {
+            "cost": self.cost,
+            "teal_lines": dict(self.teal_lines.most_common()),
+            "source_lines": {f"{file}:{line}": hits for (file, line), hits in self.source_lines.most_common()},
+        }
+
+
+def compile_with_sourcemap() -> tuple[str, dict[int, SourceLocation]]:
+    """Compiles the approval program; returns the TEAL and a 1-based TEAL line -> source map."""
+    results = Compilation(approval_program(), Mode.Application, version=TEAL_VERSION).compile(with_sourcemap=True)
+    locations: dict[int, SourceLocation] = {}
+    for (teal_line, _), mapping in results.sourcemap.r3_sourcemap.entries.items():
+        # Dòng trong R3 source map đánh số từ 0
+        locations[teal_line + 1] = SourceLocation(mapping.source, mapping.source_line + 1)
+    return results.teal, locations
+
+
+def profile(teal: str, locations: dict[int, SourceLocation], event_id: int = 1) -> dict[str, MethodProfile]:
+    profiles = {}
+    for name, result in nfticket_method_results(teal, event_id).items():
+        method = MethodProfile(name, result.cost, Counter(result.line_hits))
+        for teal_line, hits in result.line_hits.items():
+            location = locations.get(teal_line)
+            if location is not None:
+                method.source_lines[(location.file, location.line)] += hits
+        profiles[name] = method
+    return profiles
+
+
+def check_budget(profiles: dict[str, MethodProfile], budget: dict[str, int], tolerance: float = 0.0) -> list[str]:
+    """Returns a message for every method whose cost exceeds its budget by more than `tolerance`."""
+    regressions = []
+    for name, limit in budget.items():
+        method = profiles.get(name)
+        if method is None:
+            regressions.append(f"{name}: no longer measured")
+        elif method.cost > limit * (1 + tolerance):
+            regressions.append(f"{name}: cost {method.cost} > budget {limit}")
+    return regressions
+
+
+def _print_report(profiles: dict[str, MethodProfile], teal: str, top: int, show_teal: bool) -> None:
+    teal_lines = teal.splitlines()
+    for method in profiles.values():
+        print(f"== {method.name}: {method.cost} opcodes")
+        for (file, line), hits in method.source_lines.most_common(top):
+            print(f"  {hits:4d}  {file}:{line}  {linecache.getline(file, line).strip()}")
+        if show_teal:
+            for teal_line, hits in sorted(method.teal_lines.items()):
+                print(f"  {hits:4d}  approval.teal:{teal_line}  {teal_lines[teal_line - 1].strip()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Đo chi phí opcode theo phương thức và theo dòng mã nguồn")
+    parser.add_argument("--event-id", type=int, default=1)
+    parser.add_argument("--top", type=int, default=8, help="Số dòng tốn kém nhất in ra cho mỗi phương thức")
+    parser.add_argument("--teal", action="store_true", help="In thêm số lần chạy của từng dòng TEAL")
+    parser.add_argument("--budget", default=BUDGET_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Tỉ lệ vượt ngân sách cho phép, ví dụ 0.05")
+    parser.add_argument("--check", action="store_true", help="Thoát với mã lỗi nếu chi phí vượt ngân sách")
+    parser.add_argument("--update-budget", action="store_true", help="Ghi chi phí hiện tại làm ngân sách mới")
+    parser.add_argument("--json", help="Ghi báo cáo JSON ra file")
+    args = parser.parse_args()
+
+    teal, locations = compile_with_sourcemap()
+    profiles = profile(teal, locations, args.event_id)
+    _print_report(profiles, teal, args.top, args.teal)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: method.to_dict() for name, method in profiles.items()}, f, indent=2)
+    if args.update_budget:
+        with open(args.budget, "w") as f:
+            json.dump({name: method.cost for name, method in profiles.items()}, f, indent=2)
+            f.write("\n")
+        print(f"Đã cập nhật {args.budget}")
+    if args.check:
+        with open(args.budget) as f:
+            regressions = check_budget(profiles, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"COST REGRESSION {message}")
+        sys.exit(1 if regressions else 0)
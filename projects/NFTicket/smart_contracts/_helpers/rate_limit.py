@@ -0,0 +1,53 @@
+# rate_limit.py
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class RateLimiter:
+    """Token bucket shared by the submitting threads.
+
+    `acquire()` blocks until the caller may send, so that sends average
+    `rate` per second with bursts of at most `burst`. Waiting callers reserve
+    their tokens up front, which keeps them in arrival order.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def set_rate(self, rate: float) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Takes `tokens`, sleeping as needed; returns the time waited in seconds."""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
@@ -0,0 +1,184 @@
+# registry.py
+
+# App registry tuỳ chọn, giữ bản sao trên chain của bảng định tuyến shard (xem sharding.py).
+# Box "shards" chứa app id của các shard theo thứ tự; mỗi sự kiện là một box tên Itob(id toàn cục)
+# chứa Itob(shard) + Itob(event_id trong app của shard). Tuyến đã ghi thì không đổi được nữa.
+
+import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import account, error
+from algosdk.logic import get_application_address
+from algosdk.transaction import ApplicationCreateTxn, ApplicationNoOpTxn, PaymentTxn, StateSchema, assign_group_id
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.confirmation import wait_for_confirmation
+from smart_contracts._helpers.deploy import APP_MIN_BALANCE
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.event_box import FIELD_SIZE, box_mbr
+from smart_contracts._helpers.instrumentation import span
+from smart_contracts._helpers.teal_cache import compile_teal
+
+logger = logging.getLogger(__name__)
+
+TEAL_VERSION = 8
+SHARDS_BOX = b"shards"
+ROUTE_VALUE_SIZE = 2 * FIELD_SIZE
+ROUTE_BOX_MBR = box_mbr(FIELD_SIZE, ROUTE_VALUE_SIZE)
+
+
+def approval_program():
+    # PyTeal chỉ cần khi dựng chương trình, không cần khi đọc registry
+    from pyteal import App, Approve, Assert, Bytes, Cond, Global, Int, Len, OnComplete, Pop, Seq, Txn
+
+    is_creator = Txn.sender() == Global.creator_address()
+
+    handle_shards = Seq([
+        Assert(Txn.application_args.length() == Int(2)),
+        # Danh sách shard có thể dài thêm, nên box được tạo lại với kích thước mới
+        Pop(App.box_delete(Bytes(SHARDS_BOX))),
+        App.box_put(Bytes(SHARDS_BOX), Txn.application_args[1]),
+        Approve(),
+    ])
+
+    handle_route = Seq([
+        Assert(Txn.application_args.length() == Int(3)),
+        Assert(Len(Txn.application_args[1]) == Int(FIELD_SIZE)),
+        Assert(Len(Txn.application_args[2]) == Int(ROUTE_VALUE_SIZE)),
+        # box_create trả về 0 nếu box đã có, nên một tuyến chỉ ghi được một lần
+        Assert(App.box_create(Txn.application_args[1], Int(ROUTE_VALUE_SIZE))),
+        App.box_replace(Txn.application_args[1], Int(0), Txn.application_args[2]),
+        Approve(),
+    ])
+
+    return Cond(
+        [Txn.application_id() == Int(0), Approve()],
+        [Txn.on_completion() == OnComplete.NoOp, Seq([
+            Assert(is_creator),
+            Cond(
+                [Txn.application_args[0] == Bytes("shards"), handle_shards],
+                [Txn.application_args[0] == Bytes("route"), handle_route],
+            ),
+        ])],
+    )
+
+
+def approval_teal() -> str:
+    from pyteal import Mode, compileTeal
+
+    return compileTeal(approval_program(), mode=Mode.Application, version=TEAL_VERSION)
+
+
+def clear_teal() -> str:
+    return f"#pragma version {TEAL_VERSION}\nint 1\nreturn\n"
+
+
+def encode_route(shard: int, event_id: int) -> bytes:
+    return shard.to_bytes(FIELD_SIZE, 'big') + event_id.to_bytes(FIELD_SIZE, 'big')
+
+
+def decode_route(value: bytes) -> tuple[int, int]:
+    return int.from_bytes(value[:FIELD_SIZE], 'big'), int.from_bytes(value[FIELD_SIZE:], 'big')
+
+
+def encode_shards(app_ids: list[int]) -> bytes:
+    return b"".join(app_id.to_bytes(FIELD_SIZE, 'big') for app_id in app_ids)
+
+
+def decode_shards(value: bytes) -> list[int]:
+    return [int.from_bytes(value[i:i + FIELD_SIZE], 'big') for i in range(0, len(value), FIELD_SIZE)]
+
+
+def deploy_registry(client=None, private_key=None, offline_compile=False) -> int:
+    """Creates and funds the registry app; returns its app id."""
+    with span("deploy_registry") as operation:
+        client = client or get_algod_client()
+        private_key = private_key or get_private_key()
+        sender_address = account.address_from_private_key(private_key)
+
+        with span("compile"):
+            approval = compile_teal(approval_teal(), client, offline=offline_compile).bytecode
+            clear = compile_teal(clear_teal(), client, offline=offline_compile).bytecode
+
+        txn = ApplicationCreateTxn(
+            sender=sender_address,
+            sp=client.suggested_params(),
+            on_complete=0,
+            approval_program=approval,
+            clear_program=clear,
+            global_schema=StateSchema(num_uints=0, num_byte_slices=0),
+            local_schema=StateSchema(num_uints=0, num_byte_slices=0),
+        )
+        txid = client.send_transaction(txn.sign(private_key))
+        app_id = wait_for_confirmation(client, txid, 10)['application-index']
+        operation.set(app_id=app_id)
+
+        fund_txn = PaymentTxn(sender_address, client.suggested_params(), get_application_address(app_id), APP_MIN_BALANCE)
+        wait_for_confirmation(client, client.send_transaction(fund_txn.sign(private_key)), 10)
+        logger.info(f"Registry được triển khai với Application ID: {app_id}")
+        return app_id
+
+
+def _send_funded_call(client, private_key, registry_app_id, app_args, box_name, funding) -> int:
+    sender_address = account.address_from_private_key(private_key)
+    params = client.suggested_params()
+    call_txn = ApplicationNoOpTxn(sender_address, params, registry_app_id, app_args, boxes=[(0, box_name)])
+    if not funding:
+        txid = client.send_transaction(call_txn.sign(private_key))
+        return wait_for_confirmation(client, txid, 10)['confirmed-round']
+    # Nạp số dư tối thiểu cho box mới cùng nhóm với lời gọi ghi box
+    pay_txn = PaymentTxn(sender_address, params, get_application_address(registry_app_id), funding)
+    assign_group_id([pay_txn, call_txn])
+    txid = client.send_transactions([pay_txn.sign(private_key), call_txn.sign(private_key)])
+    return wait_for_confirmation(client, txid, 10)['confirmed-round']
+
+
+def _box_size(client, registry_app_id: int, box_name: bytes) -> int | None:
+    try:
+        return len(base64.b64decode(client.application_box_by_name(registry_app_id, box_name)['value']))
+    except error.AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+
+def publish_shards(registry_app_id: int, app_ids: list[int], client=None, private_key=None) -> int:
+    """Writes the shard list; returns the confirmed round."""
+    with span("registry_shards", registry_app_id=registry_app_id, shards=len(app_ids)):
+        client = client or get_algod_client()
+        value = encode_shards(app_ids)
+        # Box cũ bị xoá trong cùng lời gọi và trả lại số dư tối thiểu của nó, nên chỉ cần nạp phần chênh lệch
+        old_size = _box_size(client, registry_app_id, SHARDS_BOX)
+        funding = box_mbr(len(SHARDS_BOX), len(value))
+        if old_size is not None:
+            funding = max(0, funding - box_mbr(len(SHARDS_BOX), old_size))
+        return _send_funded_call(
+            client, private_key or get_private_key(), registry_app_id,
+            [b"shards", value], SHARDS_BOX, funding,
+        )
+
+
+def publish_route(registry_app_id: int, global_id: int, shard: int, event_id: int, client=None, private_key=None) -> int:
+    """Records one event's shard; returns the confirmed round."""
+    with span("registry_route", registry_app_id=registry_app_id, event_id=global_id):
+        name = global_id.to_bytes(FIELD_SIZE, 'big')
+        return _send_funded_call(
+            client or get_algod_client(), private_key or get_private_key(), registry_app_id,
+            [b"route", name, encode_route(shard, event_id)], name, ROUTE_BOX_MBR,
+        )
+
+
+def read_registry(registry_app_id: int, client=None, max_workers: int = 8) -> tuple[list[int], dict[int, tuple[int, int]]]:
+    """Returns the shard app ids and global id -> (shard, event_id) from the registry."""
+    client = client or get_algod_client()
+    names = [base64.b64decode(box['name']) for box in client.application_boxes(registry_app_id)['boxes']]
+
+    def read_box(name: bytes) -> bytes:
+        return base64.b64decode(client.application_box_by_name(registry_app_id, name)['value'])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        values = dict(zip(names, pool.map(read_box, names)))
+    shards = decode_shards(values.pop(SHARDS_BOX, b""))
+    routes = {int.from_bytes(name, 'big'): decode_route(value) for name, value in values.items()}
+    return shards, routes
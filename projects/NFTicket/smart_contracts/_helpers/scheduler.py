@@ -0,0 +1,355 @@
+# scheduler.py
+
+# Hàng đợi gửi giao dịch NFTicket: giới hạn tốc độ, phân loại lỗi của pool,
+# thử lại lỗi tạm thời với backoff và tăng phí khi mạng nghẽn.
+
+import heapq
+import http.client
+import itertools
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from algosdk import constants, error
+from algosdk.transaction import SignedTransaction, Transaction, assign_group_id
+from algosdk.v2client import algod
+
+from smart_contracts._helpers.confirmation import get_confirmation_waiter
+from smart_contracts._helpers.instrumentation import error_kind, metrics
+from smart_contracts._helpers.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Cách xử lý một lỗi khi gửi
+DUPLICATE = "duplicate"  # Giao dịch đã có trong pool/ledger: chỉ cần chờ xác nhận
+OVERSPEND = "overspend"
+FEE = "fee"  # Phí thấp hơn ngưỡng của pool: tăng phí rồi gửi lại
+LOGIC_EVAL = "logic_eval"
+EXPIRED = "expired"  # Ngoài cửa sổ hiệu lực: dựng lại với round mới nếu còn khoá
+TRANSIENT = "transient"  # Pool đầy, lỗi mạng, lỗi 5xx: thử lại sau
+FATAL = "fatal"
+
+_KIND_TO_CLASS = {
+    "already_in_ledger": DUPLICATE,
+    "already_in_pool": DUPLICATE,
+    "overspend": OVERSPEND,
+    "fee_too_small": FEE,
+    "logic_eval": LOGIC_EVAL,
+    "txn_dead": EXPIRED,
+    "pool_full": TRANSIENT,
+}
+
+
+def classify(exc: BaseException) -> str:
+    """Maps a submission error to how the scheduler handles it."""
+    if isinstance(exc, error.AlgodHTTPError):
+        kind = error_kind(exc)
+        if kind in _KIND_TO_CLASS:
+            return _KIND_TO_CLASS[kind]
+        return TRANSIENT if exc.code is None or exc.code == 429 or exc.code >= 500 else FATAL
+    if isinstance(exc, (OSError, http.client.HTTPException, error.AlgodResponseError)):
+        return TRANSIENT
+    return FATAL
+
+
+class SubmissionError(Exception):
+    """A submission that failed for good; `reason` is one of the classify() results."""
+
+    def __init__(self, reason: str, cause: BaseException, attempts: int):
+        super().__init__(f"{reason} after {attempts} attempt(s): {cause}")
+        self.reason = reason
+        self.cause = cause
+        self.attempts = attempts
+
+
+@dataclass
+class _Item:
+    txns: list[Transaction]
+    keys: list[str] | None  # None: giao dịch đã ký sẵn, không thể tăng phí hay dựng lại
+    signed: list[SignedTransaction] | None
+    future: Future = field(default_factory=Future)
+    attempts: int = 0
+    base_fees: list[int] | None = None
+    fee_multiplier: float = 1.0  # Hệ số phí của lần ký hiện tại
+
+
+@dataclass
+class SchedulerStats:
+    submitted: int = 0
+    confirmed: int = 0
+    failed: int = 0
+    retries: int = 0
+    fee_bumps: int = 0
+    rate: float = 0.0
+    errors: dict[str, int] = field(default_factory=dict)
+
+
+class SubmissionScheduler:
+    """Queue of NFTicket transactions sent at a controlled, adaptive rate.
+
+    `submit()` returns a future resolved with the pending-transaction info
+    once the (first) transaction is confirmed, or failed with
+    `SubmissionError`. A dispatcher thread takes items as they become
+    ready, paces them through a `RateLimiter` and sends them from a small
+    thread pool.
+
+    The rate follows AIMD: each accepted submission adds `rate_step` up
+    to `max_rate`, while a full pool halves it (down to `min_rate`) and the
+    item is retried with exponential backoff. Items submitted with their
+    keys can also be re-signed: a fee below the pool threshold raises
+    their fee by `fee_factor` (up to `max_fee`), and future submissions
+    start from the escalated fee until the pool accepts cheaper ones again.
+    Items that expired are rebuilt with fresh validity rounds.
+    """
+
+    def __init__(
+        self,
+        client: algod.AlgodClient,
+        rate: float = 100.0,
+        max_rate: float | None = None,
+        min_rate: float = 1.0,
+        rate_step: float = 1.0,
+        concurrency: int = 8,
+        max_attempts: int = 6,
+        backoff: float = 0.25,
+        max_backoff: float = 8.0,
+        fee_factor: float = 2.0,
+        max_fee: int = 100_000,
+        wait_rounds: int = 10,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.client = client
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate
+        self.rate_step = rate_step
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.fee_factor = fee_factor
+        self.max_fee = max_fee
+        self.wait_rounds = wait_rounds
+        self.limiter = RateLimiter(rate, sleep=sleep)
+        self.stats = SchedulerStats(rate=rate)
+        self._fee_multiplier = 1.0
+        self._ready: list[tuple[float, int, _Item]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._outstanding = 0
+        self._closed = False
+        self._workers = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scheduler-send")
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._dispatcher = threading.Thread(target=self._run, name="scheduler-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    # --- API ---
+
+    def submit(self, txns: Transaction | list[Transaction], keys: str | list[str]) -> Future:
+        """Queues unsigned transactions (one group) with the keys that sign them."""
+        txns = txns if isinstance(txns, list) else [txns]
+        keys = keys if isinstance(keys, list) else [keys] * len(txns)
+        if len(keys) != len(txns):
+            raise ValueError("Need one key per transaction")
+        return self._enqueue(_Item(txns, keys, None))
+
+    def submit_signed(self, signed: SignedTransaction | list[SignedTransaction]) -> Future:
+        """Queues presigned transactions; they are retried but never re-signed."""
+        signed = signed if isinstance(signed, list) else [signed]
+        return self._enqueue(_Item([s.transaction for s in signed], None, signed))
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Waits until every submitted item is confirmed or failed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._outstanding:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            pending, self._ready = self._ready, []
+            self._cond.notify_all()
+        for _, _, item in pending:
+            item.future.cancel()
+        self._dispatcher.join()
+        self._workers.shutdown(wait=True)
+
+    def __enter__(self) -> "SubmissionScheduler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- Hàng đợi ---
+
+    def _enqueue(self, item: _Item, delay: float = 0.0) -> Future:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SubmissionScheduler is closed")
+            if item.attempts == 0:
+                self._outstanding += 1
+                item.future.add_done_callback(self._item_done)
+            heapq.heappush(self._ready, (time.monotonic() + delay, next(self._seq), item))
+            self._cond.notify_all()
+        return item.future
+
+    def _item_done(self, future: Future) -> None:
+        with self._cond:
+            self._outstanding -= 1
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._ready:
+                        wait = self._ready[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                _, _, item = heapq.heappop(self._ready)
+            self._slots.acquire()
+            self.limiter.acquire()
+            self._workers.submit(self._send, item)
+
+    # --- Gửi và xử lý lỗi ---
+
+    def _sign(self, item: _Item) -> list[SignedTransaction]:
+        if item.keys is None:
+            return item.signed
+        multiplier = max(item.fee_multiplier, self._fee_multiplier)
+        if item.signed is None or multiplier != item.fee_multiplier:
+            if item.base_fees is None:
+                item.base_fees = [max(txn.fee, constants.MIN_TXN_FEE) for txn in item.txns]
+            for txn, base in zip(item.txns, item.base_fees):
+                txn.fee = min(self.max_fee, int(base * multiplier))
+            if len(item.txns) > 1:
+                # Phí là một phần của nội dung giao dịch, nên group id phải tính lại
+                for txn in item.txns:
+                    txn.group = None
+                assign_group_id(item.txns)
+            item.signed = [txn.sign(key) for txn, key in zip(item.txns, item.keys)]
+            item.fee_multiplier = multiplier
+        return item.signed
+
+    def _send(self, item: _Item) -> None:
+        try:
+            item.attempts += 1
+            signed = self._sign(item)
+            txid = self.client.send_transactions(signed)
+        except Exception as e:
+            self._handle_error(item, e)
+        else:
+            self._accepted()
+            self._watch(item, txid)
+        finally:
+            self._slots.release()
+
+    def _watch(self, item: _Item, txid: str) -> None:
+        with self._cond:
+            self.stats.submitted += 1
+        metrics.inc("nfticket_scheduler_submissions_total", outcome="accepted")
+        confirmation = get_confirmation_waiter(self.client).watch(txid, self.wait_rounds)
+        confirmation.add_done_callback(lambda f: self._confirmed(item, f))
+
+    def _confirmed(self, item: _Item, confirmation: Future) -> None:
+        if confirmation.cancelled():
+            item.future.cancel()
+            return
+        exc = confirmation.exception()
+        if exc is None:
+            with self._cond:
+                self.stats.confirmed += 1
+            metrics.inc("nfticket_scheduler_submissions_total", outcome="confirmed")
+            item.future.set_result(confirmation.result())
+        else:
+            self._fail(item, classify(exc), exc)
+
+    def _handle_error(self, item: _Item, exc: BaseException) -> None:
+        reason = classify(exc)
+        with self._cond:
+            self.stats.errors[reason] = self.stats.errors.get(reason, 0) + 1
+        metrics.inc("nfticket_scheduler_errors_total", reason=reason)
+
+        if reason == DUPLICATE:
+            # Lần gửi trước đã vào pool (ví dụ sau timeout mạng): chờ xác nhận như bình thường
+            self._watch(item, item.signed[0].get_txid())
+            return
+        if item.attempts >= self.max_attempts:
+            self._fail(item, reason, exc)
+            return
+        if reason == FEE and item.keys is not None and self._escalate_fee(item):
+            self._retry(item, reason, 0.0)
+        elif reason == EXPIRED and item.keys is not None:
+            self._refresh_rounds(item)
+            self._retry(item, reason, 0.0)
+        elif reason == TRANSIENT:
+            if error_kind(exc) == "pool_full":
+                self._slow_down()
+            delay = min(self.max_backoff, self.backoff * 2 ** (item.attempts - 1))
+            self._retry(item, reason, delay * random.uniform(0.5, 1.0))
+        else:
+            self._fail(item, reason, exc)
+
+    def _retry(self, item: _Item, reason: str, delay: float) -> None:
+        with self._cond:
+            self.stats.retries += 1
+        metrics.inc("nfticket_scheduler_retries_total", reason=reason)
+        logger.debug(f"Retrying {item.txns[0].get_txid()} ({reason}) in {delay:.2f}s")
+        try:
+            self._enqueue(item, delay)
+        except RuntimeError as e:
+            item.future.set_exception(e)
+
+    def _fail(self, item: _Item, reason: str, exc: BaseException) -> None:
+        with self._cond:
+            self.stats.failed += 1
+        metrics.inc("nfticket_scheduler_submissions_total", outcome=reason)
+        item.future.set_exception(SubmissionError(reason, exc, item.attempts))
+
+    def _escalate_fee(self, item: _Item) -> bool:
+        """Raises the item's fee and the shared floor; False once max_fee is reached."""
+        with self._cond:
+            bumped = min(item.fee_multiplier * self.fee_factor, self.max_fee / constants.MIN_TXN_FEE)
+            if bumped <= item.fee_multiplier:
+                return False
+            # Các giao dịch gửi sau bắt đầu luôn từ mức phí mới, khỏi bị từ chối thêm một lần
+            self._fee_multiplier = max(self._fee_multiplier, bumped)
+            self.stats.fee_bumps += 1
+        item.fee_multiplier = bumped
+        item.signed = None
+        metrics.inc("nfticket_scheduler_fee_bumps_total")
+        return True
+
+    def _refresh_rounds(self, item: _Item) -> None:
+        params = self.client.suggested_params()
+        for txn in item.txns:
+            txn.first_valid_round = params.first
+            txn.last_valid_round = params.last
+        item.signed = None
+
+    def _accepted(self) -> None:
+        with self._cond:
+            rate = min(self.max_rate, self.limiter.rate + self.rate_step)
+            if rate != self.limiter.rate:
+                self.limiter.set_rate(rate)
+            self.stats.rate = rate
+            # Pool nhận giao dịch: hạ dần mức tăng phí chung về 1
+            self._fee_multiplier = max(1.0, self._fee_multiplier * 0.99)
+
+    def _slow_down(self) -> None:
+        with self._cond:
+            rate = max(self.min_rate, self.limiter.rate / 2)
+            self.limiter.set_rate(rate)
+            self.stats.rate = rate
@@ -0,0 +1,260 @@
+# sharding.py
+
+# Chia sự kiện ra nhiều app NFTicket để lượt mua vé của các sự kiện khác nhau không tranh nhau một app.
+# Mỗi sự kiện có một id toàn cục; bảng định tuyến (file JSON, tuỳ chọn thêm app registry) ghi
+# shard và event_id trong app của shard. Shard của sự kiện mới được xác định chỉ từ id toàn cục.
+
+import argparse
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, replace
+
+from smart_contracts._helpers import registry
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_state import Event, get_state_reader
+from smart_contracts._helpers.create_event import call_create_event
+from smart_contracts._helpers.deploy import deploy_contract
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.instrumentation import configure, span
+from smart_contracts._helpers.manage_attendants import register_attendant
+from smart_contracts._helpers.stop_event import call_stop_event
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "nfticket-routing"
+FORMAT_VERSION = 1
+
+
+class RoutingError(Exception):
+    """The routing table has no shard for the requested event."""
+
+
+def shard_index(global_id: int, shard_count: int) -> int:
+    """The shard of a new event; consecutive global ids rotate through the shards."""
+    return (global_id - 1) % shard_count
+
+
+@dataclass(frozen=True)
+class EventRoute:
+    shard: int
+    app_id: int
+    event_id: int  # event_id trong app của shard
+
+
+@dataclass
+class RoutingTable:
+    shards: list[int]  # shard -> app id; chỉ được nối thêm, không đổi thứ tự
+    events: dict[int, tuple[int, int]] = field(default_factory=dict)  # id toàn cục -> (shard, event_id)
+    next_event_id: int = 1
+    registry_app_id: int | None = None
+
+    def route(self, global_id: int) -> EventRoute:
+        try:
+            shard, event_id = self.events[global_id]
+        except KeyError:
+            raise RoutingError(f"Event {global_id} is not in the routing table") from None
+        return EventRoute(shard, self.shards[shard], event_id)
+
+    def allocate(self) -> tuple[int, int]:
+        """Reserves the next global id; returns it with its shard."""
+        if not self.shards:
+            raise RoutingError("The routing table has no shards")
+        global_id = self.next_event_id
+        self.next_event_id += 1
+        return global_id, shard_index(global_id, len(self.shards))
+
+    def to_dict(self) -> dict:
+        return {
+            "format": FORMAT,
+            "version": FORMAT_VERSION,
+            "shards": self.shards,
+            "registry_app_id": self.registry_app_id,
+            "next_event_id": self.next_event_id,
+            "events": {str(global_id): list(route) for global_id, route in sorted(self.events.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RoutingTable":
+        if data.get("format") != FORMAT or data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Not a {FORMAT} v{FORMAT_VERSION} routing table")
+        return cls(
+            shards=list(data["shards"]),
+            events={int(global_id): tuple(route) for global_id, route in data["events"].items()},
+            next_event_id=data["next_event_id"],
+            registry_app_id=data.get("registry_app_id"),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RoutingTable":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_registry(cls, registry_app_id: int, client=None) -> "RoutingTable":
+        """Rebuilds the table from the registry app, e.g. when the JSON file is lost."""
+        shards, events = registry.read_registry(registry_app_id, client)
+        return cls(shards, events, max(events, default=0) + 1, registry_app_id)
+
+
+class ShardRouter:
+    """Routes NFTicket calls by global event id to the app of the event's shard.
+
+    The table is saved to `path` after every change, so only one router
+    should write a given table. The router's lock only covers id
+    allocation and table updates: create calls, ticket sales and stops go
+    straight to the shard's app and run in parallel, within and across
+    shards.
+    """
+
+    def __init__(self, table: RoutingTable, path: str | None = None, client=None, private_key=None):
+        self.table = table
+        self.path = path
+        self._client = client
+        self._private_key = private_key
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        return self._client or get_algod_client()
+
+    @property
+    def private_key(self) -> str:
+        return self._private_key or get_private_key()
+
+    def add_shards(self, app_ids: list[int]) -> None:
+        """Appends shards; events already routed keep their shard."""
+        with self._lock:
+            self.table.shards.extend(app_ids)
+            self._save()
+            if self.table.registry_app_id:
+                registry.publish_shards(self.table.registry_app_id, self.table.shards, self.client, self.private_key)
+
+    def create_event(self, nft_id: int, end_timestamp: int, ticket_count: int) -> int | None:
+        """Creates the event on its shard; returns its global id, or None when the call failed."""
+        with span("sharded_create_event") as operation:
+            with self._lock:
+                global_id, shard = self.table.allocate()
+                app_id = self.table.shards[shard]
+                # Id toàn cục đã cấp thì không cấp lại kể cả khi lời gọi lỗi,
+                # để shard của các id sau không phụ thuộc lỗi này
+                self._save()
+            operation.set(event_id=global_id, shard=shard, app_id=app_id)
+            # call_create_event tự chọn event_id của shard dưới khoá riêng, nên các lời gọi tới cùng shard không trùng box
+            event_id = call_create_event(app_id, nft_id, end_timestamp, ticket_count, self.client, self.private_key)
+            if event_id is None:
+                return None
+            with self._lock:
+                self.table.events[global_id] = (shard, event_id)
+                self._save()
+            if self.table.registry_app_id:
+                registry.publish_route(self.table.registry_app_id, global_id, shard, event_id, self.client, self.private_key)
+            return global_id
+
+    def add_attendant(self, global_id: int, private_key: str | None = None) -> int | None:
+        """Buys a ticket with `private_key` (default: PRIVATE_KEY); returns the confirmed round."""
+        route = self.table.route(global_id)
+        return register_attendant(route.app_id, route.event_id, self.client, private_key or self.private_key)
+
+    def stop_event(self, global_id: int) -> int | None:
+        route = self.table.route(global_id)
+        return call_stop_event(route.app_id, route.event_id, self.client, self.private_key)
+
+    def event(self, global_id: int) -> Event | None:
+        route = self.table.route(global_id)
+        event = get_state_reader(self.client).event(route.app_id, route.event_id)
+        return None if event is None else replace(event, event_id=global_id)
+
+    def events(self) -> dict[int, Event]:
+        """Reads every routed event, querying all shards in parallel at one round."""
+        with span("sharded_read", shards=len(self.table.shards)):
+            snapshots = get_state_reader(self.client).read_many(list(dict.fromkeys(self.table.shards)))
+        with self._lock:
+            routes = dict(self.table.events)
+        events = {}
+        for global_id, (shard, event_id) in routes.items():
+            event = snapshots[self.table.shards[shard]].events.get(event_id)
+            if event is not None:
+                events[global_id] = replace(event, event_id=global_id)
+        return events
+
+    def summary(self) -> dict:
+        """Event, ticket and sales totals, overall and per shard."""
+        per_shard = [{"app_id": app_id, "events": 0, "capacity": 0, "issued": 0} for app_id in self.table.shards]
+        for global_id, event in self.events().items():
+            totals = per_shard[self.table.events[global_id][0]]
+            totals["events"] += 1
+            totals["capacity"] += event.capacity
+            totals["issued"] += event.issued
+        overall = {key: sum(totals[key] for totals in per_shard) for key in ("events", "capacity", "issued")}
+        return {**overall, "shards": per_shard}
+
+    def _save(self) -> None:
+        if self.path:
+            self.table.save(self.path)
+
+
+def deploy_shards(count: int, client=None, private_key=None, offline_compile: bool = False) -> list[int]:
+    """Deploys `count` NFTicket apps; returns their app ids in shard order."""
+    app_ids = []
+    for _ in range(count):
+        with span("deploy_shard", shard=len(app_ids)):
+            app_ids.append(deploy_contract(client, private_key, offline_compile))
+    return app_ids
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
+    parser = argparse.ArgumentParser(description="Định tuyến sự kiện NFTicket qua nhiều app (shard)")
+    parser.add_argument("--table", default="routing.json", help="File bảng định tuyến")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    deploy_parser = sub.add_parser("deploy", help="Triển khai thêm shard và ghi vào bảng định tuyến")
+    deploy_parser.add_argument("--shards", type=int, required=True)
+    deploy_parser.add_argument("--registry", action="store_true", help="Triển khai cả app registry khi tạo bảng mới")
+    deploy_parser.add_argument("--offline-compile", action="store_true")
+
+    create_parser = sub.add_parser("create", help="Tạo sự kiện trên shard của nó")
+    create_parser.add_argument("--nft-id", type=int, required=True)
+    create_parser.add_argument("--end", type=int, required=True)
+    create_parser.add_argument("--tickets", type=int, required=True)
+
+    for name, help_text in (("add", "Mua một vé cho sự kiện"), ("stop", "Dừng sự kiện")):
+        event_parser = sub.add_parser(name, help=help_text)
+        event_parser.add_argument("event_id", type=int, help="Id toàn cục của sự kiện")
+
+    restore_parser = sub.add_parser("restore", help="Dựng lại bảng định tuyến từ app registry")
+    restore_parser.add_argument("registry_app_id", type=int)
+
+    sub.add_parser("summary", help="Tổng hợp sự kiện và vé trên mọi shard")
+    args = parser.parse_args()
+
+    if args.command == "restore":
+        RoutingTable.from_registry(args.registry_app_id).save(args.table)
+        raise SystemExit(0)
+
+    if os.path.exists(args.table):
+        router = ShardRouter(RoutingTable.load(args.table), args.table)
+    else:
+        router = ShardRouter(RoutingTable([]), args.table)
+    if args.command == "deploy":
+        if args.registry and not router.table.registry_app_id and not router.table.shards:
+            router.table.registry_app_id = registry.deploy_registry(offline_compile=args.offline_compile)
+        router.add_shards(deploy_shards(args.shards, offline_compile=args.offline_compile))
+        logger.info(f"Shards: {router.table.shards}")
+    elif args.command == "create":
+        logger.info(f"Sự kiện toàn cục: {router.create_event(args.nft_id, args.end, args.tickets)}")
+    elif args.command == "add":
+        router.add_attendant(args.event_id)
+    elif args.command == "stop":
+        router.stop_event(args.event_id)
+    else:
+        print(json.dumps(router.summary(), indent=2))
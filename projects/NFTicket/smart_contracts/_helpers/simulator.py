@@ -0,0 +1,318 @@
+# simulator.py
+
+# Mô hình Python thuần của hợp đồng NFTicket (approval.teal), chạy trong bộ nhớ.
+# Nhận đúng các argument mà helper gửi (app_args.py) để mô phỏng hàng triệu lượt mua vé.
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from smart_contracts._helpers.app_args import (
+    add_attendant_args,
+    create_event_args,
+    stop_event_args,
+)
+from smart_contracts._helpers.event_box import (
+    EVENT_FIELD_OFFSETS,
+    encode_event_record,
+    event_box_name,
+)
+from smart_contracts._helpers.teal_eval import NAMED_INTS, AppCall, AppState, Program, evaluate
+
+NOOP = NAMED_INTS["NoOp"]
+OPT_IN = NAMED_INTS["OptIn"]
+CLOSE_OUT = NAMED_INTS["CloseOut"]
+UPDATE = NAMED_INTS["UpdateApplication"]
+DELETE = NAMED_INTS["DeleteApplication"]
+
+_NFT_ID, _END, _STOPPED, _TICKET_COUNT, _TICKET_ISSUED = range(5)
+assert EVENT_FIELD_OFFSETS["ticket_issued"] == _TICKET_ISSUED * 8
+
+
+class SimulationReject(Exception):
+    """The modelled program would reject (or panic on) the call."""
+
+
+@dataclass
+class SimResult:
+    approved: bool
+    error: str | None = None
+    failed_call: int | None = None  # Vị trí của lời gọi làm cả nhóm bị từ chối
+
+
+@dataclass
+class NFTicketSimulator:
+    """In-memory NFTicket app: event records and attendant boxes.
+
+    `call()` follows the same dispatch and checks as `approval_program()`,
+    so its results can be compared with the compiled TEAL one call at a
+    time.
+    """
+
+    creator: bytes
+    created: bool = False
+    event_count: int = 0
+    # event_id -> [nft_id, end, stopped, ticket_count, ticket_issued]
+    events: dict[int, list[int]] = field(default_factory=dict)
+    # (event_id, address) -> số thứ tự vé
+    attendants: dict[tuple[int, bytes], int] = field(default_factory=dict)
+    # Các thao tác hoàn tác khi đang chạy một atomic group
+    _undo: list[Callable[[], None]] | None = field(default=None, repr=False)
+
+    def call(self, sender: bytes, app_args: list[bytes], on_completion: int = NOOP, latest_timestamp: int = 0) -> SimResult:
+        try:
+            approved = self._dispatch(sender, app_args, on_completion, latest_timestamp)
+        except SimulationReject as e:
+            return SimResult(False, str(e))
+        return SimResult(approved)
+
+    def call_group(self, calls: list[tuple[bytes, list[bytes], int, int]]) -> list[SimResult]:
+        """Runs (sender, args, on_completion, timestamp) calls as one atomic group.
+
+        If any call is rejected, the changes made by the earlier calls are
+        rolled back and every result in the group is marked as rejected,
+        with `failed_call` set to the position of the first rejected call.
+        """
+        self._undo = []
+        try:
+            results = [self.call(*call) for call in calls]
+            failed_call = next((i for i, r in enumerate(results) if not r.approved), None)
+            if failed_call is not None:
+                for undo in reversed(self._undo):
+                    undo()
+                return [SimResult(False, results[failed_call].error, failed_call) for _ in results]
+            return results
+        finally:
+            self._undo = None
+
+    def create(self) -> SimResult:
+        self.created = True
+        self.event_count = 0
+        return SimResult(True)
+
+    def _dispatch(self, sender: bytes, args: list[bytes], on_completion: int, latest_timestamp: int) -> bool:
+        if not self.created:
+            return self.create().approved
+        if on_completion == NOOP:
+            method = _arg(args, 0)
+            if method == b"add_attendant":
+                return self._add_attendant(sender, args)
+            if method == b"create_event":
+                return self._create_event(sender, args)
+            if method == b"stop_event":
+                return self._stop_event(sender, args, latest_timestamp)
+            raise SimulationReject("unknown method")
+        if on_completion in (OPT_IN, CLOSE_OUT):
+            return True
+        raise SimulationReject("on_completion not allowed")
+
+    def _create_event(self, sender: bytes, args: list[bytes]) -> bool:
+        _require(len(args) == 4, "create_event takes 3 arguments")
+        _require(sender == self.creator, "only the creator can create events")
+        nft_id, end, ticket_count = _btoi(args[1]), _btoi(args[2]), _btoi(args[3])
+        self.event_count += 1
+        event_id = self.event_count
+        self.events[event_id] = [nft_id, end, 0, ticket_count, 0]
+        if self._undo is not None:
+            self._undo.append(lambda: self._drop_event(event_id))
+        return True
+
+    def _drop_event(self, event_id: int) -> None:
+        del self.events[event_id]
+        self.event_count = event_id - 1
+
+    def _stop_event(self, sender: bytes, args: list[bytes], latest_timestamp: int) -> bool:
+        _require(len(args) == 2, "stop_event takes 1 argument")
+        _require(sender == self.creator, "only the creator can stop events")
+        event_id = _btoi(args[1])
+        if event_id > self.event_count:
+            raise SimulationReject("assert failed: event does not exist")
+        record = self.events.get(event_id)
+        if record is None:
+            raise SimulationReject("no such box")
+        if latest_timestamp < record[_END]:
+            raise SimulationReject("assert failed: event has not ended")
+        if self._undo is not None:
+            self._undo.append(lambda stopped=record[_STOPPED]: record.__setitem__(_STOPPED, stopped))
+        record[_STOPPED] = 1
+        return True
+
+    def _add_attendant(self, sender: bytes, args: list[bytes]) -> bool:
+        event_id = _btoi(_arg(args, 1))
+        record = self.events.get(event_id)
+        if record is None:
+            raise SimulationReject("no such box")
+        _require(record[_TICKET_ISSUED] < record[_TICKET_COUNT], "event is sold out")
+        _require(len(args) == 2, "add_attendant takes 1 argument")
+        key = (event_id, sender)
+        if key in self.attendants:
+            raise SimulationReject("assert failed: attendant already registered")
+        ticket_number = record[_TICKET_ISSUED] + 1
+        self.attendants[key] = ticket_number
+        record[_TICKET_ISSUED] = ticket_number
+        if self._undo is not None:
+            self._undo.append(lambda: self._drop_attendant(key, record))
+        return True
+
+    def _drop_attendant(self, key: tuple[int, bytes], record: list[int]) -> None:
+        del self.attendants[key]
+        record[_TICKET_ISSUED] -= 1
+
+    def check_invariants(self) -> list[str]:
+        """Returns a description of every violated ticket-counter invariant."""
+        issued_per_event: dict[int, int] = {}
+        for (event_id, _), _ in self.attendants.items():
+            issued_per_event[event_id] = issued_per_event.get(event_id, 0) + 1
+        problems = []
+        for event_id, record in self.events.items():
+            issued = issued_per_event.get(event_id, 0)
+            if record[_TICKET_ISSUED] != issued:
+                problems.append(f"event {event_id}: issued counter {record[_TICKET_ISSUED]} != {issued} attendants")
+            if record[_TICKET_ISSUED] > record[_TICKET_COUNT]:
+                problems.append(f"event {event_id}: issued {record[_TICKET_ISSUED]} > ticket_count {record[_TICKET_COUNT]}")
+        return problems
+
+    def to_app_state(self) -> AppState:
+        """Builds the ledger state the compiled program would have produced."""
+        state = AppState()
+        if self.created:
+            state.global_state[b"event_count"] = self.event_count
+        for event_id, record in self.events.items():
+            state.boxes[event_box_name(event_id)] = encode_event_record(
+                nft_id=record[_NFT_ID],
+                end=record[_END],
+                stopped=record[_STOPPED],
+                ticket_count=record[_TICKET_COUNT],
+                ticket_issued=record[_TICKET_ISSUED],
+            )
+        for (event_id, address), ticket_number in self.attendants.items():
+            state.boxes[event_box_name(event_id) + address] = ticket_number.to_bytes(8, 'big')
+        return state
+
+
+def _arg(args: list[bytes], index: int) -> bytes:
+    if index >= len(args):
+        raise SimulationReject(f"invalid ApplicationArgs index {index}")
+    return args[index]
+
+
+def _require(condition: bool, message: str) -> None:
+    if not condition:
+        raise SimulationReject(f"assert failed: {message}")
+
+
+def _btoi(value: bytes) -> int:
+    if len(value) > 8:
+        raise SimulationReject("btoi arg too long")
+    return int.from_bytes(value, 'big')
+
+
+def random_calls(rng: random.Random, creator: bytes, buyers: list[bytes], count: int) -> list[tuple[bytes, list[bytes], int, int]]:
+    """Generates a random mix of (sender, args, on_completion, timestamp) calls."""
+    calls = []
+    for _ in range(count):
+        roll = rng.random()
+        timestamp = rng.randint(0, 200)
+        if roll < 0.15:
+            args = create_event_args(rng.randint(1, 10**6), rng.randint(0, 200), rng.randint(0, 5))
+            calls.append((creator if rng.random() < 0.9 else rng.choice(buyers), args, NOOP, timestamp))
+        elif roll < 0.25:
+            calls.append((creator, stop_event_args(rng.randint(0, 8)), NOOP, timestamp))
+        elif roll < 0.9:
+            calls.append((rng.choice(buyers), add_attendant_args(rng.randint(0, 8)), NOOP, timestamp))
+        else:
+            # Lời gọi không hợp lệ hoặc on_completion khác, để so khớp cả các nhánh còn lại
+            args = rng.choice([
+                [], [b"add_attendant"], [b"bogus", b"\x01"], [b"add_attendant", b"\x00" * 9],
+                add_attendant_args(1) + [b"extra"], stop_event_args(1),
+            ])
+            calls.append((rng.choice(buyers), args, rng.choice([NOOP, OPT_IN, CLOSE_OUT, UPDATE, DELETE]), timestamp))
+    return calls
+
+
+def crosscheck(teal_source: str, calls: int = 2000, seed: int = 0) -> list[str]:
+    """Replays random calls through the simulator and approval.teal.
+
+    Returns the mismatches found: approval decisions or resulting state that
+    differ between the Python model and the evaluated TEAL program.
+    """
+    rng = random.Random(seed)
+    program = Program.parse(teal_source)
+    creator = b"C" * 32
+    buyers = [bytes([i]) * 32 for i in range(1, 12)]
+    simulator = NFTicketSimulator(creator)
+    simulator.create()
+    state = evaluate(program, AppCall(creator, app_id=0, creator=creator), AppState()).state
+
+    mismatches = []
+    for index, (sender, args, on_completion, timestamp) in enumerate(random_calls(rng, creator, buyers, calls)):
+        expected = simulator.call(sender, args, on_completion, timestamp)
+        actual = evaluate(program, AppCall(sender, args, on_completion=on_completion, creator=creator, latest_timestamp=timestamp), state)
+        if actual.approved:
+            state = actual.state
+        if expected.approved != actual.approved:
+            mismatches.append(f"call {index} {args!r}: simulator approved={expected.approved}, teal approved={actual.approved} ({actual.error})")
+            break
+        if simulator.to_app_state() != _without_locals(state):
+            mismatches.append(f"call {index} {args!r}: state differs after the call")
+            break
+    return mismatches
+
+
+def _without_locals(state: AppState) -> AppState:
+    return AppState(state.global_state, {}, state.boxes)
+
+
+def replay_purchases(purchases: int, ticket_count: int, buyers: int, seed: int = 0) -> dict:
+    """Replays random purchases against one event and reports rate and counters."""
+    rng = random.Random(seed)
+    creator = b"C" * 32
+    simulator = NFTicketSimulator(creator)
+    simulator.create()
+    simulator.call(creator, create_event_args(1, 0, ticket_count))
+    args = add_attendant_args(1)
+    addresses = [i.to_bytes(32, 'big') for i in range(buyers)]
+
+    approved = rejected = 0
+    started = time.perf_counter()
+    for _ in range(purchases):
+        if simulator.call(rng.choice(addresses), args).approved:
+            approved += 1
+        else:
+            rejected += 1
+    elapsed = time.perf_counter() - started
+    record = simulator.events[1]
+    return {
+        "purchases": purchases,
+        "approved": approved,
+        "rejected": rejected,
+        "tickets_issued": record[_TICKET_ISSUED],
+        "tickets_remaining": record[_TICKET_COUNT] - record[_TICKET_ISSUED],
+        "purchases_per_minute": int(purchases / elapsed * 60) if elapsed else None,
+        "invariant_violations": simulator.check_invariants(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mô phỏng hợp đồng NFTicket ngoài chuỗi")
+    parser.add_argument("--crosscheck", type=int, metavar="CALLS", help="So khớp với approval.teal qua N lời gọi ngẫu nhiên")
+    parser.add_argument("--teal", default="approval.teal")
+    parser.add_argument("--purchases", type=int, default=1_000_000)
+    parser.add_argument("--tickets", type=int, default=10_000)
+    parser.add_argument("--buyers", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.crosscheck:
+        with open(args.teal) as f:
+            problems = crosscheck(f.read(), args.crosscheck, args.seed)
+        for problem in problems:
+            print(problem)
+        print("Không có sai khác." if not problems else f"{len(problems)} sai khác.")
+        raise SystemExit(1 if problems else 0)
+
+    report = replay_purchases(args.purchases, args.tickets, args.buyers, args.seed)
+    print(report)
+    raise SystemExit(1 if report["invariant_violations"] else 0)
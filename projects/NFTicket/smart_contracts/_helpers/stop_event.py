@@ -1,86 +1,65 @@
 # smart_contracts\_helpers\stop_event.py:
-import os
+import logging
 import sys
-from algosdk import account, mnemonic
-from algosdk.v2client import algod
-from algosdk.transaction import ApplicationNoOpTxn
-from dotenv import load_dotenv
 
-# Tải biến môi trường từ file .env
-load_dotenv()
+from algosdk import account
+from algosdk.transaction import ApplicationNoOpTxn
 
-# Cấu hình Algod client
-ALGOD_ADDRESS = os.getenv('NODELY_ENDPOINT_URL')
-ALGOD_TOKEN = os.getenv('NODELY_API_KEY')
-MNEMONIC = os.getenv('PRIVATE_KEY')  # Mnemonic của tài khoản triển khai
-APP_ID = 724732255  # Application ID mới của bạn
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import stop_event_args
+from smart_contracts._helpers.confirmation import wait_for_confirmation
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.event_box import event_box_ref
+from smart_contracts._helpers.instrumentation import configure, span
 
-# Chuyển mnemonic thành private key
-try:
-    PRIVATE_KEY = mnemonic.to_private_key(MNEMONIC)
-    sender_address = account.address_from_private_key(PRIVATE_KEY)
-except Exception as e:
-    print("Error converting mnemonic to private key:", e)
-    sys.exit(1)
+logger = logging.getLogger(__name__)
 
-# Khởi tạo client
-client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
+APP_ID = 724732255  # Application ID mới của bạn
 
-def call_stop_event(app_id, event_id):
+def call_stop_event(app_id, event_id, client=None, private_key=None):
+    """Stops an event; returns the confirmed round, or None when the call failed."""
     try:
-        # Lấy thông số giao dịch
-        params = client.suggested_params()
-
-        # Chuẩn bị argument cho transaction dưới dạng byte strings
-        app_args = [
-            "stop_event".encode('utf-8'),
-            event_id.to_bytes(8, 'big')  # Sử dụng 8 bytes cho event_id
-        ]
-
-        # Tạo giao dịch ApplicationNoOp
-        txn = ApplicationNoOpTxn(sender_address, params, app_id, app_args)
-
-        # Ký giao dịch
-        signed_txn = txn.sign(PRIVATE_KEY)
-
-        # Gửi giao dịch
-        txid = client.send_transaction(signed_txn)
-        print(f"Giao dịch được gửi với ID: {txid}")
+        with span("stop_event", app_id=app_id, event_id=event_id) as operation:
+            # Client dùng chung và khoá chỉ được tạo ở lần gọi đầu tiên
+            client = client or get_algod_client()
+            private_key = private_key or get_private_key()
+            sender_address = account.address_from_private_key(private_key)
+
+            # Lấy thông số giao dịch
+            with span("suggested_params"):
+                params = client.suggested_params()
+
+            # Chuẩn bị argument cho transaction dưới dạng byte strings
+            app_args = stop_event_args(event_id)  # Sử dụng 8 bytes cho event_id
+
+            # Tạo giao dịch ApplicationNoOp
+            txn = ApplicationNoOpTxn(sender_address, params, app_id, app_args, boxes=[event_box_ref(event_id)])
+
+            # Ký giao dịch
+            with span("sign"):
+                signed_txn = txn.sign(private_key)
+
+            # Gửi giao dịch
+            with span("send"):
+                txid = client.send_transaction(signed_txn)
+            operation.set(txid=txid)
+            logger.info(f"Giao dịch được gửi với ID: {txid}")
+
+            # Chờ xác nhận
+            with span("confirm"):
+                confirmed_txn = wait_for_confirmation(client, txid, 10)
+            confirmed_round = confirmed_txn.get('confirmed-round')
+            operation.set(confirmed_round=confirmed_round)
+            logger.info(f"Sự kiện {event_id} đã được dừng ở round {confirmed_round}")
+            return confirmed_round
 
-        # Chờ xác nhận
-        confirmed_txn = wait_for_confirmation(client, txid, 10)
-        print(f"Giao dịch đã được xác nhận ở round {confirmed_txn.get('confirmed-round')}")
-        print(f"Sự kiện {event_id} đã được dừng thành công.")
-
-    except Exception as e:
-        print(f"Error stopping event: {e}")
-
-def wait_for_confirmation(client, txid, timeout):
-    try:
-        last_round = client.status().get('last-round')
     except Exception as e:
-        print("Error getting status:", e)
-        return
-    current_round = last_round + 1
-
-    while current_round < last_round + timeout:
-        try:
-            pending_txn = client.pending_transaction_info(txid)
-            if pending_txn.get('confirmed-round', 0) > 0:
-                return pending_txn
-            elif pending_txn.get('pool-error'):
-                raise Exception(f"Lỗi Pool: {pending_txn.get('pool-error')}")
-        except Exception as e:
-            print(e)
-            return
-
-        print(f"Đang chờ xác nhận... Block hiện tại: {current_round}")
-        time.sleep(1)
-        current_round += 1
-
-    raise Exception("Timeout chờ xác nhận giao dịch")
+        logger.error(f"Error stopping event: {type(e).__name__}: {e}")
+        return None
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
     if len(sys.argv) != 2:
         print("Sử dụng: python stop_event.py <event_id>")
         sys.exit(1)
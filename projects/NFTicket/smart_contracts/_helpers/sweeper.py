@@ -0,0 +1,284 @@
+# sweeper.py
+
+# Dịch vụ chạy nền tự dừng các sự kiện đã hết hạn. Thời điểm kết thúc của các sự kiện chưa dừng
+# được giữ trong min-heap; dịch vụ ngủ đến đúng lúc sự kiện sớm nhất hết hạn rồi dừng cả loạt
+# sự kiện đến hạn bằng các nhóm giao dịch.
+
+import argparse
+import heapq
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from algosdk import account
+from algosdk.transaction import ApplicationNoOpTxn, assign_group_id
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.app_args import stop_event_args
+from smart_contracts._helpers.app_state import Event, get_state_reader
+from smart_contracts._helpers.confirmation import get_confirmation_waiter
+from smart_contracts._helpers.env import get_private_key
+from smart_contracts._helpers.event_box import event_box_ref
+from smart_contracts._helpers.instrumentation import PROMETHEUS_ENV, configure, inc, metrics, set_gauge, span
+
+logger = logging.getLogger(__name__)
+
+MAX_GROUP_SIZE = 16
+# Hợp đồng so với Global.latest_timestamp, tức timestamp của block trước, nên chờ thêm khoảng một block
+DEFAULT_GRACE = 5.0
+
+
+@dataclass
+class _Pending:
+    end: int
+    wake_at: float
+    attempts: int = 0
+
+
+@dataclass
+class SweeperStats:
+    scheduled: int = 0
+    stopped: int = 0
+    retried: int = 0
+    abandoned: int = 0
+    sweeps: int = 0
+
+
+class ExpirySweeper:
+    """Stops NFTicket events as soon as the contract allows it.
+
+    The end times of the app's running events sit in a min-heap, loaded
+    from `AppStateReader` at start and every `refresh_interval` seconds,
+    and added through `schedule()` by code that creates events in the same
+    process. `run()` sleeps until the earliest end time plus `grace`, then
+    stops every due event in atomic groups of up to 16 calls. A group the
+    node rejects is retried after `retry_delay`, one event per group so a
+    single bad event cannot hold back the others, and given up on after
+    `max_attempts`; an abandoned event is not scheduled again by later
+    refreshes while this sweeper runs.
+
+    `clock` and `sleep` can be replaced, e.g. by a fake clock in tests; by
+    default the sleep ends early when `schedule()` or `close()` is called.
+    """
+
+    def __init__(
+        self,
+        app_id: int,
+        client=None,
+        private_key: str | None = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] | None = None,
+        grace: float = DEFAULT_GRACE,
+        group_size: int = MAX_GROUP_SIZE,
+        retry_delay: float = 30.0,
+        max_attempts: int = 5,
+        refresh_interval: float = 300.0,
+        wait_rounds: int = 10,
+    ):
+        self.app_id = app_id
+        self.client = client or get_algod_client()
+        self.private_key = private_key or get_private_key()
+        self.sender = account.address_from_private_key(self.private_key)
+        self.clock = clock
+        self.grace = grace
+        self.group_size = max(1, min(group_size, MAX_GROUP_SIZE))
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.refresh_interval = refresh_interval
+        self.wait_rounds = wait_rounds
+        self.stats = SweeperStats()
+        self._wakeup = threading.Event()
+        self._sleep = sleep or self._wait_for_wakeup
+        self._closed = False
+        self._lock = threading.Lock()
+        # (thời điểm thức dậy, event_id); mục cũ được bỏ qua khi lấy ra thay vì xoá khỏi heap
+        self._heap: list[tuple[float, int]] = []
+        self._pending: dict[int, _Pending] = {}
+        # Sự kiện đã bỏ cuộc sau max_attempts lần; load() định kỳ không được đưa chúng lại vào heap
+        self._abandoned: set[int] = set()
+        self._next_refresh = 0.0
+
+    # --- API ---
+
+    def load(self) -> int:
+        """Schedules every running event of the app; returns how many are pending."""
+        with span("sweeper_load", app_id=self.app_id):
+            snapshot = get_state_reader(self.client).read(self.app_id)
+        for event in snapshot.events.values():
+            self.schedule(event)
+        self._next_refresh = self.clock() + self.refresh_interval
+        return len(self._pending)
+
+    def schedule(self, event: Event) -> None:
+        """Adds a running event (or forgets a stopped one); wakes the sweeper if it is due sooner."""
+        with self._lock:
+            if event.stopped:
+                self._pending.pop(event.event_id, None)
+                self._abandoned.discard(event.event_id)
+            elif event.event_id not in self._pending and event.event_id not in self._abandoned:
+                self._push(event.event_id, _Pending(event.end, event.end + self.grace))
+                self.stats.scheduled += 1
+            self._update_gauge()
+        self._wakeup.set()
+
+    def next_wake(self) -> float | None:
+        """When the earliest pending event becomes due, or None when nothing is pending."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def sweep(self) -> int:
+        """Stops every event that is due now; returns how many were stopped."""
+        now = self.clock()
+        due: list[tuple[int, _Pending]] = []
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, event_id = heapq.heappop(self._heap)
+                due.append((event_id, self._pending[event_id]))
+        if not due:
+            return 0
+
+        with span("sweep", events=len(due)):
+            self.stats.sweeps += 1
+            # Bỏ qua sự kiện đã được dừng từ nơi khác, khỏi tốn phí giao dịch
+            events = get_state_reader(self.client).read(self.app_id).events
+            fresh, retries = [], []
+            for event_id, pending in due:
+                event = events.get(event_id)
+                if event is None or event.stopped:
+                    inc("nfticket_sweeper_events_total", result="skipped")
+                    self._forget(event_id)
+                else:
+                    (retries if pending.attempts else fresh).append((event_id, pending))
+            groups = [fresh[i:i + self.group_size] for i in range(0, len(fresh), self.group_size)]
+            groups += [[item] for item in retries]
+            stopped = self._stop_groups(groups, now)
+        with self._lock:
+            self._update_gauge()
+        self._export()
+        return stopped
+
+    def run(self, until: float | None = None) -> None:
+        """Sweeps until `close()` is called (or the clock reaches `until`)."""
+        logger.info(f"Sweeper của app {self.app_id} đang chạy")
+        while not self._closed and (until is None or self.clock() < until):
+            if self.clock() >= self._next_refresh:
+                self.load()
+            self.sweep()
+            wake_at = self._next_refresh
+            next_due = self.next_wake()
+            if next_due is not None:
+                wake_at = min(wake_at, next_due)
+            if until is not None:
+                wake_at = min(wake_at, until)
+            delay = wake_at - self.clock()
+            if delay > 0:
+                self._sleep(delay)
+
+    def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+
+    # --- Nội bộ ---
+
+    def _push(self, event_id: int, pending: _Pending) -> None:
+        self._pending[event_id] = pending
+        heapq.heappush(self._heap, (pending.wake_at, event_id))
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            wake_at, event_id = self._heap[0]
+            pending = self._pending.get(event_id)
+            if pending is not None and pending.wake_at == wake_at:
+                return
+            heapq.heappop(self._heap)
+
+    def _forget(self, event_id: int) -> None:
+        with self._lock:
+            self._pending.pop(event_id, None)
+
+    def _stop_groups(self, groups: list[list[tuple[int, _Pending]]], now: float) -> int:
+        params = self.client.suggested_params()
+        waiter = get_confirmation_waiter(self.client)
+        submitted = []
+        for group in groups:
+            txns = [
+                ApplicationNoOpTxn(self.sender, params, self.app_id, stop_event_args(event_id), boxes=[event_box_ref(event_id)])
+                for event_id, _ in group
+            ]
+            if len(txns) > 1:
+                assign_group_id(txns)
+            try:
+                txid = self.client.send_transactions([txn.sign(self.private_key) for txn in txns])
+            except Exception as e:
+                self._retry(group, e)
+                continue
+            submitted.append((group, waiter.watch(txid, self.wait_rounds)))
+
+        stopped = 0
+        for group, future in submitted:
+            try:
+                future.result()
+            except Exception as e:
+                self._retry(group, e)
+                continue
+            for event_id, pending in group:
+                self._forget(event_id)
+                inc("nfticket_sweeper_events_total", result="stopped")
+                # Độ trễ tính từ lúc sự kiện kết thúc đến lúc giao dịch dừng được gửi
+                metrics.observe("nfticket_sweeper_lag_seconds", max(0.0, now - pending.end))
+            stopped += len(group)
+        self.stats.stopped += stopped
+        return stopped
+
+    def _retry(self, group: list[tuple[int, _Pending]], exc: Exception) -> None:
+        logger.warning(f"Không dừng được sự kiện {[event_id for event_id, _ in group]}: {exc}")
+        with self._lock:
+            for event_id, pending in group:
+                pending.attempts += 1
+                if pending.attempts >= self.max_attempts:
+                    self._pending.pop(event_id, None)
+                    self._abandoned.add(event_id)
+                    self.stats.abandoned += 1
+                    inc("nfticket_sweeper_events_total", result="abandoned")
+                    logger.error(f"Bỏ qua sự kiện {event_id} sau {pending.attempts} lần thử")
+                    continue
+                pending.wake_at = self.clock() + self.retry_delay
+                heapq.heappush(self._heap, (pending.wake_at, event_id))
+                self.stats.retried += 1
+                inc("nfticket_sweeper_events_total", result="retried")
+
+    def _update_gauge(self) -> None:
+        set_gauge("nfticket_sweeper_pending_events", len(self._pending), app_id=self.app_id)
+
+    def _export(self) -> None:
+        # Dịch vụ chạy lâu, nên ghi file Prometheus sau mỗi lượt thay vì chỉ khi thoát
+        path = os.getenv(PROMETHEUS_ENV)
+        if path:
+            metrics.write_prometheus(path)
+
+    def _wait_for_wakeup(self, delay: float) -> None:
+        self._wakeup.wait(delay)
+        self._wakeup.clear()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
+    parser = argparse.ArgumentParser(description="Tự động dừng các sự kiện NFTicket đã hết hạn")
+    parser.add_argument("--app-id", type=int, required=True)
+    parser.add_argument("--grace", type=float, default=DEFAULT_GRACE, help="Số giây chờ thêm sau thời điểm kết thúc")
+    parser.add_argument("--refresh", type=float, default=300.0, help="Chu kỳ đọc lại danh sách sự kiện (giây)")
+    args = parser.parse_args()
+
+    sweeper = ExpirySweeper(args.app_id, grace=args.grace, refresh_interval=args.refresh)
+    try:
+        sweeper.run()
+    except KeyboardInterrupt:
+        sweeper.close()
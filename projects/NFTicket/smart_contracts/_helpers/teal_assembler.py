@@ -0,0 +1,261 @@
+# teal_assembler.py
+
+# Trình hợp dịch TEAL -> bytecode chạy offline, không cần endpoint /compile của node.
+# Hỗ trợ các opcode mà chương trình PyTeal của NFTicket sinh ra (TEAL tới v8); hằng số được
+# gom vào intcblock/bytecblock theo cùng quy tắc với assembler của go-algorand.
+
+import base64
+from dataclasses import dataclass
+
+from algosdk import encoding
+
+from smart_contracts._helpers.teal_eval import Program, _parse_bytes, _parse_int
+
+ASSEMBLER_VERSION = 1
+MAX_TEAL_VERSION = 8
+# Từ v4 assembler gom hằng số theo tần suất và dùng pushint/pushbytes cho hằng số dùng một lần
+OPTIMIZE_CONSTANTS_VERSION = 4
+
+OPCODES = {
+    "err": 0x00, "sha256": 0x01, "keccak256": 0x02, "sha512_256": 0x03, "ed25519verify": 0x04,
+    "+": 0x08, "-": 0x09, "/": 0x0a, "*": 0x0b, "<": 0x0c, ">": 0x0d, "<=": 0x0e, ">=": 0x0f,
+    "&&": 0x10, "||": 0x11, "==": 0x12, "!=": 0x13, "!": 0x14, "len": 0x15, "itob": 0x16, "btoi": 0x17,
+    "%": 0x18, "|": 0x19, "&": 0x1a, "^": 0x1b, "~": 0x1c, "mulw": 0x1d, "addw": 0x1e, "divmodw": 0x1f,
+    "return": 0x43, "assert": 0x44, "pop": 0x48, "dup": 0x49, "dup2": 0x4a, "swap": 0x4c, "select": 0x4d,
+    "concat": 0x50, "substring3": 0x52, "getbit": 0x53, "setbit": 0x54, "getbyte": 0x55, "setbyte": 0x56,
+    "extract3": 0x58, "extract_uint16": 0x59, "extract_uint32": 0x5a, "extract_uint64": 0x5b,
+    "replace3": 0x5d, "balance": 0x60, "app_opted_in": 0x61, "app_local_get": 0x62, "app_local_get_ex": 0x63,
+    "app_global_get": 0x64, "app_global_get_ex": 0x65, "app_local_put": 0x66, "app_global_put": 0x67,
+    "app_local_del": 0x68, "app_global_del": 0x69, "min_balance": 0x78, "retsub": 0x89,
+    "shl": 0x90, "shr": 0x91, "sqrt": 0x92, "bitlen": 0x93, "exp": 0x94, "expw": 0x95, "bsqrt": 0x96,
+    "divw": 0x97, "sha3_256": 0x98, "bzero": 0xaf, "log": 0xb0,
+    "box_create": 0xb9, "box_extract": 0xba, "box_replace": 0xbb, "box_del": 0xbc, "box_len": 0xbd,
+    "box_get": 0xbe, "box_put": 0xbf,
+}
+
+# Opcode có tham số tức thời: mã opcode và kiểu của từng tham số
+IMMEDIATE_OPCODES = {
+    "txn": (0x31, ("txn_field",)),
+    "global": (0x32, ("global_field",)),
+    "gtxn": (0x33, ("uint8", "txn_field")),
+    "load": (0x34, ("uint8",)),
+    "store": (0x35, ("uint8",)),
+    "txna": (0x36, ("txn_field", "uint8")),
+    "gtxna": (0x37, ("uint8", "txn_field", "uint8")),
+    "gtxns": (0x38, ("txn_field",)),
+    "gtxnsa": (0x39, ("txn_field", "uint8")),
+    "bury": (0x45, ("uint8",)),
+    "popn": (0x46, ("uint8",)),
+    "dupn": (0x47, ("uint8",)),
+    "dig": (0x4b, ("uint8",)),
+    "cover": (0x4e, ("uint8",)),
+    "uncover": (0x4f, ("uint8",)),
+    "substring": (0x51, ("uint8", "uint8")),
+    "extract": (0x57, ("uint8", "uint8")),
+    "replace2": (0x5c, ("uint8",)),
+    "proto": (0x8a, ("uint8", "uint8")),
+    "frame_dig": (0x8b, ("int8",)),
+    "frame_bury": (0x8c, ("int8",)),
+}
+
+BRANCH_OPCODES = {"bnz": 0x40, "bz": 0x41, "b": 0x42, "callsub": 0x88}
+
+TXN_FIELDS = [
+    "Sender", "Fee", "FirstValid", "FirstValidTime", "LastValid", "Note", "Lease", "Receiver", "Amount",
+    "CloseRemainderTo", "VotePK", "SelectionPK", "VoteFirst", "VoteLast", "VoteKeyDilution", "Type",
+    "TypeEnum", "XferAsset", "AssetAmount", "AssetSender", "AssetReceiver", "AssetCloseTo", "GroupIndex",
+    "TxID", "ApplicationID", "OnCompletion", "ApplicationArgs", "NumAppArgs", "Accounts", "NumAccounts",
+    "ApprovalProgram", "ClearStateProgram", "RekeyTo", "ConfigAsset", "ConfigAssetTotal",
+    "ConfigAssetDecimals", "ConfigAssetDefaultFrozen", "ConfigAssetUnitName", "ConfigAssetName",
+    "ConfigAssetURL", "ConfigAssetMetadataHash", "ConfigAssetManager", "ConfigAssetReserve",
+    "ConfigAssetFreeze", "ConfigAssetClawback", "FreezeAsset", "FreezeAssetAccount", "FreezeAssetFrozen",
+    "Assets", "NumAssets", "Applications", "NumApplications", "GlobalNumUint", "GlobalNumByteSlice",
+    "LocalNumUint", "LocalNumByteSlice", "ExtraProgramPages", "Nonparticipation", "Logs", "NumLogs",
+    "CreatedAssetID", "CreatedApplicationID", "LastLog", "StateProofPK", "ApprovalProgramPages",
+    "NumApprovalProgramPages", "ClearStateProgramPages", "NumClearStateProgramPages",
+]
+
+GLOBAL_FIELDS = [
+    "MinTxnFee", "MinBalance", "MaxTxnLife", "ZeroAddress", "GroupSize", "LogicSigVersion", "Round",
+    "LatestTimestamp", "CurrentApplicationID", "CreatorAddress", "CurrentApplicationAddress", "GroupID",
+    "OpcodeBudget", "CallerApplicationID", "CallerApplicationAddress",
+]
+
+
+class AssemblyError(Exception):
+    """The program uses something this assembler does not support."""
+
+
+@dataclass(frozen=True)
+class AssembledProgram:
+    bytecode: bytes
+    pc_to_line: tuple[int, ...]  # Dòng TEAL (đếm từ 0) của từng byte trong bytecode
+
+    def sourcemap(self) -> dict:
+        """The pc -> line mapping in the source map v3 format algod's /compile returns."""
+        groups = []
+        last_line = 0
+        for pc, line in enumerate(self.pc_to_line):
+            if pc and line == last_line:
+                groups.append("")
+            else:
+                groups.append("AA" + _vlq(line - last_line) + "A")
+                last_line = line
+        return {"version": 3, "sources": [], "names": [], "mappings": ";".join(groups)}
+
+
+def _uvarint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+_B64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def _vlq(value: int) -> str:
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    out = ""
+    while True:
+        digit = value & 0x1f
+        value >>= 5
+        out += _B64[digit | (0x20 if value else 0)]
+        if not value:
+            return out
+
+
+def _constant(op: str, args: list[str]) -> int | bytes:
+    if op == "int":
+        try:
+            return _parse_int(args[0])
+        except ValueError as e:
+            raise AssemblyError(f"Unsupported int constant {args[0]}") from e
+    if op == "addr":
+        return encoding.decode_address(args[0])
+    if len(args) == 2 and args[0] in ("base64", "b64"):
+        return base64.b64decode(args[1])
+    try:
+        return _parse_bytes(args[0])
+    except Exception as e:
+        raise AssemblyError(f"Unsupported byte constant {args}") from e
+
+
+def _constant_block(refs: list, version: int) -> list:
+    """Orders constants like go-algorand: by use count, first use breaking ties."""
+    counts: dict = {}
+    for value in refs:
+        counts[value] = counts.get(value, 0) + 1
+    ordered = list(counts)
+    if version < OPTIMIZE_CONSTANTS_VERSION:
+        return ordered
+    ordered.sort(key=lambda value: -counts[value])
+    return [value for value in ordered if counts[value] > 1]
+
+
+def _immediate(kind: str, token: str) -> bytes:
+    try:
+        if kind == "txn_field":
+            return bytes([TXN_FIELDS.index(token)])
+        if kind == "global_field":
+            return bytes([GLOBAL_FIELDS.index(token)])
+        value = int(token, 0)
+    except ValueError as e:
+        raise AssemblyError(f"Unsupported {kind} immediate {token}") from e
+    if kind == "int8":
+        return value.to_bytes(1, "big", signed=True)
+    return value.to_bytes(1, "big")
+
+
+def assemble(source: str) -> AssembledProgram:
+    """Assembles TEAL source into program bytes and a pc -> line map."""
+    program = Program.parse(source)
+    if program.version > MAX_TEAL_VERSION:
+        raise AssemblyError(f"TEAL v{program.version} is newer than the supported v{MAX_TEAL_VERSION}")
+    pragma_line = next(
+        (i for i, line in enumerate(source.splitlines()) if line.strip().startswith("#pragma")), 0
+    )
+
+    ints: list[int] = []
+    byte_values: list[bytes] = []
+    for ins in program.instructions:
+        if ins.op in ("intcblock", "bytecblock", "intc", "bytec"):
+            raise AssemblyError(f"Explicit {ins.op} is not supported")
+        if ins.op == "int":
+            ints.append(_constant(ins.op, ins.args))
+        elif ins.op in ("byte", "addr"):
+            byte_values.append(_constant(ins.op, ins.args))
+    int_block = _constant_block(ints, program.version)
+    byte_block = _constant_block(byte_values, program.version)
+
+    prefix = bytearray(_uvarint(program.version))
+    if int_block:
+        prefix += bytes([0x20]) + _uvarint(len(int_block)) + b"".join(_uvarint(v) for v in int_block)
+    if byte_block:
+        prefix += bytes([0x26]) + _uvarint(len(byte_block)) + b"".join(_uvarint(len(v)) + v for v in byte_block)
+
+    # Lượt 1: mã hoá từng lệnh, lệnh nhảy giữ chỗ 3 byte cho offset int16
+    encoded: list[bytearray] = []
+    for ins in program.instructions:
+        encoded.append(_encode(ins.op, ins.args, int_block, byte_block, ins.line))
+    starts = []
+    pc = len(prefix)
+    for code in encoded:
+        starts.append(pc)
+        pc += len(code)
+    end = pc
+
+    # Lượt 2: điền offset của lệnh nhảy, tính từ byte ngay sau lệnh
+    for index, ins in enumerate(program.instructions):
+        if ins.op in BRANCH_OPCODES:
+            label = ins.args[0]
+            if label not in program.labels:
+                raise AssemblyError(f"line {ins.line}: unknown label {label}")
+            target = program.labels[label]
+            target_pc = starts[target] if target < len(starts) else end
+            offset = target_pc - (starts[index] + 3)
+            if not -0x8000 <= offset <= 0x7fff:
+                raise AssemblyError(f"line {ins.line}: branch to {label} is too far")
+            encoded[index][1:3] = offset.to_bytes(2, "big", signed=True)
+
+    bytecode = bytes(prefix) + b"".join(bytes(code) for code in encoded)
+    pc_to_line = [pragma_line] * len(prefix)
+    for ins, code in zip(program.instructions, encoded):
+        pc_to_line += [ins.line - 1] * len(code)
+    return AssembledProgram(bytecode, tuple(pc_to_line))
+
+
+def _encode(op: str, args: list[str], int_block: list, byte_block: list, line: int) -> bytearray:
+    if op == "int":
+        return _constant_ref(_constant(op, args), int_block, 0x22, 0x21, 0x81, lambda v: _uvarint(v))
+    if op in ("byte", "addr"):
+        return _constant_ref(_constant(op, args), byte_block, 0x28, 0x27, 0x80, lambda v: _uvarint(len(v)) + v)
+    if op == "pushint":
+        return bytearray([0x81]) + _uvarint(_parse_int(args[0]))
+    if op == "pushbytes":
+        value = _constant("byte", args)
+        return bytearray([0x80]) + _uvarint(len(value)) + value
+    if op in BRANCH_OPCODES:
+        return bytearray([BRANCH_OPCODES[op], 0, 0])
+    if op == "txn" and len(args) == 2:
+        op = "txna"
+    if op in IMMEDIATE_OPCODES:
+        code, kinds = IMMEDIATE_OPCODES[op]
+        if len(args) != len(kinds):
+            raise AssemblyError(f"line {line}: {op} expects {len(kinds)} immediate(s)")
+        return bytearray([code]) + b"".join(_immediate(kind, token) for kind, token in zip(kinds, args))
+    if op in OPCODES:
+        if args:
+            raise AssemblyError(f"line {line}: {op} takes no immediates")
+        return bytearray([OPCODES[op]])
+    raise AssemblyError(f"line {line}: unsupported opcode {op}")
+
+
+def _constant_ref(value, block: list, short_base: int, indexed: int, push: int, encode) -> bytearray:
+    if value in block:
+        index = block.index(value)
+        # intc_0..intc_3 / bytec_0..bytec_3 là opcode một byte
+        return bytearray([short_base + index]) if index < 4 else bytearray([indexed, index])
+    return bytearray([push]) + encode(value)
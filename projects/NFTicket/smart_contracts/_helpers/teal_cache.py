@@ -0,0 +1,221 @@
+# teal_cache.py
+
+# Cache bytecode TEAL đã biên dịch, khoá theo sha256 của mã nguồn và phiên bản TEAL.
+# Lần deploy sau (hoặc CI) dùng lại bytecode mà không gọi /compile của node; khi không có
+# node thì biên dịch offline bằng teal_assembler.
+
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from algosdk import logic
+
+from smart_contracts._helpers.algod_client import get_algod_client
+from smart_contracts._helpers.instrumentation import configure, inc, span
+from smart_contracts._helpers.teal_assembler import ASSEMBLER_VERSION, assemble
+from smart_contracts._helpers.teal_eval import Program
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENV = "NFTICKET_TEAL_CACHE"
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / ".teal_cache"
+CACHE_FORMAT = 1
+ALGOD_COMPILER = "algod"
+OFFLINE_COMPILER = f"offline-v{ASSEMBLER_VERSION}"
+
+
+class CacheMismatchError(Exception):
+    """A cached program does not match its source, its hash or the node's output."""
+
+
+@dataclass(frozen=True)
+class CompiledProgram:
+    bytecode: bytes
+    program_hash: str  # Địa chỉ của chương trình, giống trường "hash" mà /compile trả về
+    sourcemap: dict
+    source_sha256: str
+    version: int
+    compiler: str
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["bytecode"] = base64.b64encode(self.bytecode).decode()
+        return {"format": CACHE_FORMAT, **data}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompiledProgram":
+        if data.get("format") != CACHE_FORMAT:
+            raise CacheMismatchError(f"unknown cache format {data.get('format')}")
+        data = {k: v for k, v in data.items() if k != "format"}
+        return cls(**{**data, "bytecode": base64.b64decode(data["bytecode"])})
+
+
+def source_key(source: str) -> tuple[str, int]:
+    """The cache key of a TEAL source: its sha256 and its #pragma version."""
+    return hashlib.sha256(source.encode()).hexdigest(), Program.parse(source).version
+
+
+class TealCache:
+    """Compiled programs stored as one JSON file per source hash and version."""
+
+    def __init__(self, directory: str | Path | None = None):
+        self.directory = Path(directory or os.getenv(CACHE_ENV) or DEFAULT_CACHE_DIR)
+
+    def path(self, source_sha256: str, version: int) -> Path:
+        return self.directory / f"{source_sha256}-v{version}.json"
+
+    def get(self, source: str) -> CompiledProgram | None:
+        """Returns the cached program for `source`, or None on a miss.
+
+        Raises `CacheMismatchError` when the entry exists but does not check
+        out: wrong source hash or version, or bytecode that no longer hashes
+        to the stored program hash.
+        """
+        sha, version = source_key(source)
+        path = self.path(sha, version)
+        try:
+            with open(path) as f:
+                program = CompiledProgram.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError, KeyError) as e:
+            raise CacheMismatchError(f"{path.name}: unreadable entry ({e})") from e
+        if (program.source_sha256, program.version) != (sha, version):
+            raise CacheMismatchError(f"{path.name}: entry belongs to another source")
+        if logic.address(program.bytecode) != program.program_hash:
+            raise CacheMismatchError(f"{path.name}: bytecode does not match hash {program.program_hash}")
+        return program
+
+    def put(self, program: CompiledProgram) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(program.source_sha256, program.version)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(program.to_dict(), f, indent=2)
+        # Ghi xong mới thay file, để deploy chạy song song không đọc phải entry dở dang
+        os.replace(tmp_path, path)
+        return path
+
+    def discard(self, source: str) -> None:
+        self.path(*source_key(source)).unlink(missing_ok=True)
+
+
+def _compile_with_node(client, source: str) -> CompiledProgram:
+    sha, version = source_key(source)
+    response = client.compile(source, source_map=True)
+    bytecode = base64.b64decode(response["result"])
+    if logic.address(bytecode) != response["hash"]:
+        raise CacheMismatchError(f"node returned bytecode that does not hash to {response['hash']}")
+    return CompiledProgram(bytecode, response["hash"], response.get("sourcemap", {}), sha, version, ALGOD_COMPILER)
+
+
+def _compile_offline(source: str) -> CompiledProgram:
+    sha, version = source_key(source)
+    assembled = assemble(source)
+    bytecode = assembled.bytecode
+    return CompiledProgram(bytecode, logic.address(bytecode), assembled.sourcemap(), sha, version, OFFLINE_COMPILER)
+
+
+def compile_teal(
+    source: str,
+    client=None,
+    cache: TealCache | None = None,
+    offline: bool = False,
+    verify: bool = False,
+) -> CompiledProgram:
+    """Returns the compiled program for `source`, reusing the cache when possible.
+
+    On a miss the program is compiled by `client` (the shared algod client by
+    default) or, with `offline`, by the in-tree assembler. A corrupted or
+    stale entry is logged, discarded and recompiled. With `verify` the node
+    always compiles the source and a cached program with a different hash
+    raises `CacheMismatchError`. An entry made by the offline assembler is
+    only returned as is for `offline` calls; otherwise it is checked the same
+    way and replaced by the node's output.
+    """
+    cache = cache or TealCache()
+    with span("compile_teal", offline=offline, verify=verify) as operation:
+        try:
+            cached = cache.get(source)
+        except CacheMismatchError as e:
+            logger.warning(f"Bỏ entry cache TEAL không hợp lệ: {e}")
+            inc("nfticket_teal_cache_total", result="corrupt")
+            cache.discard(source)
+            cached = None
+
+        # Bytecode của assembler offline chỉ được dùng thẳng khi deploy offline; có node thì node kiểm lại
+        recheck = cached is not None and cached.compiler == OFFLINE_COMPILER and not offline
+        if verify or recheck:
+            compiled = _compile_with_node(client or get_algod_client(), source)
+            if cached and cached.program_hash != compiled.program_hash:
+                inc("nfticket_teal_cache_total", result="mismatch")
+                raise CacheMismatchError(
+                    f"cached {cached.compiler} program {cached.program_hash} differs from "
+                    f"node program {compiled.program_hash}"
+                )
+        elif cached:
+            inc("nfticket_teal_cache_total", result="hit")
+            operation.set(result="hit", program_hash=cached.program_hash)
+            return cached
+        elif offline:
+            compiled = _compile_offline(source)
+        else:
+            compiled = _compile_with_node(client or get_algod_client(), source)
+
+        result = "verified" if verify or recheck else "miss"
+        inc("nfticket_teal_cache_total", result=result)
+        operation.set(result=result, program_hash=compiled.program_hash)
+        # Kết quả của node được ưu tiên giữ lại, kể cả khi entry cũ do assembler offline tạo ra
+        cache.put(compiled)
+        return compiled
+
+
+def record_node_output(files: list[str], client=None) -> dict:
+    """The node's /compile output for each TEAL file, keyed by file name.
+
+    Each entry keeps the source sha256 next to the "hash" and "result"
+    fields, so a golden file made from it shows when the TEAL it was
+    recorded from has changed.
+    """
+    client = client or get_algod_client()
+    recorded = {}
+    for file_name in files:
+        with open(file_name) as f:
+            source = f.read()
+        response = client.compile(source)
+        recorded[Path(file_name).name] = {
+            "source_sha256": source_key(source)[0],
+            "hash": response["hash"],
+            "result": response["result"],
+        }
+    return recorded
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-10s: %(message)s")
+    configure()
+    parser = argparse.ArgumentParser(description="Biên dịch TEAL qua cache cục bộ")
+    parser.add_argument("files", nargs="+", help="File .teal cần biên dịch")
+    parser.add_argument("--offline", action="store_true", help="Biên dịch bằng assembler trong repo khi cache trượt")
+    parser.add_argument("--verify", action="store_true", help="Luôn biên dịch lại trên node và so với cache")
+    parser.add_argument("--cache-dir", help=f"Thư mục cache (mặc định {CACHE_ENV} hoặc .teal_cache)")
+    parser.add_argument("--record", metavar="JSON", help="Ghi kết quả /compile của node vào file golden thay vì biên dịch")
+    args = parser.parse_args()
+
+    if args.record:
+        with open(args.record, "w") as f:
+            json.dump(record_node_output(args.files), f, indent=2)
+            f.write("\n")
+        logger.info(f"Đã ghi kết quả /compile của {len(args.files)} file vào {args.record}")
+        raise SystemExit
+
+    teal_cache = TealCache(args.cache_dir)
+    for file_name in args.files:
+        with open(file_name) as f:
+            program = compile_teal(f.read(), cache=teal_cache, offline=args.offline, verify=args.verify)
+        logger.info(f"{file_name}: {program.program_hash} ({len(program.bytecode)} bytes, {program.compiler})")
@@ -0,0 +1,543 @@
+# teal_eval.py
+
+# Trình thông dịch TEAL tối giản, đủ cho các opcode mà approval.teal sử dụng.
+# Dùng để đo chi phí opcode theo từng method mà không cần node.
+
+import dataclasses
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+APP_CALL_BUDGET = 700
+MAX_UINT64 = 2**64 - 1
+
+NAMED_INTS = {
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+}
+
+# Các opcode không tốn chi phí thực thi
+_PSEUDO = {"#pragma"}
+
+
+class TealError(Exception):
+    """Raised when the program fails (err, failed assert, bad stack, ...)."""
+
+
+@dataclass
+class Instruction:
+    op: str
+    args: list[str]
+    line: int
+
+
+@dataclass
+class Program:
+    instructions: list[Instruction]
+    labels: dict[str, int]
+    version: int
+
+    @classmethod
+    def parse(cls, source: str) -> "Program":
+        instructions: list[Instruction] = []
+        labels: dict[str, int] = {}
+        version = 1
+        for line_no, raw in enumerate(source.splitlines(), start=1):
+            line = _strip_comment(raw).strip()
+            if not line:
+                continue
+            if line.startswith("#pragma"):
+                version = int(line.split()[-1])
+                continue
+            if line.endswith(":") and " " not in line:
+                labels[line[:-1]] = len(instructions)
+                continue
+            parts = _split_args(line)
+            instructions.append(Instruction(parts[0], parts[1:], line_no))
+        return cls(instructions, labels, version)
+
+
+def _strip_comment(line: str) -> str:
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(line):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif line.startswith("//", i):
+            return line[:i]
+    return line
+
+
+def _split_args(line: str) -> list[str]:
+    return re.findall(r'"(?:[^"\\]|\\.)*"|\S+', line)
+
+
+def _parse_bytes(token: str) -> bytes:
+    if token.startswith('"'):
+        return token[1:-1].encode("utf-8").decode("unicode_escape").encode("latin-1")
+    if token.startswith("0x"):
+        return bytes.fromhex(token[2:])
+    raise TealError(f"Unsupported byte constant {token}")
+
+
+def _parse_int(token: str) -> int:
+    if token in NAMED_INTS:
+        return NAMED_INTS[token]
+    return int(token, 0)
+
+
+@dataclass
+class AppState:
+    """Global, local and box state of one application."""
+
+    global_state: dict[bytes, int | bytes] = field(default_factory=dict)
+    local_state: dict[bytes, dict[bytes, int | bytes]] = field(default_factory=dict)
+    boxes: dict[bytes, bytes] = field(default_factory=dict)
+
+    def clone(self) -> "AppState":
+        return AppState(
+            dict(self.global_state),
+            {addr: dict(kv) for addr, kv in self.local_state.items()},
+            dict(self.boxes),
+        )
+
+
+@dataclass
+class AppCall:
+    sender: bytes
+    args: list[bytes] = field(default_factory=list)
+    app_id: int = 1
+    on_completion: int = 0
+    creator: bytes = b"\x00" * 32
+    latest_timestamp: int = 0
+    round: int = 1
+
+
+@dataclass
+class EvalResult:
+    approved: bool
+    cost: int
+    error: str | None = None
+    state: AppState | None = None
+    line_hits: Counter = dataclasses.field(default_factory=Counter)
+
+
+def evaluate(program: Program, call: AppCall, state: AppState, budget: int = APP_CALL_BUDGET) -> EvalResult:
+    """Runs the program for one app call against a copy of `state`.
+
+    The returned state is only set when the call is approved, so callers can
+    commit it exactly like the ledger would.
+    """
+    scratch_state = state.clone()
+    if call.app_id and call.on_completion == NAMED_INTS["OptIn"]:
+        scratch_state.local_state.setdefault(call.sender, {})
+    vm = _VM(program, call, scratch_state, budget)
+    try:
+        approved = vm.run()
+    except TealError as e:
+        return EvalResult(False, vm.cost, str(e), None, vm.line_hits)
+    return EvalResult(approved, vm.cost, None, scratch_state if approved else None, vm.line_hits)
+
+
+class _VM:
+    def __init__(self, program: Program, call: AppCall, state: AppState, budget: int):
+        self.program = program
+        self.call = call
+        self.state = state
+        self.budget = budget
+        self.stack: list[int | bytes] = []
+        self.scratch: list[int | bytes] = [0] * 256
+        self.frames: list[tuple[int, int, int, int, bool]] = []
+        self.cost = 0
+        self.line_hits: Counter = Counter()
+
+    def pop(self) -> int | bytes:
+        if not self.stack:
+            raise TealError("stack underflow")
+        return self.stack.pop()
+
+    def pop_int(self) -> int:
+        value = self.pop()
+        if not isinstance(value, int):
+            raise TealError("expected uint64 on stack")
+        return value
+
+    def pop_bytes(self) -> bytes:
+        value = self.pop()
+        if not isinstance(value, bytes):
+            raise TealError("expected bytes on stack")
+        return value
+
+    def push_int(self, value: int) -> None:
+        if value < 0 or value > MAX_UINT64:
+            raise TealError("uint64 overflow/underflow")
+        self.stack.append(value)
+
+    def jump(self, label: str) -> int:
+        if label not in self.program.labels:
+            raise TealError(f"unknown label {label}")
+        return self.program.labels[label]
+
+    def run(self) -> bool:
+        pc = 0
+        instructions = self.program.instructions
+        while pc < len(instructions):
+            ins = instructions[pc]
+            pc += 1
+            if ins.op in _PSEUDO:
+                continue
+            self.cost += 1
+            self.line_hits[ins.line] += 1
+            if self.cost > self.budget:
+                raise TealError(f"dynamic cost budget exceeded ({self.budget})")
+            result = self.step(ins, pc)
+            if result is None:
+                continue
+            kind, value = result
+            if kind == "jump":
+                pc = value
+            else:
+                return bool(value)
+        if len(self.stack) != 1:
+            raise TealError("stack must contain exactly one value at end of program")
+        value = self.pop()
+        return isinstance(value, int) and value != 0
+
+    def txn_field(self, name: str) -> int | bytes:
+        call = self.call
+        match name:
+            case "Sender":
+                return call.sender
+            case "ApplicationID":
+                return call.app_id
+            case "OnCompletion":
+                return call.on_completion
+            case "NumAppArgs":
+                return len(call.args)
+            case "TypeEnum":
+                return NAMED_INTS["appl"]
+            case "GroupIndex":
+                return 0
+        raise TealError(f"unsupported txn field {name}")
+
+    def global_field(self, name: str) -> int | bytes:
+        call = self.call
+        match name:
+            case "CreatorAddress":
+                return call.creator
+            case "LatestTimestamp":
+                return call.latest_timestamp
+            case "CurrentApplicationID":
+                return call.app_id
+            case "Round":
+                return call.round
+            case "ZeroAddress":
+                return b"\x00" * 32
+            case "GroupSize":
+                return 1
+        raise TealError(f"unsupported global field {name}")
+
+    def local_account(self, ref: int | bytes) -> dict[bytes, int | bytes]:
+        address = self.call.sender if ref == 0 or ref == self.call.sender else ref
+        if not isinstance(address, bytes) or address not in self.state.local_state:
+            raise TealError("account is not opted in to the application")
+        return self.state.local_state[address]
+
+    def step(self, ins: Instruction, pc: int) -> tuple[str, int] | None:  # noqa: C901
+        op, args, stack = ins.op, ins.args, self.stack
+        match op:
+            case "int" | "pushint":
+                self.push_int(_parse_int(args[0]))
+            case "byte" | "pushbytes":
+                stack.append(_parse_bytes(args[0]))
+            case "txn":
+                stack.append(self.txn_field(args[0]))
+            case "txna":
+                index = int(args[1])
+                if index >= len(self.call.args):
+                    raise TealError(f"invalid ApplicationArgs index {index}")
+                stack.append(self.call.args[index])
+            case "global":
+                stack.append(self.global_field(args[0]))
+            case "==" | "!=":
+                b, a = self.pop(), self.pop()
+                if type(a) is not type(b):
+                    raise TealError(f"{op} on mismatched types")
+                self.push_int(int((a == b) == (op == "==")))
+            case "<" | ">" | "<=" | ">=":
+                b, a = self.pop_int(), self.pop_int()
+                self.push_int(int({"<": a < b, ">": a > b, "<=": a <= b, ">=": a >= b}[op]))
+            case "&&":
+                b, a = self.pop_int(), self.pop_int()
+                self.push_int(int(bool(a and b)))
+            case "||":
+                b, a = self.pop_int(), self.pop_int()
+                self.push_int(int(bool(a or b)))
+            case "!":
+                self.push_int(int(self.pop_int() == 0))
+            case "+":
+                b, a = self.pop_int(), self.pop_int()
+                self.push_int(a + b)
+            case "-":
+                b, a = self.pop_int(), self.pop_int()
+                self.push_int(a - b)
+            case "*":
+                b, a = self.pop_int(), self.pop_int()
+                self.push_int(a * b)
+            case "/" | "%":
+                b, a = self.pop_int(), self.pop_int()
+                if b == 0:
+                    raise TealError("division by zero")
+                self.push_int(a // b if op == "/" else a % b)
+            case "btoi":
+                value = self.pop_bytes()
+                if len(value) > 8:
+                    raise TealError("btoi arg too long")
+                self.push_int(int.from_bytes(value, "big") if value else 0)
+            case "itob":
+                stack.append(self.pop_int().to_bytes(8, "big"))
+            case "concat":
+                b, a = self.pop_bytes(), self.pop_bytes()
+                if len(a) + len(b) > 4096:
+                    raise TealError("concat produced a too big byteslice")
+                stack.append(a + b)
+            case "len":
+                self.push_int(len(self.pop_bytes()))
+            case "extract":
+                value = self.pop_bytes()
+                start, length = int(args[0]), int(args[1])
+                end = len(value) if length == 0 else start + length
+                if end > len(value):
+                    raise TealError("extract range beyond length of string")
+                stack.append(value[start:end])
+            case "extract3":
+                length, start, value = self.pop_int(), self.pop_int(), self.pop_bytes()
+                if start + length > len(value):
+                    raise TealError("extract range beyond length of string")
+                stack.append(value[start:start + length])
+            case "extract_uint64":
+                start, value = self.pop_int(), self.pop_bytes()
+                if start + 8 > len(value):
+                    raise TealError("extract range beyond length of string")
+                self.push_int(int.from_bytes(value[start:start + 8], "big"))
+            case "replace2":
+                replacement, value = self.pop_bytes(), self.pop_bytes()
+                start = int(args[0])
+                if start + len(replacement) > len(value):
+                    raise TealError("replacement end exceeds original length")
+                stack.append(value[:start] + replacement + value[start + len(replacement):])
+            case "replace3":
+                replacement, start, value = self.pop_bytes(), self.pop_int(), self.pop_bytes()
+                if start + len(replacement) > len(value):
+                    raise TealError("replacement end exceeds original length")
+                stack.append(value[:start] + replacement + value[start + len(replacement):])
+            case "assert":
+                if self.pop_int() == 0:
+                    raise TealError(f"assert failed at line {ins.line}")
+            case "err":
+                raise TealError(f"err opcode executed at line {ins.line}")
+            case "return":
+                return ("return", self.pop_int())
+            case "pop":
+                self.pop()
+            case "dup":
+                value = self.pop()
+                stack.extend([value, value])
+            case "dup2":
+                b, a = self.pop(), self.pop()
+                stack.extend([a, b, a, b])
+            case "swap":
+                b, a = self.pop(), self.pop()
+                stack.extend([b, a])
+            case "select":
+                cond, b, a = self.pop_int(), self.pop(), self.pop()
+                stack.append(b if cond else a)
+            case "cover":
+                depth = int(args[0])
+                value = self.pop()
+                stack.insert(len(stack) - depth, value)
+            case "uncover":
+                depth = int(args[0])
+                if depth >= len(stack):
+                    raise TealError("uncover beyond stack")
+                stack.append(stack.pop(len(stack) - 1 - depth))
+            case "store":
+                self.scratch[int(args[0])] = self.pop()
+            case "load":
+                stack.append(self.scratch[int(args[0])])
+            case "b":
+                return ("jump", self.jump(args[0]))
+            case "bnz":
+                if self.pop_int() != 0:
+                    return ("jump", self.jump(args[0]))
+            case "bz":
+                if self.pop_int() == 0:
+                    return ("jump", self.jump(args[0]))
+            case "match":
+                target = self.pop()
+                candidates = [self.pop() for _ in args][::-1]
+                for label, candidate in zip(args, candidates):
+                    if type(candidate) is type(target) and candidate == target:
+                        return ("jump", self.jump(label))
+            case "switch":
+                index = self.pop_int()
+                if index < len(args):
+                    return ("jump", self.jump(args[index]))
+            case "callsub":
+                # (điểm trở về, frame pointer, số arg, số giá trị trả về, có proto)
+                self.frames.append((pc, len(stack), 0, 0, False))
+                return ("jump", self.jump(args[0]))
+            case "proto":
+                ret_pc, fp, _, _, _ = self.frames.pop()
+                self.frames.append((ret_pc, fp, int(args[0]), int(args[1]), True))
+            case "frame_dig":
+                fp = self.frames[-1][1]
+                stack.append(stack[fp + int(args[0])])
+            case "frame_bury":
+                fp = self.frames[-1][1]
+                value = self.pop()
+                stack[fp + int(args[0])] = value
+            case "retsub":
+                ret_pc, fp, arg_count, returns, has_proto = self.frames.pop()
+                if has_proto:
+                    results = stack[len(stack) - returns:] if returns else []
+                    del stack[fp - arg_count:]
+                    stack.extend(results)
+                return ("jump", ret_pc)
+            case "app_global_get":
+                stack.append(self.state.global_state.get(self.pop_bytes(), 0))
+            case "app_global_get_ex":
+                key, _app = self.pop_bytes(), self.pop()
+                exists = key in self.state.global_state
+                stack.append(self.state.global_state.get(key, 0))
+                self.push_int(int(exists))
+            case "app_global_put":
+                value, key = self.pop(), self.pop_bytes()
+                self.state.global_state[key] = value
+            case "app_global_del":
+                self.state.global_state.pop(self.pop_bytes(), None)
+            case "app_local_get":
+                key, ref = self.pop_bytes(), self.pop()
+                stack.append(self.local_account(ref).get(key, 0))
+            case "app_local_get_ex":
+                key, _app, ref = self.pop_bytes(), self.pop(), self.pop()
+                local = self.local_account(ref)
+                stack.append(local.get(key, 0))
+                self.push_int(int(key in local))
+            case "app_local_put":
+                value, key, ref = self.pop(), self.pop_bytes(), self.pop()
+                self.local_account(ref)[key] = value
+            case "app_local_del":
+                key, ref = self.pop_bytes(), self.pop()
+                self.local_account(ref).pop(key, None)
+            case "box_create":
+                size, name = self.pop_int(), self.pop_bytes()
+                boxes = self.state.boxes
+                if name in boxes:
+                    if len(boxes[name]) != size:
+                        raise TealError("box size mismatch")
+                    self.push_int(0)
+                else:
+                    boxes[name] = bytes(size)
+                    self.push_int(1)
+            case "box_len":
+                name = self.pop_bytes()
+                value = self.state.boxes.get(name)
+                self.push_int(len(value) if value is not None else 0)
+                self.push_int(int(value is not None))
+            case "box_get":
+                name = self.pop_bytes()
+                value = self.state.boxes.get(name)
+                stack.append(value if value is not None else b"")
+                self.push_int(int(value is not None))
+            case "box_put":
+                value, name = self.pop_bytes(), self.pop_bytes()
+                existing = self.state.boxes.get(name)
+                if existing is not None and len(existing) != len(value):
+                    raise TealError("box_put wrong size")
+                self.state.boxes[name] = value
+            case "box_extract":
+                length, start, name = self.pop_int(), self.pop_int(), self.pop_bytes()
+                value = self._box(name)
+                if start + length > len(value):
+                    raise TealError("box_extract out of bounds")
+                stack.append(value[start:start + length])
+            case "box_replace":
+                replacement, start, name = self.pop_bytes(), self.pop_int(), self.pop_bytes()
+                value = self._box(name)
+                if start + len(replacement) > len(value):
+                    raise TealError("box_replace out of bounds")
+                self.state.boxes[name] = value[:start] + replacement + value[start + len(replacement):]
+            case "box_del":
+                name = self.pop_bytes()
+                self.push_int(int(self.state.boxes.pop(name, None) is not None))
+            case _:
+                raise TealError(f"unsupported opcode {op}")
+        return None
+
+    def _box(self, name: bytes) -> bytes:
+        if name not in self.state.boxes:
+            raise TealError("no such box")
+        return self.state.boxes[name]
+
+
+def nfticket_method_results(source: str, event_id: int = 1) -> dict[str, EvalResult]:
+    """Evaluates each NFTicket method once on a fresh app with representative args.
+
+    `event_id` events are created first so the call is measured for that id.
+    """
+    from smart_contracts._helpers.app_args import (
+        add_attendant_args,
+        create_event_args,
+        stop_event_args,
+    )
+
+    program = Program.parse(source)
+    creator, attendant = b"C" * 32, b"A" * 32
+    results: dict[str, EvalResult] = {}
+
+    def run(name: str, call: AppCall, state: AppState) -> AppState:
+        result = evaluate(program, call, state)
+        if not result.approved:
+            raise TealError(f"{name} rejected: {result.error}")
+        results[name] = result
+        return result.state
+
+    state = run("create", AppCall(creator, app_id=0, creator=creator), AppState())
+    for _ in range(event_id):
+        state = run("create_event", AppCall(creator, create_event_args(1, 100, 10), creator=creator), state)
+    state = run("add_attendant", AppCall(attendant, add_attendant_args(event_id), creator=creator), state)
+    run("stop_event", AppCall(creator, stop_event_args(event_id), creator=creator, latest_timestamp=100), state)
+    return results
+
+
+def nfticket_method_costs(source: str, event_id: int = 1) -> dict[str, int]:
+    """Measures the opcode cost of each NFTicket method on a fresh app."""
+    return {name: result.cost for name, result in nfticket_method_results(source, event_id).items()}
+
+
+if __name__ == "__main__":
+    import sys
+
+    with open(sys.argv[1] if len(sys.argv) > 1 else "approval.teal") as f:
+        teal_source = f.read()
+    event_ids = [int(arg) for arg in sys.argv[2:]] or [1]
+    for event_id in event_ids:
+        print(f"event_id={event_id}: {nfticket_method_costs(teal_source, event_id)}")
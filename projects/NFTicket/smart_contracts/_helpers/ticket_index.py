@@ -0,0 +1,277 @@
+# ticket_index.py
+
+# Chỉ mục SQLite của các lời gọi create_event / add_attendant / stop_event,
+# xây từ lịch sử giao dịch trên indexer để tra cứu người tham gia và số vé bán theo phút.
+
+import argparse
+import base64
+import json
+import os
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from typing import Protocol
+
+from algosdk.v2client.indexer import IndexerClient
+
+from smart_contracts._helpers.env import load_env
+
+APP_ID = 724732255  # Application ID mới của bạn
+PAGE_LIMIT = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY,
+    nft_id INTEGER NOT NULL,
+    end_timestamp INTEGER NOT NULL,
+    ticket_count INTEGER NOT NULL,
+    created_round INTEGER NOT NULL,
+    created_txid TEXT NOT NULL,
+    stopped_round INTEGER
+);
+CREATE TABLE IF NOT EXISTS sales (
+    event_id INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    ticket_number INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    round_time INTEGER NOT NULL,
+    txid TEXT NOT NULL,
+    PRIMARY KEY (event_id, address)
+);
+CREATE INDEX IF NOT EXISTS sales_round ON sales (round);
+CREATE INDEX IF NOT EXISTS sales_event_time ON sales (event_id, round_time);
+CREATE TABLE IF NOT EXISTS seen_txns (
+    txid TEXT PRIMARY KEY,
+    round INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    app_id INTEGER PRIMARY KEY,
+    round INTEGER NOT NULL
+);
+"""
+
+
+class TransactionFeed(Protocol):
+    """The part of IndexerClient the indexer pages through; a recorded feed can stand in."""
+
+    def search_transactions(self, **kwargs) -> dict: ...
+
+
+class RecordedFeed:
+    """Serves a recorded list of indexer transactions the way search_transactions pages them."""
+
+    def __init__(self, transactions: list[dict]):
+        self.transactions = sorted(transactions, key=lambda t: (t['confirmed-round'], t.get('intra-round-offset', 0)))
+
+    @classmethod
+    def from_file(cls, path: str) -> "RecordedFeed":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def search_transactions(self, application_id=None, min_round=None, next_page=None, limit=PAGE_LIMIT, **kwargs) -> dict:
+        matching = [
+            t for t in self.transactions
+            if (min_round is None or t['confirmed-round'] >= min_round)
+            and (application_id is None or t.get('application-transaction', {}).get('application-id') == application_id)
+        ]
+        start = int(next_page or 0)
+        page = matching[start:start + limit]
+        response = {'transactions': page}
+        if start + limit < len(matching):
+            response['next-token'] = str(start + limit)
+        return response
+
+
+def _uint_arg(value: bytes) -> int:
+    return int.from_bytes(value, 'big')
+
+
+def _event_count_delta(txn: dict) -> int | None:
+    for item in txn.get('global-state-delta', []):
+        if base64.b64decode(item['key']) == b"event_count":
+            return item['value'].get('uint')
+    return None
+
+
+class TicketIndex:
+    """SQLite store of NFTicket app calls, filled from an indexer transaction feed.
+
+    The feed only holds confirmed calls, which the approval program has
+    already validated, so each one is applied as is in confirmation order.
+    Each page is committed together with the checkpoint round and the
+    txids it contained, which makes `sync()` resumable and safe to re-run.
+    Since a sync resumes from the checkpoint round itself, only the txids
+    of that round are kept; older ones are pruned with each page.
+    """
+
+    def __init__(self, db_path: str, app_id: int):
+        self.app_id = app_id
+        self.db = sqlite3.connect(db_path)
+        self._migrate()
+        self.db.executescript(SCHEMA)
+        self.db.execute("INSERT OR IGNORE INTO checkpoint (app_id, round) VALUES (?, 0)", (app_id,))
+        self.db.commit()
+
+    def _migrate(self) -> None:
+        # Chỉ mục tạo bởi phiên bản cũ: seen_txns chưa có cột round, checkpoint còn cột creator
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(seen_txns)")}
+        with self.db:
+            if columns and "round" not in columns:
+                # Các txid cũ được coi như thuộc round của checkpoint, bị xoá khi checkpoint vượt qua round đó
+                self.db.execute("ALTER TABLE seen_txns ADD COLUMN round INTEGER NOT NULL DEFAULT 0")
+                self.db.execute("UPDATE seen_txns SET round = (SELECT COALESCE(MAX(round), 0) FROM checkpoint)")
+            if "creator" in {row[1] for row in self.db.execute("PRAGMA table_info(checkpoint)")}:
+                self.db.execute("ALTER TABLE checkpoint DROP COLUMN creator")
+
+    @property
+    def checkpoint(self) -> int:
+        return self.db.execute("SELECT round FROM checkpoint WHERE app_id = ?", (self.app_id,)).fetchone()[0]
+
+    def pages(self, feed: TransactionFeed, limit: int = PAGE_LIMIT) -> Iterator[list[dict]]:
+        """Yields pages of the app's transactions from the checkpoint round on."""
+        # Bắt đầu lại từ chính round của checkpoint: các txid đã xử lý sẽ bị bỏ qua
+        min_round = self.checkpoint
+        next_page = None
+        while True:
+            response = feed.search_transactions(
+                application_id=self.app_id,
+                min_round=min_round,
+                next_page=next_page,
+                limit=limit,
+            )
+            transactions = response.get('transactions', [])
+            if transactions:
+                yield transactions
+            next_page = response.get('next-token')
+            if not transactions or not next_page:
+                return
+
+    def sync(self, feed: TransactionFeed, limit: int = PAGE_LIMIT) -> int:
+        """Indexes every new transaction in the feed; returns how many were applied."""
+        applied = 0
+        for page in self.pages(feed, limit):
+            applied += self.ingest(page)
+        return applied
+
+    def follow(self, feed: TransactionFeed, poll_interval: float = 2.8) -> None:
+        while True:
+            self.sync(feed)
+            time.sleep(poll_interval)
+
+    def ingest(self, transactions: Iterable[dict]) -> int:
+        """Applies one page of indexer transactions in a single SQLite transaction."""
+        applied = 0
+        last_round = self.checkpoint
+        with self.db:
+            for txn in transactions:
+                last_round = max(last_round, txn['confirmed-round'])
+                seen = self.db.execute(
+                    "INSERT OR IGNORE INTO seen_txns (txid, round) VALUES (?, ?)", (txn['id'], txn['confirmed-round'])
+                )
+                if seen.rowcount == 0:
+                    continue
+                call = txn.get('application-transaction')
+                if call is None or call.get('application-id') != self.app_id:
+                    continue
+                applied += self._apply(txn, call)
+            self.db.execute("UPDATE checkpoint SET round = ? WHERE app_id = ?", (last_round, self.app_id))
+            # Lần sync sau bắt đầu từ round của checkpoint, nên txid của các round trước đó không cần nữa
+            self.db.execute("DELETE FROM seen_txns WHERE round < ?", (last_round,))
+        return applied
+
+    def _apply(self, txn: dict, call: dict) -> int:
+        if call.get('on-completion', 'noop') != 'noop':
+            return 0
+        args = [base64.b64decode(arg) for arg in call.get('application-args', [])]
+        if not args:
+            return 0
+        method, sender, round_num = args[0], txn['sender'], txn['confirmed-round']
+
+        # Giao dịch đã xác nhận nghĩa là hợp đồng đã kiểm tra người gửi, tham số và số vé còn lại
+        if method == b"create_event":
+            event_id = _event_count_delta(txn)
+            if event_id is None:
+                return 0
+            self.db.execute(
+                "INSERT OR IGNORE INTO events (event_id, nft_id, end_timestamp, ticket_count, created_round, created_txid)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (event_id, _uint_arg(args[1]), _uint_arg(args[2]), _uint_arg(args[3]), round_num, txn['id']),
+            )
+            return 1
+        if method == b"stop_event":
+            self.db.execute(
+                "UPDATE events SET stopped_round = COALESCE(stopped_round, ?) WHERE event_id = ?",
+                (round_num, _uint_arg(args[1])),
+            )
+            return 1
+        if method == b"add_attendant":
+            return self._record_sale(_uint_arg(args[1]), sender, txn)
+        return 0
+
+    def _record_sale(self, event_id: int, address: str, txn: dict) -> int:
+        issued = self.db.execute("SELECT COUNT(*) FROM sales WHERE event_id = ?", (event_id,)).fetchone()[0]
+        self.db.execute(
+            "INSERT INTO sales (event_id, address, ticket_number, round, round_time, txid)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (event_id, address, issued + 1, txn['confirmed-round'], txn.get('round-time', 0), txn['id']),
+        )
+        return 1
+
+    def attendees(self, event_id: int) -> list[tuple[str, int, int]]:
+        """(address, ticket_number, round) for every ticket sold for the event."""
+        return self.db.execute(
+            "SELECT address, ticket_number, round FROM sales WHERE event_id = ? ORDER BY ticket_number",
+            (event_id,),
+        ).fetchall()
+
+    def has_ticket(self, event_id: int, address: str) -> bool:
+        return self.db.execute(
+            "SELECT 1 FROM sales WHERE event_id = ? AND address = ?", (event_id, address)
+        ).fetchone() is not None
+
+    def sales_per_minute(self, event_id: int | None = None) -> list[tuple[int, int]]:
+        """(minute start as unix time, tickets sold) in time order."""
+        if event_id is None:
+            query, params = "SELECT round_time / 60 * 60 AS minute, COUNT(*) FROM sales GROUP BY minute ORDER BY minute", ()
+        else:
+            query = (
+                "SELECT round_time / 60 * 60 AS minute, COUNT(*) FROM sales WHERE event_id = ?"
+                " GROUP BY minute ORDER BY minute"
+            )
+            params = (event_id,)
+        return self.db.execute(query, params).fetchall()
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def get_indexer_client() -> IndexerClient:
+    load_env()
+    return IndexerClient(os.getenv('NODELY_API_KEY', ''), os.getenv('NODELY_INDEXER_URL', ''))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chỉ mục vé NFTicket từ lịch sử giao dịch")
+    parser.add_argument("--db", default="tickets.sqlite")
+    parser.add_argument("--app-id", type=int, default=APP_ID)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync")
+    sub.add_parser("follow")
+    attendees_parser = sub.add_parser("attendees")
+    attendees_parser.add_argument("event_id", type=int)
+    sales_parser = sub.add_parser("sales")
+    sales_parser.add_argument("--event", type=int)
+    args = parser.parse_args()
+
+    indexer = get_indexer_client()
+    index = TicketIndex(args.db, args.app_id)
+    if args.command == "sync":
+        print(f"Đã lập chỉ mục {index.sync(indexer)} lời gọi, checkpoint round {index.checkpoint}")
+    elif args.command == "follow":
+        index.follow(indexer)
+    elif args.command == "attendees":
+        for address, ticket_number, round_num in index.attendees(args.event_id):
+            print(f"{ticket_number}\t{address}\tround {round_num}")
+    else:
+        for minute, count in index.sales_per_minute(args.event):
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(minute))}\t{count}")
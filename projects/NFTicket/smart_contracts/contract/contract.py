@@ -2,40 +2,29 @@ from pyteal import *
 import json
 
 def approval_program():
-    MAX_EVENTS = Int(5)
     MAX_ATTENDANTS = Int(100)  # Giới hạn số người tham gia cho mỗi sự kiện
     EVENT_COUNT = Bytes("event_count")
-    EVENT_NFT_PREFIX = Bytes("event_")
-    NFT_ID_SUFFIX = Bytes("_nft_id")
-    EVENT_END_PREFIX = Bytes("event_end_")
-    EVENT_STOPPED_PREFIX = Bytes("event_stopped_")
-    EVENT_ATTENDANTS_PREFIX = Bytes("event_attendants_")
-    EVENT_TICKET_COUNT_PREFIX = Bytes("event_ticket_count_")
-    EVENT_TICKET_ISSUED_PREFIX = Bytes("event_ticket_issued_")
 
-    # Helper function to convert integer to its ASCII byte representation
-    def int_to_str(i):
-        return If(
-            i == Int(1),
-            Bytes("1"),
-            If(
-                i == Int(2),
-                Bytes("2"),
-                If(
-                    i == Int(3),
-                    Bytes("3"),
-                    If(
-                        i == Int(4),
-                        Bytes("4"),
-                        If(
-                            i == Int(5),
-                            Bytes("5"),
-                            Bytes("")  # Fallback, should not happen due to MAX_EVENTS
-                        )
-                    )
-                )
-            )
-        )
+    # Mỗi sự kiện là một box tên Itob(event_id) chứa 5 số uint64 liên tiếp
+    # (bố cục phải khớp với smart_contracts/_helpers/event_box.py)
+    NFT_ID_OFFSET = Int(0)
+    END_OFFSET = Int(8)
+    STOPPED_OFFSET = Int(16)
+    TICKET_COUNT_OFFSET = Int(24)  # Tổng số vé (không đổi), theo sau là số vé đã phát hành
+    TICKET_ISSUED_OFFSET = Int(32)  # Số vé còn lại = tổng số vé - số vé đã phát hành
+
+    # Mỗi người tham gia là một box tên Itob(event_id) + địa chỉ, chứa số thứ tự vé
+    ATTENDANT_BOX_SIZE = Int(8)
+
+    # Tên box của sự kiện, tính một lần mỗi lời gọi và lưu vào scratch slot
+    event_key = ScratchVar(TealType.bytes)
+    # Cặp (tổng số vé, số vé đã phát hành) đọc một lần từ box
+    tickets = ScratchVar(TealType.bytes)
+    attendant_key = ScratchVar(TealType.bytes)
+    ticket_number = ScratchVar(TealType.uint64)
+
+    def event_uint(offset):
+        return Btoi(App.box_extract(event_key.load(), offset, Int(8)))
 
     # On Creation: Initialize event_count to 0
     on_creation = Seq([
@@ -43,125 +32,75 @@ def approval_program():
         Return(Int(1))
     ])
 
-    # Conditions to handle create_event
-    create_event = And(
-        Txn.application_args.length() == Int(4),
-        Txn.application_args[0] == Bytes("create_event"),
-        Txn.sender() == Global.creator_address()
-    )
-
+    # Mỗi handler tự kiểm tra số argument và quyền của người gọi,
+    # nên việc phân nhánh chỉ cần so sánh argument đầu tiên một lần
     handle_create_event = Seq([
-        # Kiểm tra không vượt quá MAX_EVENTS
-        Assert(App.globalGet(EVENT_COUNT) < MAX_EVENTS),
+        Assert(Txn.application_args.length() == Int(4)),
+        Assert(Txn.sender() == Global.creator_address()),
         # Tăng event_count
         App.globalPut(EVENT_COUNT, App.globalGet(EVENT_COUNT) + Int(1)),
-        # Lưu nft_id vào global state với key tương ứng
-        App.globalPut(
-            Concat(
-                EVENT_NFT_PREFIX,
-                int_to_str(App.globalGet(EVENT_COUNT)),
-                NFT_ID_SUFFIX
-            ),
-            Btoi(Txn.application_args[1])
-        ),
-        # Lưu end_timestamp vào global state với key tương ứng
-        App.globalPut(
-            Concat(
-                EVENT_END_PREFIX,
-                int_to_str(App.globalGet(EVENT_COUNT))
-            ),
-            Btoi(Txn.application_args[2])
-        ),
-        # Lưu trạng thái stopped vào global state với key tương ứng
-        App.globalPut(
-            Concat(
-                EVENT_STOPPED_PREFIX,
-                int_to_str(App.globalGet(EVENT_COUNT))
-            ),
-            Int(0)
-        ),
-        # Khởi tạo số lượng vé cho sự kiện
-        App.globalPut(
-            Concat(
-                EVENT_TICKET_COUNT_PREFIX,
-                int_to_str(App.globalGet(EVENT_COUNT))
-            ),
-            Btoi(Txn.application_args[3])  # Số lượng vé cho sự kiện
-        ),
-        App.globalPut(
+        event_key.store(Itob(App.globalGet(EVENT_COUNT))),
+        # Tạo box cho sự kiện và ghi nft_id, end_timestamp, stopped = 0, số vé và số vé đã phát hành = 0
+        App.box_put(
+            event_key.load(),
             Concat(
-                EVENT_TICKET_ISSUED_PREFIX,
-                int_to_str(App.globalGet(EVENT_COUNT))
-            ),
-            Int(0)
+                Itob(Btoi(Txn.application_args[1])),
+                Itob(Btoi(Txn.application_args[2])),
+                Itob(Int(0)),
+                Itob(Btoi(Txn.application_args[3])),  # Số lượng vé cho sự kiện
+                Itob(Int(0))
+            )
         ),
         Return(Int(1))
     ])
 
-    # Conditions to handle stop_event
-    stop_event = And(
-        Txn.application_args.length() == Int(2),
-        Txn.application_args[0] == Bytes("stop_event"),
-        Txn.sender() == Global.creator_address()
-    )
-
     # Handle stop_event
     handle_stop_event = Seq([
+        Assert(Txn.application_args.length() == Int(2)),
+        Assert(Txn.sender() == Global.creator_address()),
         Assert(Btoi(Txn.application_args[1]) <= App.globalGet(EVENT_COUNT)),
-        Assert(Global.latest_timestamp() >= App.globalGet(
-            Concat(EVENT_END_PREFIX, int_to_str(Btoi(Txn.application_args[1]))))),
-        App.globalPut(
-            Concat(EVENT_STOPPED_PREFIX, int_to_str(Btoi(Txn.application_args[1]))),
-            Int(1)
-        ),
+        event_key.store(Itob(Btoi(Txn.application_args[1]))),
+        Assert(Global.latest_timestamp() >= event_uint(END_OFFSET)),
+        App.box_replace(event_key.load(), STOPPED_OFFSET, Itob(Int(1))),
         Return(Int(1))
     ])
 
-    # Conditions to handle add_attendant
-    add_attendant = And(
-        Txn.application_args.length() == Int(2),
-        Txn.application_args[0] == Bytes("add_attendant"),
-        App.globalGet(EVENT_COUNT) >= Btoi(Txn.application_args[1]),  # Sự kiện phải tồn tại
-        App.globalGet(Concat(EVENT_TICKET_COUNT_PREFIX, int_to_str(Btoi(Txn.application_args[1])))) > Int(0)  # Còn vé
-    )
-
     # Handle add_attendant
     handle_add_attendant = Seq([
-        # Lấy giá trị local của người dùng và lưu vào MaybeValue
-        (attendant_value := App.localGetEx(Txn.sender(), App.id(), Concat(EVENT_ATTENDANTS_PREFIX, int_to_str(Btoi(Txn.application_args[1]))))),
-        # Đảm bảo người dùng chưa tham gia sự kiện này
-        Assert(Not(attendant_value.hasValue())),
-        # Cập nhật người tham gia mới
-        App.localPut(
-            Txn.sender(), 
-            Concat(EVENT_ATTENDANTS_PREFIX, int_to_str(Btoi(Txn.application_args[1]))), 
-            Int(1)
-        ),
-        # Phát hành vé (giảm số vé còn lại và tăng số vé phát hành)
-        App.globalPut(
-            Concat(EVENT_TICKET_COUNT_PREFIX, int_to_str(Btoi(Txn.application_args[1]))),
-            App.globalGet(Concat(EVENT_TICKET_COUNT_PREFIX, int_to_str(Btoi(Txn.application_args[1])))) - Int(1)
-        ),
-        App.globalPut(
-            Concat(EVENT_TICKET_ISSUED_PREFIX, int_to_str(Btoi(Txn.application_args[1]))),
-            App.globalGet(Concat(EVENT_TICKET_ISSUED_PREFIX, int_to_str(Btoi(Txn.application_args[1])))) + Int(1)
-        ),
+        # Box không tồn tại (sự kiện chưa được tạo) thì box_extract sẽ thất bại
+        event_key.store(Itob(Btoi(Txn.application_args[1]))),
+        tickets.store(App.box_extract(event_key.load(), TICKET_COUNT_OFFSET, Int(16))),
+        # Từ chối sự kiện đã bán hết ngay sau lần đọc box đầu tiên
+        Assert(ExtractUint64(tickets.load(), Int(8)) < ExtractUint64(tickets.load(), Int(0))),
+        Assert(Txn.application_args.length() == Int(2)),
+        attendant_key.store(Concat(event_key.load(), Txn.sender())),
+        # box_create trả về 0 nếu box đã tồn tại: người dùng đã tham gia sự kiện này
+        Assert(App.box_create(attendant_key.load(), ATTENDANT_BOX_SIZE)),
+        ticket_number.store(ExtractUint64(tickets.load(), Int(8)) + Int(1)),
+        # Lưu số thứ tự vé của người tham gia
+        App.box_replace(attendant_key.load(), Int(0), Itob(ticket_number.load())),
+        # Phát hành vé: chỉ cần ghi số vé đã phát hành, số vé còn lại được suy ra
+        App.box_replace(event_key.load(), TICKET_ISSUED_OFFSET, Itob(ticket_number.load())),
         Return(Int(1))
     ])
 
+    # Phân nhánh theo tên phương thức; add_attendant được gọi nhiều nhất nên kiểm tra trước.
+    # Phương thức không xác định thì không khớp nhánh nào và bị từ chối
+    method = Txn.application_args[0]
+    dispatch = Cond(
+        [method == Bytes("add_attendant"), handle_add_attendant],
+        [method == Bytes("create_event"), handle_create_event],
+        [method == Bytes("stop_event"), handle_stop_event],
+    )
 
     # Main program logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],  # App creation
-        [Txn.on_completion() == OnComplete.OptIn, Return(Int(1))],  # Allow opt-in
-        [create_event, handle_create_event],  # Create event logic
-        [stop_event, handle_stop_event],  # Stop event logic
-        [add_attendant, handle_add_attendant],  # Add attendant logic
-        [Txn.on_completion() == OnComplete.NoOp, Return(Int(1))],  # Handle NoOp transactions
-        [Txn.on_completion() == OnComplete.CloseOut, Return(Int(1))],  # Allow CloseOut
-        [Txn.on_completion() == OnComplete.ClearState, Return(Int(1))],  # Allow ClearState
-        [Txn.on_completion() == OnComplete.UpdateApplication, Return(Int(0))],  # Disallow Update
-        [Txn.on_completion() == OnComplete.DeleteApplication, Return(Int(0))]  # Disallow Delete
+        [Txn.on_completion() == OnComplete.NoOp, dispatch],  # Method calls
+        # Opt-in không còn cần thiết, vẫn cho phép để tương thích; CloseOut cũng được phép.
+        # UpdateApplication và DeleteApplication không khớp nhánh nào nên bị từ chối
+        [Txn.on_completion() == OnComplete.OptIn, Return(Int(1))],
+        [Txn.on_completion() == OnComplete.CloseOut, Return(Int(1))],
     )
 
     return program
@@ -180,7 +119,7 @@ def generate_app_spec():
         "clear_state_program": "clear_state.teal",
         "global_state": {
             "schema": {
-                "num_uints": 16,  # Tổng số uints được sử dụng trong global state
+                "num_uints": 1,  # Chỉ còn event_count, dữ liệu sự kiện nằm trong box
                 "num_byte_slices": 0
             },
             "defaults": [
@@ -189,42 +128,62 @@ def generate_app_spec():
                     "type": "uint64",
                     "description": "Total number of events created",
                     "default_value": 0
-                },
-                {
-                    "name": "event_x_nft_id",
-                    "type": "uint64",
-                    "description": "NFT ID for event x",
-                    "default_value": 0
-                },
-                {
-                    "name": "event_x_end",
-                    "type": "uint64",
-                    "description": "End timestamp for event x",
-                    "default_value": 0
-                },
-                {
-                    "name": "event_x_stopped",
-                    "type": "uint64",
-                    "description": "Stopped state for event x (1 if stopped, 0 if active)",
-                    "default_value": 0
-                },
-                {
-                    "name": "event_x_ticket_count",
-                    "type": "uint64",
-                    "description": "Number of tickets remaining for event x",
-                    "default_value": 0
-                },
-                {
-                    "name": "event_x_ticket_issued",
-                    "type": "uint64",
-                    "description": "Number of tickets issued for event x",
-                    "default_value": 0
                 }
             ]
         },
+        "boxes": {
+            "event": {
+                "name": "Itob(event_id), 8-byte big-endian event id",
+                "size": 40,
+                "fields": [
+                    {
+                        "name": "nft_id",
+                        "type": "uint64",
+                        "offset": 0,
+                        "description": "NFT ID associated with the event"
+                    },
+                    {
+                        "name": "end",
+                        "type": "uint64",
+                        "offset": 8,
+                        "description": "End timestamp for the event"
+                    },
+                    {
+                        "name": "stopped",
+                        "type": "uint64",
+                        "offset": 16,
+                        "description": "Stopped state (1 if stopped, 0 if active)"
+                    },
+                    {
+                        "name": "ticket_count",
+                        "type": "uint64",
+                        "offset": 24,
+                        "description": "Total number of tickets for the event; remaining = ticket_count - ticket_issued"
+                    },
+                    {
+                        "name": "ticket_issued",
+                        "type": "uint64",
+                        "offset": 32,
+                        "description": "Number of tickets issued for the event"
+                    }
+                ]
+            },
+            "attendant": {
+                "name": "Itob(event_id) + 32-byte attendant address",
+                "size": 8,
+                "fields": [
+                    {
+                        "name": "ticket_number",
+                        "type": "uint64",
+                        "offset": 0,
+                        "description": "Serial number of the ticket issued to the attendant"
+                    }
+                ]
+            }
+        },
         "local_state": {
             "schema": {
-                "num_uints": 1,  # Mỗi người tham gia có thể lưu trạng thái của việc tham gia vào local state
+                "num_uints": 0,  # Việc tham gia được lưu trong box, không cần local state
                 "num_byte_slices": 0
             }
         },
@@ -296,12 +255,12 @@ if __name__ == "__main__":
 
     # Compile approval program
     with open("approval.teal", "w") as f:
-        compiled_approval = compileTeal(approval_program(), mode=Mode.Application, version=5)
+        compiled_approval = compileTeal(approval_program(), mode=Mode.Application, version=8)
         f.write(compiled_approval)
 
     # Compile clear state program
     with open("clear_state.teal", "w") as f:
-        compiled_clear_state = compileTeal(clear_state_program(), mode=Mode.Application, version=5)
+        compiled_clear_state = compileTeal(clear_state_program(), mode=Mode.Application, version=8)
         f.write(compiled_clear_state)
 
     # Xuất ra file application.json theo chuẩn ARC-4
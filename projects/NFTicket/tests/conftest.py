@@ -0,0 +1,28 @@
+import pytest
+from algosdk import account
+
+from smart_contracts._helpers.create_event import call_create_event
+from smart_contracts._helpers.fake_algod import FakeAlgod
+
+
+@pytest.fixture
+def creator() -> tuple[str, str]:
+    """(private key, address) of the account that owns the fake app."""
+    return account.generate_account()
+
+
+@pytest.fixture
+def fake(creator) -> FakeAlgod:
+    return FakeAlgod(creator[1])
+
+
+@pytest.fixture
+def create_event(fake, creator):
+    """Creates an event on the fake app; returns its id."""
+
+    def create(ticket_count: int = 10, end_timestamp: int = 2_000_000_000, nft_id: int = 1) -> int:
+        event_id = call_create_event(fake.app_id, nft_id, end_timestamp, ticket_count, fake, creator[0])
+        assert event_id is not None
+        return event_id
+
+    return create
@@ -0,0 +1,92 @@
+from algosdk import account, encoding
+
+from smart_contracts._helpers.app_state import AppStateReader
+from smart_contracts._helpers.create_event import call_create_event
+from smart_contracts._helpers.fake_algod import FakeAlgod
+from smart_contracts._helpers.manage_attendants import register_attendant
+
+
+def advance(fake: FakeAlgod, rounds: int) -> None:
+    for _ in range(rounds):
+        fake.status_after_block(fake.round)
+
+
+def test_new_rounds_refetch_only_touched_and_new_event_boxes(fake, create_event):
+    for _ in range(20):
+        create_event()
+    reader = AppStateReader(fake)
+    first = reader.read(fake.app_id)
+    assert reader.boxes_read == 20
+
+    register_attendant(fake.app_id, 7, fake, account.generate_account()[0])
+    create_event()
+    second = reader.read(fake.app_id)
+
+    assert reader.boxes_read == 22
+    assert second.event_count == 21 and set(second.events) == set(range(1, 22))
+    assert second.events[7].issued == 1
+    assert second.events[8] is first.events[8]
+    assert second.round == fake.round
+
+
+def test_rounds_without_app_calls_read_no_boxes(fake, create_event):
+    create_event()
+    reader = AppStateReader(fake)
+    reader.read(fake.app_id)
+    advance(fake, 3)
+
+    snapshot = reader.read(fake.app_id)
+
+    assert reader.boxes_read == 1
+    assert snapshot.round == fake.round
+
+
+def test_cache_far_behind_is_rebuilt_from_all_boxes(fake, create_event):
+    for _ in range(3):
+        create_event()
+    reader = AppStateReader(fake, max_block_scan=2)
+    reader.read(fake.app_id)
+    advance(fake, 5)
+
+    reader.read(fake.app_id)
+
+    assert reader.boxes_read == 6
+
+
+class MovingAlgod(FakeAlgod):
+    """Produces a block right before answering each box read, like a node that moved on."""
+
+    def application_box_by_name(self, *args, **kwargs):
+        with self._lock:
+            self._produce_block()
+        return super().application_box_by_name(*args, **kwargs)
+
+
+def test_snapshot_round_is_the_round_the_boxes_were_read_at(creator):
+    fake = MovingAlgod(creator[1])
+    assert call_create_event(fake.app_id, 1, 2_000_000_000, 5, fake, creator[0]) == 1
+    status_round = fake.status()["last-round"]
+
+    snapshot = AppStateReader(fake).read(fake.app_id, status_round)
+
+    assert snapshot.round == status_round + 1
+    assert snapshot.events[1].capacity == 5
+
+
+def test_event_read_overlapping_an_invalidate_is_not_cached(fake, create_event, creator):
+    event_id = create_event(ticket_count=2)
+    reader = AppStateReader(fake)
+    box_by_name = fake.application_box_by_name
+
+    def read_then_sell(*args, **kwargs):
+        # Vé được bán và cache bị xoá sau khi box đã được đọc, trong cùng round
+        box = box_by_name(*args, **kwargs)
+        fake.simulator.call(encoding.decode_address(account.generate_account()[1]), [b"add_attendant", event_id.to_bytes(8, "big")])
+        reader.invalidate(fake.app_id)
+        return box
+
+    fake.application_box_by_name = read_then_sell
+    assert reader.event(fake.app_id, event_id).issued == 0
+    fake.application_box_by_name = box_by_name
+
+    assert reader.event(fake.app_id, event_id).issued == 1
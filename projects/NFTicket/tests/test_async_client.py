@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from algosdk import account, error
+
+from smart_contracts._helpers.async_client import NFTicketClient
+from smart_contracts._helpers.fake_algod import FakeAlgod, mock_transport
+
+
+class CountingAlgod(FakeAlgod):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls: dict[str, int] = {}
+
+    def block_info(self, *args, **kwargs):
+        self.calls["block_info"] = self.calls.get("block_info", 0) + 1
+        return super().block_info(*args, **kwargs)
+
+    def pending_transaction_info(self, *args, **kwargs):
+        self.calls["pending_transaction_info"] = self.calls.get("pending_transaction_info", 0) + 1
+        return super().pending_transaction_info(*args, **kwargs)
+
+
+@pytest.fixture
+def node(creator) -> CountingAlgod:
+    return CountingAlgod(creator[1])
+
+
+def client_for(node: FakeAlgod, private_key: str) -> NFTicketClient:
+    return NFTicketClient(
+        node.app_id, algod_address="http://fake-algod", algod_token="", private_key=private_key,
+        transport=mock_transport(node),
+    )
+
+
+def test_calls_are_confirmed_from_blocks_over_http(node, creator):
+    async def scenario():
+        async with client_for(node, creator[0]) as client:
+            created = await client.create_event(1, 2_000_000_000, 5)
+            buyers = [account.generate_account()[0] for _ in range(5)]
+            bought = await asyncio.gather(*(client.add_attendant(1, key) for key in buyers))
+            return created, bought
+
+    created, bought = asyncio.run(scenario())
+
+    assert created["confirmed-round"] > 0
+    assert all(info["confirmed-round"] > 0 for info in bought)
+    assert node.simulator.events[1][4] == 5
+    assert "pending_transaction_info" not in node.calls
+    assert node.calls["block_info"] <= node.round
+
+
+def test_rejected_call_raises(node, creator):
+    async def scenario():
+        async with client_for(node, creator[0]) as client:
+            await client.create_event(1, 2_000_000_000, 1)
+            await client.add_attendant(1, account.generate_account()[0])
+            await client.add_attendant(1, account.generate_account()[0])
+
+    with pytest.raises(error.AlgodHTTPError, match="logic eval error"):
+        asyncio.run(scenario())
+
+
+def test_watch_times_out_when_the_transaction_never_lands(node, creator):
+    async def scenario():
+        async with client_for(node, creator[0]) as client:
+            return await client.confirmations.wait("A" * 52, timeout_rounds=2)
+
+    with pytest.raises(error.ConfirmationTimeoutError):
+        asyncio.run(scenario())
+    assert node.calls["pending_transaction_info"] == 1
+
+
+def test_concurrent_create_event_calls_reference_distinct_boxes(node, creator):
+    async def scenario():
+        async with client_for(node, creator[0]) as client:
+            return await asyncio.gather(*(client.create_event(nft_id, 2_000_000_000, 3) for nft_id in range(1, 5)))
+
+    created = asyncio.run(scenario())
+
+    assert all(info["confirmed-round"] > 0 for info in created)
+    assert node.simulator.event_count == 4
+    assert sorted(record[0] for record in node.simulator.events.values()) == [1, 2, 3, 4]
+
+
+def test_async_waiter_shares_the_retry_and_deadline_rules(creator, monkeypatch):
+    from smart_contracts._helpers import confirmation
+
+    class FlakyAlgod(CountingAlgod):
+        outage = True
+
+        def status_after_block(self, *args, **kwargs):
+            self.calls["status_after_block"] = self.calls.get("status_after_block", 0) + 1
+            if self.outage:
+                raise error.AlgodHTTPError("service unavailable", 503)
+            return super().status_after_block(*args, **kwargs)
+
+    monkeypatch.setattr(confirmation, "BACKOFF_SECONDS", 0.01)
+    node = FlakyAlgod(creator[1])
+
+    async def scenario():
+        async with client_for(node, creator[0]) as client:
+            # Chỉ watch này có hạn theo đồng hồ ngắn
+            tracker = client.confirmations._tracker
+            tracker.round_seconds, round_seconds = 0.01, tracker.round_seconds
+            short = client.confirmations.watch("A" * 52, timeout_rounds=1)
+            tracker.round_seconds = round_seconds
+            created = asyncio.ensure_future(client.create_event(1, 2_000_000_000, 5))
+            with pytest.raises(error.AlgodHTTPError):
+                await short
+            assert not created.done()
+            node.outage = False
+            return await created
+
+    assert asyncio.run(scenario())["confirmed-round"] > 0
+    assert node.calls["status_after_block"] >= 2
@@ -0,0 +1,66 @@
+from algosdk import account, error
+
+from smart_contracts._helpers.batch_attendants import MAX_GROUP_SIZE, Purchase, issue_tickets
+from smart_contracts._helpers.create_event import call_create_event
+from smart_contracts._helpers.fake_algod import FakeAlgod
+from smart_contracts._helpers.manage_attendants import register_attendant
+
+
+def buyers(count: int) -> list[str]:
+    return [account.generate_account()[0] for _ in range(count)]
+
+
+def test_full_groups_are_submitted_once(fake, create_event):
+    event_id = create_event(ticket_count=40)
+    keys = buyers(2 * MAX_GROUP_SIZE + 3)
+    submitted_before = len(fake.groups)
+
+    report = issue_tickets(fake, fake.app_id, [Purchase(key, event_id) for key in keys])
+
+    assert report.failed == 0
+    groups = fake.groups[submitted_before:]
+    # Các nhóm được gửi song song, nên thứ tự gửi không cố định
+    assert sorted(len(group.txids) for group in groups) == [3, MAX_GROUP_SIZE, MAX_GROUP_SIZE]
+    assert all(group.accepted for group in groups)
+
+
+def test_rejected_member_is_dropped_and_the_rest_resubmitted(fake, create_event):
+    event_id = create_event(ticket_count=40)
+    keys = buyers(MAX_GROUP_SIZE)
+    # Người thứ 6 đã có vé, nên hợp đồng từ chối lần mua thứ hai của họ và cả nhóm bị từ chối
+    assert register_attendant(fake.app_id, event_id, fake, keys[5]) is not None
+    submitted_before = len(fake.groups)
+
+    report = issue_tickets(fake, fake.app_id, [Purchase(key, event_id) for key in keys])
+
+    first, retry = fake.groups[submitted_before:]
+    assert not first.accepted and len(first.txids) == MAX_GROUP_SIZE
+    assert retry.accepted and len(retry.txids) == MAX_GROUP_SIZE - 1
+    assert report.results[5].txid in first.txids and "already registered" in report.results[5].error
+    assert [r.ok for r in report.results] == [i != 5 for i in range(MAX_GROUP_SIZE)]
+    assert fake.simulator.events[event_id][4] == MAX_GROUP_SIZE
+
+
+class UnnamedRejections(FakeAlgod):
+    """Rejects groups without saying which member failed."""
+
+    def send_transactions(self, txns, **kwargs):
+        try:
+            return super().send_transactions(txns, **kwargs)
+        except error.AlgodHTTPError as e:
+            raise error.AlgodHTTPError("logic eval error: rejected by logic", e.code) from None
+
+
+def test_unnamed_rejection_falls_back_to_single_submits(creator):
+    fake = UnnamedRejections(creator[1])
+    event_id = call_create_event(fake.app_id, 1, 2_000_000_000, 10, fake, creator[0])
+    keys = buyers(4)
+    assert register_attendant(fake.app_id, event_id, fake, keys[2]) is not None
+    submitted_before = len(fake.groups)
+
+    report = issue_tickets(fake, fake.app_id, [Purchase(key, event_id) for key in keys])
+
+    groups = fake.groups[submitted_before:]
+    assert [len(group.txids) for group in groups] == [4, 1, 1, 1, 1]
+    assert [group.accepted for group in groups[1:]] == [True, True, False, True]
+    assert [r.ok for r in report.results] == [True, True, False, True]
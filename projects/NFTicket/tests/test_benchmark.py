@@ -0,0 +1,40 @@
+import re
+
+from algosdk import account, error
+
+from smart_contracts._helpers.benchmark import OnSaleConfig, run_onsale
+from smart_contracts._helpers.fake_algod import FakeAlgod
+
+
+class PcOnlyAlgod(FakeAlgod):
+    """Reports failed asserts by program counter only, as a real node does."""
+
+    def send_transactions(self, txns, **kwargs):
+        try:
+            return super().send_transactions(txns, **kwargs)
+        except error.AlgodHTTPError as e:
+            raise error.AlgodHTTPError(re.sub(r"assert failed: .*", "assert failed pc=97", str(e)), e.code) from e
+
+
+def onsale(algod_class: type[FakeAlgod], tickets: int):
+    creator_key, creator = account.generate_account()
+    fake = algod_class(creator)
+    # Một luồng gửi để thứ tự mua, và do đó kết quả, giống nhau giữa các lần chạy
+    config = OnSaleConfig(buyers=60, tickets=tickets, duplicate_rate=0.5, concurrency=1, seed=3)
+    return run_onsale(fake, fake.app_id, creator_key, config, "fake")
+
+
+def test_duplicates_are_attributed_from_chain_state_without_error_reasons():
+    result = onsale(PcOnlyAlgod, tickets=100)
+
+    assert "already registered" not in result.errors
+    assert result.duplicates_rejected == result.duplicates_sent > 0
+    assert result.buyers_confirmed_twice == 0
+
+
+def test_sold_out_rejections_of_buyers_without_a_ticket_are_not_counted():
+    described = onsale(FakeAlgod, tickets=20)
+    pc_only = onsale(PcOnlyAlgod, tickets=20)
+
+    assert described.tickets_remaining == pc_only.tickets_remaining == 0
+    assert 0 < pc_only.duplicates_rejected == described.duplicates_rejected < described.duplicates_sent
@@ -0,0 +1,166 @@
+import urllib.error
+
+import pytest
+from algosdk import error
+from algosdk.transaction import PaymentTxn
+
+from smart_contracts._helpers.bulk_events import (
+    CONFIRMED,
+    BulkEventCreator,
+    EventRow,
+    Journal,
+    ManifestError,
+    read_manifest,
+)
+from smart_contracts._helpers.event_box import event_funding
+from smart_contracts._helpers.fake_algod import FakeAlgod
+
+NOW = 1_700_000_000
+
+
+def manifest_rows(count: int) -> list[EventRow]:
+    return [EventRow(f"row-{i}", 1, 2_000_000_000 + i, 2) for i in range(count)]
+
+
+@pytest.fixture
+def journal_path(tmp_path) -> str:
+    return str(tmp_path / "events.csv.journal")
+
+
+def run(fake, creator, journal_path, rows, **kwargs):
+    bulk = BulkEventCreator(fake.app_id, journal_path, fake, creator[0], validity_rounds=5, **kwargs)
+    try:
+        return bulk.run(rows)
+    finally:
+        bulk.close()
+
+
+class SendFailure(FakeAlgod):
+    """Raises `exc` on the given send_transactions calls, before or after the node accepts the group."""
+
+    def __init__(self, creator: str, exc: BaseException, calls: set[int], after_accept: bool, **kwargs):
+        super().__init__(creator, **kwargs)
+        self.exc, self.calls, self.after_accept = exc, calls, after_accept
+        self.sends = 0
+
+    def send_transactions(self, txns, **kwargs):
+        self.sends += 1
+        if self.sends not in self.calls:
+            return super().send_transactions(txns, **kwargs)
+        if self.after_accept:
+            super().send_transactions(txns, **kwargs)
+        raise self.exc
+
+
+class Overspend(FakeAlgod):
+    """Rejects groups whose MBR payment exceeds what the creator can afford."""
+
+    limit = event_funding(100)
+
+    def _accept(self, txids, txns):
+        for txid, stxn in zip(txids, txns):
+            if isinstance(stxn.transaction, PaymentTxn) and stxn.transaction.amt > self.limit:
+                raise error.AlgodHTTPError(f"transaction {txid}: overspend", 400)
+        super()._accept(txids, txns)
+
+
+def test_read_manifest_reports_every_invalid_row(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text(
+        "nft_id,end_timestamp,ticket_count,key\n"
+        f"1,{NOW + 10},5,a\n"
+        f"x,{NOW + 10},5,b\n"
+        f"2,{NOW - 10},5,c\n"
+        f"3,{NOW + 10},0,d\n"
+        f"4,{NOW + 20},5,a\n"
+        f"5,{NOW + 30},5,\n"
+    )
+
+    with pytest.raises(ManifestError) as raised:
+        read_manifest(str(path), now=NOW)
+
+    assert str(raised.value).splitlines() == [
+        "row 2: nft_id is not an integer: 'x'",
+        f"row 3: end_timestamp {NOW - 10} is in the past",
+        "row 4: ticket_count must be a positive uint64",
+        "row 5: duplicate key 'a' (first seen in row 1)",
+    ]
+    json_path = tmp_path / "events.json"
+    json_path.write_text('{"events": [{"nft_id": 5, "end_timestamp": %d, "ticket_count": 5}]}' % (NOW + 30))
+    assert read_manifest(str(json_path), now=NOW) == [EventRow(f"5:{NOW + 30}", 5, NOW + 30, 5)]
+
+
+def test_groups_are_sent_without_waiting_for_earlier_ones(creator, journal_path):
+    fake = FakeAlgod(creator[1], block_time=1.0)
+
+    report = run(fake, creator, journal_path, manifest_rows(40), depth=4)
+
+    assert (report.created, report.groups, report.failed) == (40, 3, {})
+    assert [len(group.txids) for group in fake.groups] == [16, 16, 11]
+    # Các nhóm được gửi trong cùng round, trước khi nhóm trước được xác nhận
+    assert len({group.round for group in fake.groups}) < len(fake.groups)
+    assert fake.simulator.event_count == 40
+
+
+def test_rerun_skips_rows_confirmed_by_the_journal(fake, creator, journal_path):
+    rows = manifest_rows(20)
+    run(fake, creator, journal_path, rows[:10])
+
+    report = run(fake, creator, journal_path, rows)
+
+    assert (report.skipped, report.created, report.recovered) == (10, 10, 0)
+    assert fake.simulator.event_count == 20
+
+
+def test_crash_between_journal_and_send_resends_the_rows_once_they_expired(creator, journal_path):
+    fake = SendFailure(creator[1], KeyboardInterrupt(), calls={2}, after_accept=False)
+    with pytest.raises(KeyboardInterrupt):
+        run(fake, creator, journal_path, manifest_rows(20))
+    assert fake.simulator.event_count == 15
+
+    report = run(fake, creator, journal_path, manifest_rows(20))
+
+    assert (report.recovered, report.created, report.failed) == (15, 5, {})
+    assert fake.simulator.event_count == 20
+
+
+def test_crash_after_send_recovers_the_confirmed_rows(creator, journal_path):
+    fake = SendFailure(creator[1], KeyboardInterrupt(), calls={2}, after_accept=True)
+    with pytest.raises(KeyboardInterrupt):
+        run(fake, creator, journal_path, manifest_rows(20))
+
+    report = run(fake, creator, journal_path, manifest_rows(20))
+
+    assert (report.recovered, report.created) == (20, 0)
+    assert fake.simulator.event_count == 20
+
+
+def test_lost_response_after_the_node_accepted_creates_no_duplicates(creator, journal_path):
+    fake = SendFailure(creator[1], urllib.error.URLError("connection reset"), calls={1, 2}, after_accept=True)
+
+    report = run(fake, creator, journal_path, manifest_rows(20))
+
+    assert (report.created, report.failed) == (20, {})
+    assert fake.simulator.event_count == 20
+    assert all(entry["state"] == CONFIRMED for entry in Journal(journal_path, fake.app_id).entries.values())
+
+
+def test_lost_response_before_the_node_got_the_group_is_resent(creator, journal_path):
+    fake = SendFailure(creator[1], urllib.error.URLError("timed out"), calls={1}, after_accept=False)
+
+    report = run(fake, creator, journal_path, manifest_rows(20))
+
+    assert (report.created, report.failed) == (20, {})
+    assert fake.simulator.event_count == 20
+
+
+def test_one_rejected_row_does_not_fail_the_rest_of_its_group(creator, journal_path):
+    fake = Overspend(creator[1])
+    rows = manifest_rows(15)
+    rows[3] = EventRow("huge", 1, 2_100_000_000, 10_000)
+
+    report = run(fake, creator, journal_path, rows)
+
+    assert report.created == 14
+    assert list(report.failed) == ["huge"] and "overspend" in report.failed["huge"]
+    assert fake.simulator.event_count == 14
@@ -0,0 +1,128 @@
+import gc
+import time
+import weakref
+
+import pytest
+from algosdk import account, error
+from algosdk.transaction import PaymentTxn
+
+from smart_contracts._helpers import confirmation
+from smart_contracts._helpers.confirmation import (
+    ConfirmationWaiter,
+    block_transactions,
+    decode_block,
+    get_confirmation_waiter,
+)
+from smart_contracts._helpers.fake_algod import FakeAlgod
+from smart_contracts._helpers.manage_attendants import register_attendant
+
+
+class CountingAlgod(FakeAlgod):
+    """Counts node calls and fails `status_after_block` while `outage` is set."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls: dict[str, int] = {}
+        self.outage = False
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def status_after_block(self, *args, **kwargs):
+        self._count("status_after_block")
+        if self.outage:
+            raise error.AlgodHTTPError("service unavailable", 503)
+        return super().status_after_block(*args, **kwargs)
+
+    def block_info(self, *args, **kwargs):
+        self._count("block_info")
+        return super().block_info(*args, **kwargs)
+
+    def pending_transaction_info(self, *args, **kwargs):
+        self._count("pending_transaction_info")
+        return super().pending_transaction_info(*args, **kwargs)
+
+
+@pytest.fixture
+def node(creator) -> CountingAlgod:
+    return CountingAlgod(creator[1])
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(confirmation, "BACKOFF_SECONDS", 0.01)
+
+
+def send_payments(node, private_key: str, count: int) -> list[str]:
+    sender = account.address_from_private_key(private_key)
+    params = node.suggested_params()
+    return [
+        node.send_transaction(PaymentTxn(sender, params, account.generate_account()[1], 100_000 + i).sign(private_key))
+        for i in range(count)
+    ]
+
+
+def test_many_watches_cost_one_block_read_per_round(node, creator):
+    waiter = ConfirmationWaiter(node)
+    txids = send_payments(node, creator[0], 50)
+
+    infos = [waiter.watch(txid).result(timeout=10) for txid in txids]
+
+    assert {info["confirmed-round"] for info in infos} == {node.round}
+    assert "pending_transaction_info" not in node.calls
+    assert node.calls["block_info"] <= node.round
+    waiter.close()
+
+
+def test_node_errors_are_retried_without_failing_watches(node, creator):
+    waiter = ConfirmationWaiter(node)
+    node.outage = True
+    future = waiter.watch(send_payments(node, creator[0], 1)[0])
+    while node.calls.get("status_after_block", 0) < 3:
+        time.sleep(0.01)
+    assert not future.done()
+
+    node.outage = False
+    assert future.result(timeout=10)["confirmed-round"] > 0
+    waiter.close()
+
+
+def test_only_watches_past_their_deadline_fail_during_an_outage(node, creator):
+    waiter = ConfirmationWaiter(node, round_seconds=0.01)
+    node.outage = True
+    short, long = send_payments(node, creator[0], 2)
+    short_future = waiter.watch(short, timeout_rounds=1)
+    long_future = waiter.watch(long, timeout_rounds=100_000)
+
+    with pytest.raises(error.AlgodHTTPError):
+        short_future.result(timeout=10)
+    assert not long_future.done()
+
+    node.outage = False
+    assert long_future.result(timeout=10)["confirmed-round"] > 0
+    waiter.close()
+
+
+def test_shared_waiter_does_not_keep_its_client_alive(creator):
+    node = FakeAlgod(creator[1])
+    waiter = get_confirmation_waiter(node)
+    client_ref = weakref.ref(node)
+
+    del node
+    gc.collect()
+
+    assert client_ref() is None
+    assert waiter not in confirmation._waiters.values()
+    with pytest.raises(RuntimeError):
+        waiter.watch("TXID")
+
+
+def test_txids_computed_from_blocks_match_the_submitted_ones(fake, create_event):
+    event_id = create_event()
+    register_attendant(fake.app_id, event_id, fake, account.generate_account()[0])
+
+    from_blocks = set()
+    for round_num in range(1, fake.round + 1):
+        from_blocks |= set(block_transactions(round_num, decode_block(fake.block_info(round_num, response_format="msgpack"))))
+
+    assert from_blocks == {txid for group in fake.groups if group.accepted for txid in group.txids}
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import account
+
+from smart_contracts._helpers.create_event import call_create_event
+from smart_contracts._helpers.instrumentation import metrics
+
+
+def test_concurrent_calls_get_distinct_event_ids(fake, creator):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        event_ids = list(pool.map(
+            lambda nft_id: call_create_event(fake.app_id, nft_id, 2_000_000_000, 3, fake, creator[0]), range(1, 9)
+        ))
+
+    assert sorted(event_ids) == list(range(1, 9))
+    assert {fake.simulator.events[event_id][0] for event_id in event_ids} == set(range(1, 9))
+
+
+def test_events_created_elsewhere_are_not_reused(fake, creator):
+    assert call_create_event(fake.app_id, 1, 2_000_000_000, 3, fake, creator[0]) == 1
+    fake.simulator.call(fake.simulator.creator, [b"create_event", *(v.to_bytes(8, 'big') for v in (2, 2_000_000_000, 3))])
+
+    assert call_create_event(fake.app_id, 3, 2_000_000_000, 3, fake, creator[0]) == 3
+
+
+def test_failed_call_records_the_error_type_on_its_span(fake):
+    spans = []
+    metrics.add_hook(spans.append)
+    try:
+        assert call_create_event(fake.app_id, 1, 2_000_000_000, 3, fake, account.generate_account()[0]) is None
+    finally:
+        metrics.remove_hook(spans.append)
+
+    operation = next(span for span in spans if span.name == "create_event")
+    assert (operation.status, operation.error, operation.error_type) == ("error", "logic_eval", "AlgodHTTPError")
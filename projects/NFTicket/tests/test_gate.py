@@ -0,0 +1,66 @@
+from algosdk import account, encoding
+
+from smart_contracts._helpers.gate import GateVerifier, ScanResult
+from smart_contracts._helpers.manage_attendants import register_attendant
+
+
+def buy(fake, event_id: int) -> str:
+    key = account.generate_account()[0]
+    assert register_attendant(fake.app_id, event_id, fake, key) is not None
+    return account.address_from_private_key(key)
+
+
+def test_preload_keeps_only_the_event_attendees(fake, create_event):
+    event_id, other_event_id = create_event(), create_event()
+    holders = [buy(fake, event_id) for _ in range(3)]
+    other = buy(fake, other_event_id)
+    gate = GateVerifier(fake.app_id, event_id, fake)
+
+    assert gate.preload() == 3
+    assert all(encoding.decode_address(address) in gate.attendees for address in holders)
+    assert encoding.decode_address(other) not in gate.attendees
+    assert gate.round == fake.round
+
+
+def test_catch_up_adds_buyers_from_new_blocks(fake, create_event):
+    event_id, other_event_id = create_event(), create_event()
+    gate = GateVerifier(fake.app_id, event_id, fake)
+    gate.preload()
+    holder, other = buy(fake, event_id), buy(fake, other_event_id)
+
+    assert gate.catch_up() == fake.round
+
+    assert gate.verify(holder).source == "cache"
+    assert encoding.decode_address(other) not in gate.attendees
+    assert gate.stats.added_from_blocks == 1
+    assert gate.stats.chain_queries == 0
+
+
+def test_negative_answer_is_kept_until_the_next_round_is_applied(fake, create_event):
+    event_id = create_event()
+    gate = GateVerifier(fake.app_id, event_id, fake)
+    gate.preload()
+    stranger = account.generate_account()[1]
+
+    assert gate.verify(stranger).source == "chain"
+    assert gate.verify(stranger).source == "negative"
+    assert gate.stats.chain_queries == 1
+
+    buy(fake, event_id)
+    gate.catch_up()
+
+    # Round mới đã được áp dụng: địa chỉ bị từ chối được hỏi lại chain một lần
+    assert gate.verify(stranger) == ScanResult(False, "chain")
+    assert gate.stats.chain_queries == 2
+
+
+def test_purchase_not_yet_applied_is_admitted_from_the_chain(fake, create_event):
+    event_id = create_event()
+    gate = GateVerifier(fake.app_id, event_id, fake)
+    gate.preload()
+    holder = buy(fake, event_id)
+
+    result = gate.verify(holder)
+
+    assert (result.admitted, result.source, result.ticket_number) == (True, "chain", 1)
+    assert gate.verify(holder).source == "cache"
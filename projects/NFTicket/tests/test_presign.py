@@ -0,0 +1,111 @@
+import base64
+
+import msgpack
+import pytest
+from algosdk import account
+
+from smart_contracts._helpers.fake_algod import FakeAlgod
+from smart_contracts._helpers.presign import (
+    TxnSpec,
+    ValidityWindow,
+    read_signed,
+    send_signed,
+    sign_all,
+    write_signed,
+)
+from smart_contracts._helpers.rate_limit import RateLimiter
+
+
+def buyers(count: int) -> list[str]:
+    return [account.generate_account()[0] for _ in range(count)]
+
+
+def test_signed_file_round_trips(fake, tmp_path):
+    window = ValidityWindow.from_node(fake, rounds=10, delay=2)
+    specs = [TxnSpec(key, 1) for key in buyers(2)] + [TxnSpec(buyers(1)[0], 0, "opt_in")]
+    records = list(sign_all(fake.app_id, window, specs, workers=1))
+    path = str(tmp_path / "signed.msgpack")
+
+    assert write_signed(path, fake.app_id, window, records) == 3
+    header, read = read_signed(path)
+
+    assert header["app_id"] == fake.app_id
+    assert ValidityWindow(**header["window"]) == window
+    assert list(read) == records
+    txn = msgpack.unpackb(records[0].blob, raw=False)["txn"]
+    assert (txn["fv"], txn["lv"]) == (fake.round + 3, fake.round + 13)
+
+
+class AdvancingAlgod(FakeAlgod):
+    """Moves two rounds on after `accepted` transactions have entered the pool."""
+
+    accepted = 2
+
+    def send_raw_transaction(self, txn, **kwargs):
+        txid = super().send_raw_transaction(txn, **kwargs)
+        self.accepted -= 1
+        if self.accepted == 0:
+            self.status_after_block(self.round)
+            self.status_after_block(self.round)
+        return txid
+
+
+def test_send_stops_once_the_validity_window_has_passed(creator, tmp_path):
+    node = AdvancingAlgod(creator[1])
+    window = ValidityWindow.from_node(node, rounds=1)
+    path = str(tmp_path / "signed.msgpack")
+    write_signed(path, node.app_id, window, sign_all(node.app_id, window, [TxnSpec(key, 0, "opt_in") for key in buyers(5)], workers=1))
+
+    report = send_signed(node, path, rate=1000, concurrency=1)
+
+    assert (report.sent, report.expired, report.rejected) == (2, 3, 0)
+    assert report.errors == {"txn_dead": 1}
+    assert len(node.groups) == 3
+
+
+def test_send_refuses_a_window_that_has_passed(fake, tmp_path):
+    window = ValidityWindow(1, 2, "fake-v1", base64.b64encode(bytes(32)).decode())
+    fake.status_after_block(fake.round + 1)
+    path = str(tmp_path / "signed.msgpack")
+    write_signed(path, fake.app_id, window, [])
+
+    with pytest.raises(ValueError, match="has passed"):
+        send_signed(fake, path, rate=1000)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+def test_rate_limiter_allows_a_burst_then_paces_at_the_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(10, burst=2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        limiter.acquire()
+
+    assert clock.sleeps == [0.1, 0.1, 0.1]
+    clock.now += 1.0
+    assert limiter.acquire() == 0.0 and limiter.acquire() == 0.0
+
+
+def test_waiting_callers_reserve_their_tokens_in_arrival_order():
+    clock = FakeClock()
+    limiter = RateLimiter(10, clock=clock, sleep=lambda seconds: None)
+
+    waits = [round(limiter.acquire(), 6) for _ in range(4)]
+    limiter.set_rate(20)
+
+    assert waits == [0.0, 0.1, 0.2, 0.3]
+    # 0.1s ở tốc độ mới trả được 2 trong 3 token còn nợ
+    clock.now = 0.1
+    assert round(limiter.acquire(), 6) == 0.1
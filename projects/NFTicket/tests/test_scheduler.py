@@ -0,0 +1,85 @@
+import time
+
+import pytest
+from algosdk import account
+from algosdk.transaction import ApplicationNoOpTxn, PaymentTxn
+
+from smart_contracts._helpers.app_args import add_attendant_args
+from smart_contracts._helpers.event_box import add_attendant_box_refs
+from smart_contracts._helpers.fake_algod import MIN_FEE, FakeAlgod
+from smart_contracts._helpers.scheduler import LOGIC_EVAL, TRANSIENT, SubmissionError, SubmissionScheduler
+
+
+def fill_pool(node: FakeAlgod, key: str, count: int) -> None:
+    sender = account.address_from_private_key(key)
+    params = node.suggested_params()
+    # Phí đủ cao để vào được cả pool đã nghẽn
+    params.fee = 2 * MIN_FEE
+    for amount in range(count):
+        node.send_transaction(PaymentTxn(sender, params, sender, amount).sign(key))
+
+
+def ticket_txn(node: FakeAlgod, key: str, event_id: int) -> ApplicationNoOpTxn:
+    sender = account.address_from_private_key(key)
+    return ApplicationNoOpTxn(
+        sender, node.suggested_params(), node.app_id, add_attendant_args(event_id),
+        boxes=add_attendant_box_refs(event_id, sender),
+    )
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_fee_below_the_pool_threshold_is_raised_and_resent(creator):
+    node = FakeAlgod(creator[1], pool_capacity=4)
+    event_id = 1
+    node.simulator.call(node.simulator.creator, [b"create_event", *(v.to_bytes(8, 'big') for v in (1, 2_000_000_000, 5))])
+    fill_pool(node, creator[0], 2)
+    key = account.generate_account()[0]
+
+    with SubmissionScheduler(node) as scheduler:
+        info = scheduler.submit(ticket_txn(node, key, event_id), key).result(timeout=5)
+
+    assert info["confirmed-round"] > 0
+    assert info["txn"]["txn"]["fee"] == 2 * MIN_FEE
+    assert scheduler.stats.fee_bumps == 1
+    assert [group.accepted for group in node.groups[2:]] == [False, True]
+
+
+def test_full_pool_is_retried_with_backoff_at_a_lower_rate(creator):
+    node = FakeAlgod(creator[1], pool_capacity=2)
+    node.simulator.call(node.simulator.creator, [b"create_event", *(v.to_bytes(8, 'big') for v in (1, 2_000_000_000, 5))])
+    fill_pool(node, creator[0], 2)
+    key = account.generate_account()[0]
+
+    with SubmissionScheduler(node, rate=100, backoff=0.01) as scheduler:
+        future = scheduler.submit(ticket_txn(node, key, 1), key)
+        wait_until(lambda: len(node.groups) > 2)
+        # Block mới dọn pool, nên lần thử lại sau backoff được nhận
+        node.status_after_block(node.round)
+        info = future.result(timeout=5)
+
+    assert info["confirmed-round"] > 0
+    assert scheduler.stats.errors[TRANSIENT] >= 1
+    assert scheduler.stats.retries == scheduler.stats.errors[TRANSIENT]
+    assert scheduler.stats.rate < 100
+
+
+def test_logic_eval_rejection_is_not_retried(fake, creator, create_event):
+    event_id = create_event(ticket_count=1)
+    keys = [account.generate_account()[0] for _ in range(2)]
+
+    with SubmissionScheduler(fake) as scheduler:
+        sold = scheduler.submit(ticket_txn(fake, keys[0], event_id), keys[0])
+        assert sold.result(timeout=5)["confirmed-round"] > 0
+        sent_before = len(fake.groups)
+        with pytest.raises(SubmissionError) as rejected:
+            scheduler.submit(ticket_txn(fake, keys[1], event_id), keys[1]).result(timeout=5)
+
+    assert (rejected.value.reason, rejected.value.attempts) == (LOGIC_EVAL, 1)
+    assert len(fake.groups) == sent_before + 1
+    assert scheduler.stats.retries == 0
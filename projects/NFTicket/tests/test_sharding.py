@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from smart_contracts._helpers import registry
+from smart_contracts._helpers.event_box import BOX_BYTE_MBR, FIELD_SIZE
+from smart_contracts._helpers.fake_algod import FakeAlgod
+from smart_contracts._helpers.sharding import RoutingTable, ShardRouter
+
+REGISTRY_APP_ID = 100
+
+
+@pytest.fixture
+def sharded(creator) -> FakeAlgod:
+    return FakeAlgod(creator[1], apps=3, registry_app_id=REGISTRY_APP_ID)
+
+
+@pytest.fixture
+def router(sharded, creator, tmp_path) -> ShardRouter:
+    router = ShardRouter(RoutingTable([], registry_app_id=REGISTRY_APP_ID), str(tmp_path / "routing.json"), sharded, creator[0])
+    router.add_shards([1, 2, 3])
+    return router
+
+
+def test_concurrent_creates_rotate_through_the_shards(router, sharded):
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        created = dict(pool.map(lambda nft_id: (router.create_event(nft_id, 2_000_000_000, 3), nft_id), range(1, 10)))
+
+    assert sorted(created) == list(range(1, 10))
+    for global_id, nft_id in created.items():
+        route = router.table.route(global_id)
+        assert route.app_id == (global_id - 1) % 3 + 1
+        assert sharded.simulators[route.app_id].events[route.event_id][0] == nft_id
+    assert [sharded.simulators[app_id].event_count for app_id in (1, 2, 3)] == [3, 3, 3]
+
+
+def test_table_is_saved_and_restored_from_the_registry(router, sharded, creator):
+    created = [router.create_event(nft_id, 2_000_000_000, 3) for nft_id in range(1, 5)]
+    router.add_attendant(created[2], creator[0])
+
+    saved = RoutingTable.load(router.path)
+    restored = RoutingTable.from_registry(REGISTRY_APP_ID, sharded)
+
+    assert saved == router.table
+    assert restored == router.table
+    assert ShardRouter(restored, client=sharded).event(created[2]).issued == 1
+
+
+def test_failed_create_skips_its_global_id(router, sharded, monkeypatch):
+    monkeypatch.setattr(sharded.simulators[2], "creator", bytes(32))
+
+    assert router.create_event(1, 2_000_000_000, 3) == 1
+    assert router.create_event(2, 2_000_000_000, 3) is None
+    assert router.create_event(3, 2_000_000_000, 3) == 3
+
+    assert RoutingTable.load(router.path).next_event_id == 4
+    assert sorted(router.table.events) == [1, 3]
+    assert router.table.route(3).app_id == 3
+
+
+def test_growing_the_shard_list_pays_only_the_extra_box_bytes(router, sharded):
+    router.add_shards([4])
+
+    pay = sharded.pending_transaction_info(sharded.groups[-1].txids[0])["txn"]["txn"]
+    assert pay["type"] == "pay"
+    assert pay["amt"] == BOX_BYTE_MBR * FIELD_SIZE
+    assert registry.read_registry(REGISTRY_APP_ID, sharded)[0] == [1, 2, 3, 4]
+
+
+def test_creates_share_blocks_instead_of_waiting_for_each_other(creator):
+    sharded = FakeAlgod(creator[1], apps=3, block_time=0.05)
+    router = ShardRouter(RoutingTable([1, 2, 3]), client=sharded, private_key=creator[0])
+    start = sharded.status()["last-round"]
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        assert None not in pool.map(lambda nft_id: router.create_event(nft_id, 2_000_000_000, 3), range(1, 7))
+
+    # Nối tiếp nhau thì mỗi lời gọi chờ ít nhất một block
+    assert sharded.status()["last-round"] - start < 6
@@ -0,0 +1,75 @@
+import pytest
+from algosdk import account
+
+from smart_contracts._helpers.create_event import call_create_event
+from smart_contracts._helpers.fake_algod import FakeAlgod
+from smart_contracts._helpers.sweeper import ExpirySweeper
+
+START = 1_000_000.0
+
+
+class Clock:
+    """Wall clock that only moves when the sweeper sleeps."""
+
+    def __init__(self):
+        self.now = START
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float) -> None:
+        self.sleeps.append(round(delay, 3))
+        self.now += delay
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def chain(clock) -> tuple[FakeAlgod, str]:
+    private_key, address = account.generate_account()
+    return FakeAlgod(address, clock=clock.time), private_key
+
+
+def create_events(chain, clock, *ends: int) -> None:
+    fake, private_key = chain
+    for end in ends:
+        call_create_event(fake.app_id, 1, int(clock.now) + end, 2, fake, private_key)
+
+
+def stopped_events(fake: FakeAlgod) -> list[int]:
+    return sorted(event_id for event_id, record in fake.simulator.events.items() if record[2])
+
+
+def test_run_sleeps_until_each_end_and_stops_due_events(chain, clock):
+    create_events(chain, clock, 100, 100, 250)
+    sweeper = ExpirySweeper(chain[0].app_id, *chain, clock=clock.time, sleep=clock.sleep, grace=0, refresh_interval=10_000)
+
+    assert sweeper.load() == 3
+    sweeper.run(until=START + 1000)
+
+    assert clock.sleeps[:2] == [100, 150]
+    assert stopped_events(chain[0]) == [1, 2, 3]
+    assert (sweeper.stats.stopped, sweeper.stats.sweeps, sweeper.stats.abandoned) == (3, 2, 0)
+
+
+def test_abandoned_event_is_not_rescheduled_by_later_refreshes(chain, clock):
+    create_events(chain, clock, 100)
+    # Grace âm: hợp đồng từ chối lời gọi dừng vì sự kiện chưa kết thúc
+    sweeper = ExpirySweeper(
+        chain[0].app_id, *chain, clock=clock.time, sleep=clock.sleep,
+        grace=-60, retry_delay=10, max_attempts=2, refresh_interval=30,
+    )
+
+    sweeper.run(until=START + 90)
+    assert (sweeper.stats.abandoned, sweeper.stats.sweeps) == (1, 2)
+
+    sweeper.run(until=START + 1000)
+
+    assert sweeper.load() == 0
+    assert sweeper.next_wake() is None
+    assert (sweeper.stats.abandoned, sweeper.stats.retried, sweeper.stats.sweeps) == (1, 1, 2)
+    assert stopped_events(chain[0]) == []
@@ -0,0 +1,83 @@
+import base64
+import json
+from pathlib import Path
+
+import pytest
+from algosdk import logic
+
+from smart_contracts._helpers.teal_assembler import assemble
+from smart_contracts._helpers.teal_cache import (
+    ALGOD_COMPILER,
+    OFFLINE_COMPILER,
+    CacheMismatchError,
+    TealCache,
+    compile_teal,
+    source_key,
+)
+
+SOURCE = "#pragma version 8\nint 1\nreturn\n"
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+# Kết quả /compile của algod cho chương trình thật; ghi lại bằng
+# `python -m smart_contracts._helpers.teal_cache --record tests/golden/compile.json approval.teal clear_state.teal`
+GOLDEN = json.loads((Path(__file__).resolve().parent / "golden" / "compile.json").read_text())
+
+
+@pytest.fixture
+def cache(tmp_path) -> TealCache:
+    return TealCache(tmp_path)
+
+
+def test_offline_entry_is_rechecked_and_replaced_when_a_node_is_available(fake, cache):
+    assert compile_teal(SOURCE, client=fake, cache=cache, offline=True).compiler == OFFLINE_COMPILER
+    assert fake.compiled == 0
+
+    program = compile_teal(SOURCE, client=fake, cache=cache)
+
+    assert fake.compiled == 1
+    assert program.compiler == ALGOD_COMPILER
+    assert cache.get(SOURCE) == program
+    assert compile_teal(SOURCE, client=fake, cache=cache) == program
+    assert fake.compiled == 1
+
+
+def test_offline_deploys_keep_using_the_offline_entry(fake, cache):
+    compile_teal(SOURCE, client=fake, cache=cache, offline=True)
+
+    assert compile_teal(SOURCE, client=fake, cache=cache, offline=True).compiler == OFFLINE_COMPILER
+    assert fake.compiled == 0
+
+
+def test_offline_entry_that_differs_from_the_node_is_refused(fake, cache, monkeypatch):
+    compile_teal(SOURCE, client=fake, cache=cache, offline=True)
+    node_program = fake.compile("#pragma version 8\nint 2\nreturn\n")
+    monkeypatch.setattr(fake, "compile", lambda source, **kwargs: node_program)
+
+    with pytest.raises(CacheMismatchError):
+        compile_teal(SOURCE, client=fake, cache=cache)
+    assert cache.get(SOURCE).compiler == OFFLINE_COMPILER
+    assert base64.b64decode(node_program["result"]) != cache.get(SOURCE).bytecode
+
+
+@pytest.mark.parametrize("file_name", sorted(GOLDEN))
+def test_assembler_matches_the_recorded_node_output(file_name):
+    source = (PROJECT_DIR / file_name).read_text()
+    golden = GOLDEN[file_name]
+    assert source_key(source)[0] == golden["source_sha256"], f"{file_name} changed; record tests/golden/compile.json again"
+
+    bytecode = assemble(source).bytecode
+
+    assert base64.b64encode(bytecode).decode() == golden["result"]
+    assert logic.address(bytecode) == golden["hash"]
+
+
+def test_offline_approval_entry_checks_out_against_the_node(fake, cache, monkeypatch):
+    source = (PROJECT_DIR / "approval.teal").read_text()
+    golden = GOLDEN["approval.teal"]
+    offline = compile_teal(source, client=fake, cache=cache, offline=True)
+    monkeypatch.setattr(fake, "compile", lambda source, **kwargs: {"hash": golden["hash"], "result": golden["result"]})
+
+    program = compile_teal(source, client=fake, cache=cache)
+
+    assert program.compiler == ALGOD_COMPILER
+    assert program.bytecode == offline.bytecode
+    assert cache.get(source) == program
@@ -0,0 +1,104 @@
+import base64
+import json
+import sqlite3
+
+from algosdk import account
+
+from smart_contracts._helpers.ticket_index import RecordedFeed, TicketIndex
+
+APP_ID = 1001
+
+
+def app_call(txid: str, round_num: int, sender: str, *args: bytes, event_count: int | None = None) -> dict:
+    txn = {
+        'id': txid,
+        'sender': sender,
+        'confirmed-round': round_num,
+        'round-time': 1_700_000_000 + round_num * 3,
+        'application-transaction': {
+            'application-id': APP_ID,
+            'on-completion': 'noop',
+            'application-args': [base64.b64encode(arg).decode() for arg in args],
+        },
+    }
+    if event_count is not None:
+        txn['global-state-delta'] = [{'key': base64.b64encode(b"event_count").decode(), 'value': {'action': 2, 'uint': event_count}}]
+    return txn
+
+
+def itob(value: int) -> bytes:
+    return value.to_bytes(8, 'big')
+
+
+def recorded_history(creator: str, buyers: list[str]) -> list[dict]:
+    history = [app_call("CREATE", 10, creator, b"create_event", itob(7), itob(2_000_000_000), itob(5), event_count=1)]
+    history += [app_call(f"BUY{i}", 11 + i, buyer, b"add_attendant", itob(1)) for i, buyer in enumerate(buyers)]
+    history.append(app_call("STOP", 11 + len(buyers), creator, b"stop_event", itob(1)))
+    return history
+
+
+def test_sync_indexes_confirmed_calls_across_pages(tmp_path):
+    creator = account.generate_account()[1]
+    buyers = [account.generate_account()[1] for _ in range(3)]
+    index = TicketIndex(str(tmp_path / "tickets.sqlite"), APP_ID)
+
+    assert index.sync(RecordedFeed(recorded_history(creator, buyers)), limit=2) == 5
+
+    assert index.attendees(1) == [(buyer, i + 1, 11 + i) for i, buyer in enumerate(buyers)]
+    assert index.has_ticket(1, buyers[0]) and not index.has_ticket(1, creator)
+    assert index.db.execute("SELECT nft_id, ticket_count, stopped_round FROM events").fetchall() == [(7, 5, 14)]
+    assert index.checkpoint == 14
+
+
+def test_resync_from_a_recorded_file_applies_only_new_calls(tmp_path):
+    creator = account.generate_account()[1]
+    buyers = [account.generate_account()[1] for _ in range(2)]
+    history = recorded_history(creator, buyers)
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps(history[:2]))
+    index = TicketIndex(str(tmp_path / "tickets.sqlite"), APP_ID)
+    assert index.sync(RecordedFeed.from_file(str(path))) == 2
+
+    path.write_text(json.dumps(history))
+    assert index.sync(RecordedFeed.from_file(str(path))) == 2
+    assert index.sync(RecordedFeed.from_file(str(path))) == 0
+
+    assert [row[1] for row in index.attendees(1)] == [1, 2]
+    assert sum(count for _, count in index.sales_per_minute(1)) == 2
+
+
+def test_seen_txids_are_pruned_below_the_checkpoint_round(tmp_path):
+    creator = account.generate_account()[1]
+    buyers = [account.generate_account()[1] for _ in range(3)]
+    history = recorded_history(creator, buyers)
+    # Lần mua cuối cùng round với lời gọi stop_event
+    history[-1]['confirmed-round'] = history[-2]['confirmed-round']
+    index = TicketIndex(str(tmp_path / "tickets.sqlite"), APP_ID)
+
+    assert index.sync(RecordedFeed(history), limit=2) == 5
+
+    assert index.db.execute("SELECT txid FROM seen_txns ORDER BY txid").fetchall() == [("BUY2",), ("STOP",)]
+    assert index.sync(RecordedFeed(history)) == 0
+
+
+def test_index_built_by_the_old_schema_is_migrated(tmp_path):
+    creator = account.generate_account()[1]
+    buyers = [account.generate_account()[1] for _ in range(2)]
+    history = recorded_history(creator, buyers)
+    db_path = str(tmp_path / "tickets.sqlite")
+    index = TicketIndex(db_path, APP_ID)
+    index.sync(RecordedFeed(history[:2]))
+    index.close()
+    with sqlite3.connect(db_path) as db:
+        db.executescript(
+            "DROP TABLE seen_txns; CREATE TABLE seen_txns (txid TEXT PRIMARY KEY);"
+            " INSERT INTO seen_txns VALUES ('CREATE'), ('BUY0');"
+            " DROP TABLE checkpoint; CREATE TABLE checkpoint (app_id INTEGER PRIMARY KEY, creator TEXT NOT NULL, round INTEGER NOT NULL);"
+            f" INSERT INTO checkpoint VALUES ({APP_ID}, '{creator}', 11);"
+        )
+
+    index = TicketIndex(db_path, APP_ID)
+
+    assert index.sync(RecordedFeed(history)) == 2
+    assert [row[1] for row in index.attendees(1)] == [1, 2]
+    assert index.db.execute("SELECT txid FROM seen_txns").fetchall() == [("STOP",)]